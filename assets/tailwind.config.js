@@ -0,0 +1,24 @@
+// Built by `python manage.py build_assets --tailwind`; keep in step with the
+// CDN fallback in templates/includes/cdn_stylesheets.html.
+module.exports = {
+    content: [
+        './templates/**/*.html',
+        './core/**/*.py',
+        './static/js/**/*.js',
+    ],
+    theme: {
+        extend: {
+            colors: {
+                primary: '#2563eb',
+                secondary: '#f97316',
+                neutral: '#f9fafb',
+                'primary-dark': '#1d4ed8',
+                'secondary-dark': '#ea580c',
+            },
+            fontFamily: {
+                'sans': ['Inter', 'ui-sans-serif', 'system-ui'],
+                'display': ['Poppins', 'ui-sans-serif', 'system-ui'],
+            },
+        },
+    },
+}
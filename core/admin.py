@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Profile, Organization, Keyword, Project, ProjectParticipant,
-    Document, Message, Event, SubscriptionPlan, CompanySubscription
+    Document, Blob, Job, Message, Conversation, ConversationParticipant, Event, SubscriptionPlan, CompanySubscription
 )
 
 @admin.register(Keyword)
@@ -37,15 +37,41 @@ class DocumentAdmin(admin.ModelAdmin):
     list_display = ('title', 'owner', 'project', 'uploaded_at')
     search_fields = ('title', 'owner__user__username')
 
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'ref_count', 'created_at')
+    search_fields = ('name', 'sha256')
+    readonly_fields = ('name', 'sha256', 'size', 'ref_count', 'created_at')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'wait_ms', 'duration_ms', 'locked_by')
+    list_filter = ('status', 'name')
+    readonly_fields = ('started_at', 'finished_at', 'wait_ms', 'duration_ms', 'last_error', 'created_at')
+
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ('sender', 'recipient', 'subject', 'sent_at', 'read')
     list_filter = ('read',)
+    raw_id_fields = ('conversation',)
+
+class ConversationParticipantInline(admin.TabularInline):
+    model = ConversationParticipant
+    readonly_fields = ('last_message_at', 'unread_count')
+    extra = 0
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'created_at')
+    search_fields = ('subject',)
+    raw_id_fields = ('last_message',)
+    inlines = [ConversationParticipantInline]
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ('title', 'organizer', 'start', 'end')
+    list_display = ('title', 'organizer', 'start', 'end', 'capacity', 'seats_taken')
     search_fields = ('title',)
+    readonly_fields = ('seats_taken',)
 
 @admin.register(SubscriptionPlan)
 class SubscriptionPlanAdmin(admin.ModelAdmin):
@@ -0,0 +1,225 @@
+"""Self-hosted static assets.
+
+``manage.py build_assets`` replaces what ``base.html`` used to pull from
+CDNs at runtime:
+
+* Tailwind is compiled ahead of time by the standalone Tailwind CLI, which
+  scans ``templates/`` and keeps only the utility classes in use.
+* The Inter and Poppins fonts and the bootstrap-icons font are vendored into
+  ``static/vendor/``; the icon stylesheet is purged down to the ``bi-*``
+  icons the templates use.
+* Everything is minified into one bundle, ``static/css/site.css``.
+
+Page-specific ``<style>`` blocks live in ``static/css/pages/`` rather than
+inline in templates, so they are cached like any other static file.
+``collectstatic`` with WhiteNoise's ``CompressedManifestStaticFilesStorage``
+then gives every file a content hash in its name, served with far-future
+cache headers, and writes the gzip and brotli variants next to it.
+
+Until the bundle has been built, ``{% site_stylesheets %}`` falls back to
+the CDN tags so a fresh checkout still renders.
+"""
+import os
+import re
+import shutil
+import subprocess
+import urllib.request
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+BUNDLE = 'css/site.css'
+PAGES_DIR = 'css/pages'
+VENDOR_DIR = 'vendor'
+
+GOOGLE_FONTS_URL = (
+    'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700'
+    '&family=Poppins:wght@300;400;500;600;700&display=swap'
+)
+FONT_SUBSETS = ('latin', 'latin-ext')
+BOOTSTRAP_ICONS_VERSION = '1.11.1'
+BOOTSTRAP_ICONS_URL = 'https://cdn.jsdelivr.net/npm/bootstrap-icons@{version}/font/{name}'
+
+# Google serves woff2 only to browsers that say they support it
+WOFF2_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+STYLE_RE = re.compile(r'(?P<indent>[ \t]*)<style[^>]*>(?P<css>.*?)</style>[ \t]*\n?', re.S | re.I)
+ICON_RE = re.compile(r'\bbi-[a-z0-9]+(?:-[a-z0-9]+)*')
+TEMPLATE_SYNTAX_RE = re.compile(r'{[{%#]')
+
+
+def static_dir():
+    return str(settings.STATICFILES_DIRS[0])
+
+
+def template_dirs():
+    return [str(path) for path in settings.TEMPLATES[0]['DIRS']]
+
+
+def template_files(*extensions):
+    for root_dir in template_dirs():
+        for root, _, files in os.walk(root_dir):
+            for name in sorted(files):
+                if name.endswith(extensions or ('.html',)):
+                    yield os.path.join(root, name)
+
+
+@lru_cache(maxsize=None)
+def bundle_built():
+    """True once ``build_assets`` has produced the stylesheet bundle."""
+    return finders.find(BUNDLE) is not None
+
+
+# --- Inline styles ----------------------------------------------------------------
+
+def page_css_name(template_name):
+    """``projects/project_detail.html`` -> ``css/pages/projects-project_detail.css``."""
+    return f"{PAGES_DIR}/{os.path.splitext(template_name)[0].replace('/', '-')}.css"
+
+
+def extract_inline_styles(source, css_name):
+    """Move ``<style>`` blocks out of a template's source.
+
+    Returns ``(new_source, css)``; blocks that use template syntax stay inline,
+    and ``css`` is empty when nothing was moved.
+    """
+    moved = []
+
+    def replace(match):
+        css = match.group('css')
+        if TEMPLATE_SYNTAX_RE.search(css):
+            return match.group(0)
+        moved.append(dedent(css))
+        if len(moved) > 1:
+            return ''
+        return f"{match.group('indent')}<link rel=\"stylesheet\" href=\"{{% static '{css_name}' %}}\">\n"
+
+    source = STYLE_RE.sub(replace, source)
+    if not moved:
+        return source, ''
+    if not re.search(r'{%\s*load\s[^%]*\bstatic\b', source):
+        extends = re.match(r'\s*{%\s*extends\s[^%]*%}\n?', source)
+        at = extends.end() if extends else 0
+        source = source[:at] + '{% load static %}\n' + source[at:]
+    return source, '\n'.join(moved)
+
+
+def dedent(css):
+    lines = [line.rstrip() for line in css.strip('\n').splitlines()]
+    indents = [len(line) - len(line.lstrip()) for line in lines if line.strip()]
+    cut = min(indents, default=0)
+    return '\n'.join(line[cut:] for line in lines).strip() + '\n'
+
+
+# --- Icons ------------------------------------------------------------------------
+
+def used_icons(paths):
+    """Every ``bi-*`` class named in the given files."""
+    icons = set()
+    for path in paths:
+        with open(path, encoding='utf-8') as fh:
+            icons.update(ICON_RE.findall(fh.read()))
+    return icons
+
+
+def purge_icon_css(css, icons):
+    """Keep only the ``.bi-NAME::before`` rules for ``icons`` (and the shared rules)."""
+    kept = []
+    for rule in re.findall(r'[^{}]+{[^{}]*}', css):
+        selectors = [selector.strip() for selector in rule.split('{', 1)[0].split(',')]
+        names = [re.match(r'\.(bi-[\w-]+)::?before$', selector) for selector in selectors]
+        if not all(names):
+            kept.append(rule.strip())
+            continue
+        wanted = [selector for selector, name in zip(selectors, names) if name.group(1) in icons]
+        if wanted:
+            kept.append(', '.join(wanted) + ' {' + rule.split('{', 1)[1])
+    return '\n'.join(kept) + '\n'
+
+
+# --- Minifying --------------------------------------------------------------------
+
+def minify_css(css):
+    """Strip comments and whitespace around braces, semicolons, commas and ``>``.
+
+    Spaces around ``:`` are kept (``a :hover`` is not ``a:hover``); Tailwind's
+    output is minified already, so this mostly shrinks the vendored CSS.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+# --- Vendoring (needs network) ----------------------------------------------------
+
+def fetch(url, user_agent=None):
+    request = urllib.request.Request(url, headers={'User-Agent': user_agent or 'kbtuneco-build-assets'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.read()
+
+
+def vendor_fonts(dest, url=GOOGLE_FONTS_URL, subsets=FONT_SUBSETS):
+    """Download the web fonts into ``dest`` and write ``dest/fonts.css``. Returns the files written."""
+    os.makedirs(dest, exist_ok=True)
+    css = fetch(url, WOFF2_USER_AGENT).decode()
+    blocks = re.findall(r'/\*\s*([\w-]+)\s*\*/\s*(@font-face\s*{[^}]*})', css)
+    kept, written = [], []
+    for subset, block in blocks:
+        if subset not in subsets:
+            continue
+        for font_url in re.findall(r'url\((https://[^)]+)\)', block):
+            name = os.path.basename(font_url)
+            path = os.path.join(dest, name)
+            if not os.path.exists(path):
+                with open(path, 'wb') as fh:
+                    fh.write(fetch(font_url))
+                written.append(path)
+            block = block.replace(font_url, name)
+        kept.append(f'/* {subset} */\n{block}')
+    with open(os.path.join(dest, 'fonts.css'), 'w', encoding='utf-8') as fh:
+        fh.write('\n'.join(kept) + '\n')
+    return written + [os.path.join(dest, 'fonts.css')]
+
+
+def vendor_bootstrap_icons(dest, version=BOOTSTRAP_ICONS_VERSION):
+    """Download the bootstrap-icons stylesheet and fonts into ``dest``."""
+    os.makedirs(os.path.join(dest, 'fonts'), exist_ok=True)
+    written = []
+    for name in ('bootstrap-icons.css', 'fonts/bootstrap-icons.woff2', 'fonts/bootstrap-icons.woff'):
+        path = os.path.join(dest, name)
+        with open(path, 'wb') as fh:
+            fh.write(fetch(BOOTSTRAP_ICONS_URL.format(version=version, name=name)))
+        written.append(path)
+    return written
+
+
+# --- Tailwind ---------------------------------------------------------------------
+
+def tailwind_cli():
+    """The standalone Tailwind CLI: ``TAILWIND_CLI`` or ``tailwindcss`` on PATH."""
+    configured = getattr(settings, 'TAILWIND_CLI', None) or os.environ.get('TAILWIND_CLI')
+    return configured or shutil.which('tailwindcss')
+
+
+def compile_tailwind(cli, config, source):
+    """Run the Tailwind CLI and return the purged, minified CSS."""
+    result = subprocess.run(
+        [cli, '--config', config, '--input', source, '--minify'],
+        check=True, capture_output=True, text=True, cwd=str(settings.BASE_DIR),
+    )
+    return result.stdout
+
+
+def rebase_urls(css, prefix):
+    """Point relative ``url(...)`` references at ``prefix`` (vendored CSS moves into the bundle)."""
+    def replace(match):
+        url = match.group(2)
+        if re.match(r'(?:[a-z]+:|/|#)', url):
+            return match.group(0)
+        # Cache-busting query strings are redundant once the manifest hashes the name
+        url = url.split('?', 1)[0].removeprefix('./')
+        return f'url({match.group(1)}{prefix}{url}{match.group(1)})'
+    return re.sub(r'url\((["\']?)([^)"\']+)\1\)', replace, css)
@@ -0,0 +1,153 @@
+"""Reference counts for stored files.
+
+With content-addressed storage (``core.storage``) several ``Document`` and
+``Profile.cv`` rows can point at the same file, so a file may only be removed
+once nothing points at it. ``Blob.ref_count`` is adjusted with ``F()``
+expressions whenever a row gains, changes or loses its file: by
+``ContentAddressedStorage.save()`` for an upload, and by ``core.signals``
+for names assigned directly. When a count reaches zero the file and its
+``Blob`` row are deleted after the transaction commits. ``prune()`` locks
+the blob and checks that no row points at the file before removing it, so
+a reference taken meanwhile, or one the counts missed, keeps the file.
+"""
+import threading
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from . import previews
+from .models import Blob, Document, Profile
+from .storage import cas_storage, is_hashed
+
+# (model, file field) pairs whose files are reference counted
+REFERENCES = [(Document, 'file'), (Profile, 'cv')]
+
+# References counted by ContentAddressedStorage.save() for rows this thread is saving
+_counted = threading.local()
+
+
+def acquire(name, size=None):
+    """Count one more reference to ``name``."""
+    if not name:
+        return
+    if Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1):
+        return
+    try:
+        with transaction.atomic():
+            Blob.objects.create(name=name, **_describe(name, ref_count=1, size=size))
+    except IntegrityError:
+        # Created by a concurrent upload of the same content
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+
+def _describe(name, size=None, **fields):
+    storage = cas_storage()
+    fields['sha256'] = name.rsplit('/', 1)[-1].split('.', 1)[0] if is_hashed(name) else ''
+    if size is None and storage.exists(name):
+        size = storage.size(name)
+    fields['size'] = size
+    return fields
+
+
+def mark_counted(name):
+    """Note that the reference of the row about to be saved with ``name`` is counted."""
+    pending = _counted.__dict__.setdefault('names', Counter())
+    pending[name] += 1
+
+
+def take_counted(name):
+    """True (once per ``mark_counted``) if the storage already counted this reference.
+
+    A mark left behind by a save that failed at most skews a count, which
+    ``prune()`` and ``recount()`` correct; it never loses a file.
+    """
+    pending = _counted.__dict__.get('names')
+    if not pending or not pending[name]:
+        return False
+    pending[name] -= 1
+    if not pending[name]:
+        del pending[name]
+    return True
+
+
+def release(name):
+    """Drop one reference to ``name``; the file goes with the last one."""
+    if not name:
+        return
+    Blob.objects.filter(name=name).update(ref_count=Greatest(F('ref_count') - 1, 0))
+    transaction.on_commit(lambda: prune([name]))
+
+
+def prune(names=None):
+    """Delete unreferenced blobs (all of them, or those in ``names``) and their files.
+
+    Returns the number of files removed.
+    """
+    unused = Blob.objects.filter(ref_count=0)
+    if names is not None:
+        unused = unused.filter(name__in=names)
+    removed = 0
+    for name in unused.values_list('name', flat=True):
+        with transaction.atomic():
+            # Until this commits, acquire() of the same name waits, then finds no
+            # Blob and no file and stores the upload again
+            if not _lock_unused(name):
+                continue
+            referenced = count_references(name)
+            if referenced:
+                # A reference the counts missed: repair instead of deleting a file in use
+                Blob.objects.filter(name=name).update(ref_count=referenced)
+                continue
+            Blob.objects.filter(name=name).delete()
+            cas_storage().delete(name)
+        previews.discard(name)
+        removed += 1
+    return removed
+
+
+def _lock_unused(name):
+    """Lock the blob ``name`` if it is still unreferenced; False when it is not."""
+    unused = Blob.objects.filter(name=name, ref_count=0)
+    if connection.features.has_select_for_update:
+        return unused.select_for_update().exists()
+    # SQLite: a write takes the database lock
+    return bool(unused.update(ref_count=0))
+
+
+def count_references(name):
+    """How many rows point at ``name``."""
+    return sum(model.objects.filter(**{field: name}).count() for model, field in REFERENCES)
+
+
+def references():
+    """``{name: number of rows pointing at it}`` over every counted file field."""
+    counts = {}
+    for model, field in REFERENCES:
+        rows = (
+            model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            .order_by().values_list(field).annotate(n=Count('pk'))
+        )
+        for name, n in rows:
+            counts[name] = counts.get(name, 0) + n
+    return counts
+
+
+def recount():
+    """Recompute every ``ref_count`` from the rows (repair / backfill).
+
+    Returns the number of blobs whose count changed.
+    """
+    counts = references()
+    changed = 0
+    for name, stored in Blob.objects.values_list('name', 'ref_count'):
+        actual = counts.pop(name, 0)
+        if actual != stored:
+            Blob.objects.filter(name=name).update(ref_count=actual)
+            changed += 1
+    # Names left over have no Blob row yet
+    for name, n in counts.items():
+        Blob.objects.create(name=name, **_describe(name, ref_count=n))
+        changed += 1
+    return changed
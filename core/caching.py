@@ -0,0 +1,130 @@
+"""Cache backends that keep hit/miss statistics.
+
+Each class wraps one of Django's backends and counts hits and misses per key
+family (the part of the key before the first ``:``, e.g. ``project-card``).
+Counts are kept in process and added to counters stored in the cache itself
+every ``STATS_FLUSH_EVERY`` lookups, so ``stats()`` reports totals across all
+gunicorn workers sharing the cache. Counter updates use the backend's
+``incr``, which is not atomic on the file and database backends; the numbers
+are meant for tuning, not accounting.
+"""
+import threading
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.cache.backends import db, filebased, locmem, redis
+from django.core.cache.backends.base import BaseCache
+
+STATS_PREFIX = 'cache-stats'
+STATS_TIMEOUT = None
+STATS_FLUSH_EVERY = 100
+
+_MISSING = object()
+
+
+def _family(key):
+    return str(key).split(':', 1)[0]
+
+
+class StatsMixin:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # BaseCache.get_many() loops over get(), which already counts each key
+        backend = cls.__mro__[cls.__mro__.index(StatsMixin) + 1]
+        cls._count_get_many = backend.get_many is not BaseCache.get_many
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self._pending = Counter()
+        self._pending_total = 0
+        self._stats_lock = threading.Lock()
+
+    def _count(self, keys, hits):
+        # BaseCache.incr() reads through get(); don't count the counters themselves
+        keys = [key for key in keys if not str(key).startswith(STATS_PREFIX)]
+        if not keys:
+            return
+        with self._stats_lock:
+            for key in keys:
+                self._pending[(_family(key), 'hits' if key in hits else 'misses')] += 1
+            self._pending_total += len(keys)
+            if self._pending_total < STATS_FLUSH_EVERY:
+                return
+            pending, self._pending, self._pending_total = self._pending, Counter(), 0
+        self._flush(pending)
+
+    def _flush(self, pending):
+        if not pending:
+            return
+        families_key = f'{STATS_PREFIX}:families'
+        families = set(super().get(families_key) or ())
+        new = {family for family, _ in pending} - families
+        if new:
+            super().set(families_key, sorted(families | new), STATS_TIMEOUT)
+        for (family, kind), n in pending.items():
+            key = f'{STATS_PREFIX}:{family}:{kind}'
+            super().add(key, 0, STATS_TIMEOUT)
+            try:
+                super().incr(key, n)
+            except ValueError:
+                # Evicted between add() and incr()
+                super().set(key, n, STATS_TIMEOUT)
+
+    def flush_stats(self):
+        with self._stats_lock:
+            pending, self._pending, self._pending_total = self._pending, Counter(), 0
+        self._flush(pending)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        self._count([key], () if value is _MISSING else (key,))
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        if self._count_get_many:
+            self._count(keys, found)
+        return found
+
+    def stats(self):
+        """Return ``{family: {'hits': n, 'misses': n}}`` across all processes."""
+        self.flush_stats()
+        families = super().get(f'{STATS_PREFIX}:families') or []
+        keys = [f'{STATS_PREFIX}:{family}:{kind}' for family in families for kind in ('hits', 'misses')]
+        values = super().get_many(keys)
+        return {
+            family: {kind: values.get(f'{STATS_PREFIX}:{family}:{kind}', 0) for kind in ('hits', 'misses')}
+            for family in families
+        }
+
+    def reset_stats(self):
+        self.flush_stats()
+        families = super().get(f'{STATS_PREFIX}:families') or []
+        super().delete_many([f'{STATS_PREFIX}:{family}:{kind}' for family in families for kind in ('hits', 'misses')])
+        super().delete(f'{STATS_PREFIX}:families')
+
+
+class FileBasedCache(StatsMixin, filebased.FileBasedCache):
+    pass
+
+
+class DatabaseCache(StatsMixin, db.DatabaseCache):
+    pass
+
+
+class LocMemCache(StatsMixin, locmem.LocMemCache):
+    pass
+
+
+class RedisCache(StatsMixin, redis.RedisCache):
+    pass
+
+
+def stats():
+    """Hit/miss statistics for every configured cache that keeps them."""
+    return {
+        alias: caches[alias].stats()
+        for alias in caches.settings
+        if isinstance(caches[alias], StatsMixin)
+    }
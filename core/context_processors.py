@@ -1,11 +1,7 @@
-from .models import Message
+from . import unread
 
 def unread_messages(request):
     """Add unread message count to template context."""
     if request.user.is_authenticated:
-        try:
-            unread_count = request.user.profile.received_messages.filter(read=False).count()
-            return {'unread_message_count': unread_count}
-        except:
-            return {'unread_message_count': 0}
+        return {'unread_message_count': unread.count_for_user(request.user)}
     return {'unread_message_count': 0}
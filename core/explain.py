@@ -0,0 +1,218 @@
+"""Query plan inspection for ``manage.py index_advisor``.
+
+``capture()`` records the SELECT statements a block of code runs, so the
+advisor can replay the exact SQL the views issue. ``inspect()`` runs each one
+through the database's EXPLAIN and reduces the plan to findings:
+
+* SQLite: ``EXPLAIN QUERY PLAN``; a ``SCAN`` without an index is a full table
+  scan and ``USE TEMP B-TREE FOR ORDER BY`` is a sort.
+* PostgreSQL: ``EXPLAIN (FORMAT JSON)`` with sequential scans and sorts
+  disabled for the transaction, so any ``Seq Scan`` or ``Sort`` left in the
+  plan means no index can serve it, however small the tables are today.
+
+``propose()`` turns a finding into a composite index for the table: the
+columns the statement compares for equality, followed by its ORDER BY
+columns (or its first range-filtered column).
+"""
+import json
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db import connection as default_connection, models, transaction
+
+Finding = namedtuple('Finding', 'kind table detail')
+
+_TABLE_RE = re.compile(r'\b(?:FROM|JOIN)\s+"(\w+)"(?:\s+(?:AS\s+)?"?([A-Z]\d+)"?)?')
+_REF = r'(?:"(\w+)"|([A-Z]\d+))\."(\w+)"'
+_EQUALITY_RE = re.compile(_REF + r'\s*(?:=|IN\s*\(|IS\s+NULL)')
+_RANGE_RE = re.compile(_REF + r'\s*(?:<=|>=|<|>)')
+_ORDER_TERM_RE = re.compile(_REF + r'(?:\s+(ASC|DESC))?')
+_ON_CLAUSE_RE = re.compile(r'\bON\s*\([^()]*\)')
+_CASE_RE = re.compile(r'\bCASE WHEN\b.*?\bEND\b', re.S)
+_ORDER_BY_RE = re.compile(r'\bORDER BY\s+(.*?)(?:\s+LIMIT\b|\s+OFFSET\b|\)|$)', re.S)
+
+
+class Capture:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.statements.append((sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def capture(connection=None):
+    """Collect ``(sql, params)`` for every SELECT run in the block."""
+    recorder = Capture()
+    with (connection or default_connection).execute_wrapper(recorder):
+        yield recorder.statements
+
+
+class SQLitePlanner:
+    vendor = 'sqlite'
+
+    def findings(self, connection, sql, params):
+        aliases = table_aliases(sql)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            rows = cursor.fetchall()
+        found = []
+        for *_, detail in rows:
+            words = detail.split()
+            # Derived tables (COUNT(*) FROM (...) subquery) have no alias entry and no index to add
+            if words[0] == 'SCAN' and ' USING ' not in detail and words[1] in aliases:
+                found.append(Finding('scan', aliases[words[1]], detail))
+            elif detail.startswith('USE TEMP B-TREE FOR ORDER BY') and order_table(sql):
+                found.append(Finding('sort', order_table(sql), detail))
+        return found
+
+
+class PostgresPlanner:
+    vendor = 'postgresql'
+
+    def findings(self, connection, sql, params):
+        aliases = {alias.lower(): table for alias, table in table_aliases(sql).items()}
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        found = []
+        for node in _walk(plan[0]['Plan']):
+            if node['Node Type'] == 'Seq Scan':
+                found.append(Finding('scan', node['Relation Name'], f"Seq Scan on {node['Relation Name']}"))
+            elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+                keys = node.get('Sort Key', [])
+                prefix = keys[0].split('.', 1)[0].strip('"') if keys and '.' in keys[0] else ''
+                found.append(Finding('sort', aliases.get(prefix, prefix) or order_table(sql),
+                                     'Sort on ' + ', '.join(keys)))
+        return found
+
+
+def _walk(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _walk(child)
+
+
+_PLANNERS = {planner.vendor: planner for planner in (SQLitePlanner(), PostgresPlanner())}
+
+
+def get_planner(connection=None):
+    """Return the plan reader for ``connection``, or None if its vendor is unsupported."""
+    return _PLANNERS.get((connection or default_connection).vendor)
+
+
+def inspect(sql, params, connection=None):
+    connection = connection or default_connection
+    return get_planner(connection).findings(connection, sql, params)
+
+
+# --- Index proposals ------------------------------------------------------------
+
+def table_aliases(sql):
+    """Map each alias (and each table name) used in ``sql`` to its table."""
+    aliases = {}
+    for table, alias in _TABLE_RE.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def _refs(pattern, sql, aliases):
+    for match in pattern.finditer(sql):
+        quoted, alias, column = match.group(1), match.group(2), match.group(3)
+        yield aliases.get(quoted or alias, quoted or alias), column, match
+
+
+def order_table(sql):
+    """The table of the first column in the statement's outermost ORDER BY."""
+    terms = order_by(sql)
+    return terms[0][0] if terms else None
+
+
+def order_by(sql):
+    """``[(table, column, descending)]`` for the last ORDER BY clause in ``sql``."""
+    clauses = _ORDER_BY_RE.findall(sql)
+    if not clauses:
+        return []
+    aliases = table_aliases(sql)
+    return [
+        (table, column, match.group(4) == 'DESC')
+        for table, column, match in _refs(_ORDER_TERM_RE, clauses[-1], aliases)
+    ]
+
+
+def _strip_conditional_aggregates(sql):
+    """Drop ``FILTER (WHERE ...)`` and ``CASE ... END``: they select within rows already read."""
+    sql = _CASE_RE.sub('', sql)
+    while (start := sql.find('FILTER (')) != -1:
+        depth, end = 0, start + len('FILTER ')
+        for end in range(end, len(sql)):
+            depth += {'(': 1, ')': -1}.get(sql[end], 0)
+            if not depth:
+                break
+        sql = sql[:start] + sql[end + 1:]
+    return sql
+
+
+def propose(sql, table):
+    """Return the column list ``[(column, descending)]`` of an index for ``table``, or []."""
+    aliases = table_aliases(sql)
+    where = _ON_CLAUSE_RE.sub('', _strip_conditional_aggregates(sql))
+    columns = []
+    for ref_table, column, _ in _refs(_EQUALITY_RE, where, aliases):
+        if ref_table == table and (column, False) not in columns:
+            columns.append((column, False))
+    ordering = order_by(sql)
+    if ordering and all(ref_table == table for ref_table, _, _ in ordering):
+        equal = {column for column, _ in columns}
+        columns += [(column, desc) for _, column, desc in ordering if column not in equal]
+    else:
+        ranged = [column for ref_table, column, _ in _refs(_RANGE_RE, where, aliases) if ref_table == table]
+        if ranged and (ranged[0], False) not in columns:
+            columns.append((ranged[0], False))
+    return columns
+
+
+def model_for_table(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def existing_indexes(model):
+    """Column lists of the indexes ``model`` already has (explicit, unique and FK)."""
+    opts = model._meta
+    column = {field.name: field.column for field in opts.concrete_fields}
+    indexes = [[opts.pk.column]]
+    for index in opts.indexes:
+        indexes.append([column[name.lstrip('-')] for name in index.fields])
+    for fields in opts.unique_together:
+        indexes.append([column[name] for name in fields])
+    for field in opts.concrete_fields:
+        if field.db_index or field.unique:
+            indexes.append([field.column])
+    return indexes
+
+
+def covered(columns, indexes):
+    wanted = [column for column, _ in columns]
+    return any(index[:len(wanted)] == wanted for index in indexes)
+
+
+def as_index(model, columns):
+    """Build a named ``models.Index`` for ``columns`` on ``model``."""
+    by_column = {field.column: field.name for field in model._meta.concrete_fields}
+    fields = [('-' if desc else '') + by_column.get(column, column) for column, desc in columns]
+    index = models.Index(fields=fields)
+    index.set_name_with_model(model)
+    return index
@@ -0,0 +1,154 @@
+"""Streaming CSV and JSON Lines exports.
+
+An export is a list of columns over one ``values_list()`` queryset: every
+related field is a join in that single SELECT, so nothing is fetched per row,
+and rows are read with ``iterator(chunk_size=EXPORT_CHUNK_SIZE)`` (a
+server-side cursor on PostgreSQL) and written out one line at a time. Memory
+stays flat whatever the row count, and the client starts receiving data as
+soon as the first chunk is read. Under ASGI the response gets an async
+iterator (``astream()``), which keeps that true there as well.
+"""
+import csv
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import stats
+from .models import EventParticipant, Project, ProjectParticipant
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+Export = namedtuple('Export', 'name columns queryset')
+
+# Spreadsheet apps evaluate cells starting with these as formulas
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def projects(queryset=None):
+    queryset = (Project.objects.all() if queryset is None else queryset).annotate(
+        application_count=stats.count_of(ProjectParticipant, 'project'),
+    )
+    return Export('projects', [
+        ('id', 'pk'),
+        ('title', 'title'),
+        ('type', 'project_type'),
+        ('status', 'status'),
+        ('specialization', 'specialization_needed'),
+        ('posted_by', 'posted_by__user__username'),
+        ('organization', 'posted_by__organization__name'),
+        ('duration', 'duration'),
+        ('budget', 'budget'),
+        ('applications', 'application_count'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ], queryset.order_by('-created_at', '-id'))
+
+
+def applications(project):
+    return Export(f'project-{project.pk}-applications', [
+        ('id', 'pk'),
+        ('username', 'profile__user__username'),
+        ('first_name', 'profile__user__first_name'),
+        ('last_name', 'profile__user__last_name'),
+        ('user_type', 'profile__user_type'),
+        ('specialization', 'profile__specialization'),
+        ('organization', 'profile__organization__name'),
+        ('contact_email', 'profile__contact_email'),
+        ('role', 'role'),
+        ('accepted', 'accepted'),
+        ('applied_at', 'applied_at'),
+        ('joined_at', 'joined_at'),
+    ], ProjectParticipant.objects.filter(project=project).order_by('-applied_at', '-id'))
+
+
+def event_participants(event):
+    return Export(f'event-{event.pk}-participants', [
+        ('id', 'pk'),
+        ('username', 'profile__user__username'),
+        ('first_name', 'profile__user__first_name'),
+        ('last_name', 'profile__user__last_name'),
+        ('user_type', 'profile__user_type'),
+        ('organization', 'profile__organization__name'),
+        ('contact_email', 'profile__contact_email'),
+        ('registered_at', 'registered_at'),
+        ('attended', 'attended'),
+    ], EventParticipant.objects.filter(event=event).order_by('registered_at', 'id'))
+
+
+def rows(export, chunk_size=None):
+    """Yield one tuple per row, reading ``chunk_size`` rows from the database at a time."""
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    lookups = [lookup for _, lookup in export.columns]
+    return export.queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(export, chunk_size=None):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for header, _ in export.columns])
+    for row in rows(export, chunk_size):
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def jsonl_lines(export, chunk_size=None):
+    headers = [header for header, _ in export.columns]
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows(export, chunk_size):
+        yield encoder.encode(dict(zip(headers, row))) + '\n'
+
+
+def lines(export, fmt, chunk_size=None):
+    """The export as an iterator of text lines in ``fmt`` (a key of ``FORMATS``)."""
+    return csv_lines(export, chunk_size) if fmt == 'csv' else jsonl_lines(export, chunk_size)
+
+
+def stream(export, fmt, chunk_size=None, block_size=64 * 1024):
+    """Like ``lines()`` but joined into blocks of about ``block_size`` characters,
+    so a response is written in a few large writes instead of one per row."""
+    return blocks(lines(export, fmt, chunk_size), block_size)
+
+
+def blocks(lines, block_size=64 * 1024):
+    block, size = [], 0
+    for line in lines:
+        block.append(line)
+        size += len(line)
+        if size >= block_size:
+            yield ''.join(block)
+            block, size = [], 0
+    if block:
+        yield ''.join(block)
+
+
+async def astream(export, fmt, chunk_size=None, block_size=64 * 1024):
+    """``stream()`` as an async iterator, for responses served over ASGI.
+
+    Django would otherwise read a synchronous iterator to the end (into a
+    list) before sending anything. Each block is produced in the request's
+    sync thread, where the database connection lives, as the client takes it.
+    """
+    sync_blocks = stream(export, fmt, chunk_size, block_size)
+    next_block = sync_to_async(next)
+    while (block := await next_block(sync_blocks, None)) is not None:
+        yield block
+
+
+def filename(export, fmt):
+    return f'{export.name}.{fmt}'
@@ -1,7 +1,9 @@
 from django import forms
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.template import loader
+from . import jobs
 from .models import Project, Document, Message, Profile, Keyword
 
 class RegisterForm(UserCreationForm):
@@ -56,10 +58,20 @@ class DocumentForm(forms.ModelForm):
         return f
 
 class MessageForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Each option's label is Profile.__str__, which reads the user
+        self.fields['recipient'].queryset = Profile.objects.select_related('user')
+
     class Meta:
         model = Message
         fields = ['recipient', 'subject', 'body']
 
+class ReplyForm(forms.ModelForm):
+    class Meta:
+        model = Message
+        fields = ['body']
+
 class ProfileForm(forms.ModelForm):
     class Meta:
         model = Profile
@@ -67,3 +79,17 @@ class ProfileForm(forms.ModelForm):
         widgets = {
             'keywords': forms.CheckboxSelectMultiple(),
         }
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Renders the reset mail in the request but sends it from a background job."""
+    def send_mail(self, subject_template_name, email_template_name, context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = ''.join(loader.render_to_string(subject_template_name, context).splitlines())
+        html = loader.render_to_string(html_email_template_name, context) if html_email_template_name else None
+        jobs.enqueue('send_mail', {
+            'subject': subject,
+            'body': loader.render_to_string(email_template_name, context),
+            'from_email': from_email,
+            'to': [to_email],
+            'html': html,
+        })
@@ -0,0 +1,83 @@
+"""Rendered project cards, cached per project.
+
+A card's cache key is versioned on ``Project.updated_at``. Saving a project
+bumps it through ``auto_now``; ``core.signals`` bumps it when the project's
+keyword set changes, one of its keywords is edited or deleted, or its accepted
+members change (applications alone do not touch it), so stale
+cards are never looked up again and simply expire. The key also varies on
+the active language and on the only viewer-specific bits a card shows:
+whether the viewer may apply and whether they already have.
+
+Cards are rendered with a placeholder in place of the CSRF token, which is
+substituted per request when the page is assembled.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+from django.utils.safestring import mark_safe
+
+from .models import Project
+
+CARD_TEMPLATE = 'includes/project_card.html'
+
+CSRF_PLACEHOLDER = '__card_csrf_token__'
+
+APPLICANT_TYPES = ('student', 'researcher')
+
+
+def can_apply(user):
+    profile = getattr(user, 'profile', None) if user.is_authenticated else None
+    return profile is not None and profile.user_type in APPLICANT_TYPES
+
+
+def card_key(project, language, viewer):
+    return 'project-card:%d:%d:%s:%s' % (project.pk, project.updated_at.timestamp() * 1e6, language, viewer)
+
+
+def _viewer(applicant, project):
+    if not applicant:
+        return '-'
+    return 'a' if getattr(project, 'user_has_applied', False) else 'n'
+
+
+def cached_cards(projects, applicant):
+    """Return card HTML for ``projects`` with the CSRF placeholder left in, filling the cache."""
+    projects = list(projects)
+    if not projects:
+        return []
+    language = translation.get_language()
+    keys = [card_key(project, language, _viewer(applicant, project)) for project in projects]
+    cached = cache.get_many(keys)
+
+    missing = [(key, project) for key, project in zip(keys, projects) if key not in cached]
+    if missing:
+        prefetch_related_objects([project for _, project in missing], 'keywords')
+        rendered = {
+            key: render_to_string(CARD_TEMPLATE, {
+                'project': project,
+                'can_apply': applicant,
+                'csrf_token': CSRF_PLACEHOLDER,
+            })
+            for key, project in missing
+        }
+        cache.set_many(rendered, getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600))
+        cached.update(rendered)
+    return [cached[key] for key in keys]
+
+
+def render_cards(request, projects):
+    """Return the rendered card HTML for ``projects``, in order."""
+    applicant = can_apply(request.user)
+    cards = cached_cards(projects, applicant)
+    token = get_token(request) if applicant and cards else None
+    return [mark_safe(html.replace(CSRF_PLACEHOLDER, token) if token else html) for html in cards]
+
+
+def touch_projects(project_ids):
+    """Bump ``updated_at``, retiring cached cards and the detail page's validators."""
+    project_ids = list(project_ids)
+    if project_ids:
+        Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
@@ -0,0 +1,167 @@
+"""Per-request query budgets.
+
+Views declare the most SQL queries a request may run with ``@query_budget(n)``.
+``QueryBudgetMiddleware`` counts the queries, the time spent in the database
+and the time spent rendering templates for every request, reports them in a
+``Server-Timing`` header and logs a warning when a view goes over its budget.
+With ``QUERY_BUDGET_STRICT`` enabled (the test suite does this) going over
+budget raises ``QueryBudgetExceeded`` instead, so an N+1 introduced in a view
+or template fails the build.
+
+The budget covers the whole request, including the session and user lookups
+done by the middleware stack, so it is the number a reader sees in the
+debug toolbar or the database log.
+"""
+import contextvars
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('query_budget_metrics', default=None)
+
+# Sent after every measured request with ``view_name``, ``budget`` and ``metrics``
+request_measured = Signal()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare the maximum number of SQL queries a request to this view may run."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def budget_for(view):
+    return getattr(view, 'query_budget', None)
+
+
+class Metrics:
+    __slots__ = ('queries', 'db_time', 'template_time', 'total_time', 'sql', '_template_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+        self.sql = []
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+            self.sql.append(sql)
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+
+@contextmanager
+def collect():
+    """Record queries, DB time and template time for the enclosed block."""
+    metrics = Metrics()
+    token = _current.set(metrics)
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield metrics
+    finally:
+        metrics.total_time = time.perf_counter() - start
+        _current.reset(token)
+
+
+_original_render = django_backend.Template.render
+
+
+def _timed_render(self, context=None, request=None):
+    metrics = _current.get()
+    if metrics is None:
+        return _original_render(self, context, request)
+    # Templates rendered from inside another template are already being timed
+    metrics._template_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        metrics._template_depth -= 1
+        if not metrics._template_depth:
+            metrics.template_time += time.perf_counter() - start
+
+
+def install_template_timer():
+    django_backend.Template.render = _timed_render
+
+
+def check_budget(view_name, budget, metrics):
+    """Warn, or raise in strict mode, when ``metrics`` exceed ``budget``."""
+    if budget is None or metrics.queries <= budget:
+        return
+    message = '%s ran %d queries, budget is %d:\n  %s' % (
+        view_name, metrics.queries, budget, '\n  '.join(metrics.sql),
+    )
+    if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG)
+        if self.enabled:
+            install_template_timer()
+        # Under ASGI, async views (the live inbox stream) run without a thread hop
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        with collect() as metrics:
+            response = self.get_response(request)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        with collect() as metrics:
+            response = await self.get_response(request)
+        return self.report(request, response, metrics)
+
+    def report(self, request, response, metrics):
+        request.query_metrics = metrics
+        response.headers['Server-Timing'] = metrics.server_timing()
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            budget = budget_for(match.func)
+            request_measured.send(sender=self.__class__, view_name=match.view_name, budget=budget, metrics=metrics)
+            check_budget(match.view_name, budget, metrics)
+        return response
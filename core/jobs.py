@@ -0,0 +1,243 @@
+"""Background jobs.
+
+Work that does not have to finish before a response is sent (mail, media
+processing) is queued as a ``Job`` row with ``enqueue()`` and run by
+``manage.py run_worker``. The row is inserted in the caller's transaction,
+so a job whose request rolls back never runs, and a job is never lost when
+a worker restarts.
+
+Workers claim ready jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` where the
+database supports it (PostgreSQL), so any number of workers poll the table
+without waiting on each other. SQLite has no row locks; there a worker picks
+candidates and claims each one with a conditional ``UPDATE ... WHERE
+status = 'queued'``, which SQLite's single writer makes atomic, so a job is
+still run by exactly one worker.
+
+A failing job is retried with exponential backoff until ``max_attempts``.
+While a handler runs, a heartbeat thread renews the job's lease (its
+``started_at``) every third of ``JOB_LEASE_SECONDS``, so long jobs are not
+mistaken for lost ones. A job whose worker died stops being renewed and is
+handed out again once its lease has expired, so handlers should be
+idempotent; one that has used up its attempts (say it keeps killing its
+worker) is marked failed instead. Each attempt records how long the job
+waited and how long it ran.
+"""
+import logging
+import random
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def register(name):
+    """Make the decorated function runnable as job ``name``; it gets the payload as kwargs."""
+    def decorator(func):
+        HANDLERS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, *, delay=None, priority=0, max_attempts=None):
+    """Queue job ``name``; ``payload`` must be JSON serialisable."""
+    if name not in HANDLERS:
+        raise KeyError(f"Unknown job {name!r}")
+    job = Job(name=name, payload=payload or {}, priority=priority)
+    if delay:
+        job.run_at = timezone.now() + delay
+    job.max_attempts = max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 5)
+    job.save()
+    return job
+
+
+def backoff(attempts):
+    """Seconds before retry number ``attempts``: exponential, capped, with jitter."""
+    base = getattr(settings, 'JOB_RETRY_DELAY', 10)
+    delay = min(base * 2 ** (attempts - 1), getattr(settings, 'JOB_RETRY_MAX_DELAY', 3600))
+    return delay * random.uniform(0.8, 1.2)
+
+
+# --- Claiming ---------------------------------------------------------------------
+
+def _ready():
+    return Job.objects.filter(status=Job.QUEUED, run_at__lte=timezone.now()).order_by('-priority', 'run_at', 'id')
+
+
+def claim(worker, limit=1):
+    """Mark up to ``limit`` ready jobs as running for ``worker`` and return them."""
+    now = timezone.now()
+    started = {'status': Job.RUNNING, 'locked_by': worker, 'started_at': now, 'attempts': F('attempts') + 1}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(_ready().select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**started)
+    else:
+        ids = []
+        while not ids:
+            # Over-fetch: other workers may take some of the candidates first
+            candidates = list(_ready().values_list('id', flat=True)[:limit * 4])
+            if not candidates:
+                break
+            for job_id in candidates:
+                if Job.objects.filter(id=job_id, status=Job.QUEUED).update(**started):
+                    ids.append(job_id)
+                    if len(ids) == limit:
+                        break
+    return list(Job.objects.filter(id__in=ids).order_by('-priority', 'run_at', 'id'))
+
+
+def lease_seconds():
+    return getattr(settings, 'JOB_LEASE_SECONDS', 600)
+
+
+def requeue_stale():
+    """Hand out again the running jobs whose worker stopped renewing them. Returns the count.
+
+    Jobs that have no attempts left are marked failed instead, so a job that
+    kills its worker is not run forever.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, started_at__lt=now - timedelta(seconds=lease_seconds()))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_by='', finished_at=now,
+        last_error='Lease expired on the last attempt; the worker stopped (crashed or killed).',
+    )
+    if failed:
+        logger.error('%s lost job(s) had no attempts left and were marked failed', failed)
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, locked_by='', last_error='Lease expired; the worker stopped.'
+    )
+
+
+def prune_finished():
+    """Delete completed jobs older than ``JOB_KEEP_DONE_DAYS``; failed ones are kept."""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'JOB_KEEP_DONE_DAYS', 7))
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+# --- Running ----------------------------------------------------------------------
+
+class _Heartbeat(threading.Thread):
+    """Renews a running job's lease until stopped."""
+
+    def __init__(self, job):
+        super().__init__(name=f'job-heartbeat-{job.pk}', daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        interval = lease_seconds() / 3
+        try:
+            while not self.stopped.wait(interval):
+                try:
+                    Job.objects.filter(pk=self.job.pk, status=Job.RUNNING, locked_by=self.job.locked_by).update(
+                        started_at=timezone.now()
+                    )
+                except OperationalError:
+                    # Busy database; the next beat is still well within the lease
+                    logger.warning('Could not renew the lease of job %s #%s', self.job.name, self.job.pk)
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def execute(job):
+    """Run a claimed job and record its outcome. Returns True when it succeeded."""
+    heartbeat = _Heartbeat(job)
+    heartbeat.start()
+    try:
+        return _execute(job)
+    finally:
+        heartbeat.stop()
+
+
+def _execute(job):
+    started = time.perf_counter()
+    wait_ms = max((job.started_at - job.run_at).total_seconds() * 1000, 0.0)
+    try:
+        handler = HANDLERS[job.name]
+        handler(**job.payload)
+    except Exception:
+        duration_ms = (time.perf_counter() - started) * 1000
+        error = traceback.format_exc()
+        fields = {'finished_at': timezone.now(), 'wait_ms': wait_ms, 'duration_ms': duration_ms, 'last_error': error}
+        if job.attempts < job.max_attempts:
+            delay = backoff(job.attempts)
+            fields.update(status=Job.QUEUED, locked_by='', run_at=timezone.now() + timedelta(seconds=delay))
+            logger.warning('Job %s #%s failed (attempt %s/%s), retrying in %.0fs',
+                           job.name, job.pk, job.attempts, job.max_attempts, delay, exc_info=True)
+        else:
+            fields['status'] = Job.FAILED
+            logger.error('Job %s #%s failed after %s attempts', job.name, job.pk, job.attempts, exc_info=True)
+        _record(job, **fields)
+        return False
+    duration_ms = (time.perf_counter() - started) * 1000
+    _record(job, status=Job.DONE, finished_at=timezone.now(), wait_ms=wait_ms, duration_ms=duration_ms, last_error='')
+    logger.info('Job %s #%s done in %.1f ms (waited %.1f ms)', job.name, job.pk, duration_ms, wait_ms)
+    return True
+
+
+def _record(job, retries=5, **fields):
+    # The work is done; losing the outcome to a busy database (SQLite's single
+    # writer) would leave the job running until its lease expires and run it again
+    for attempt in range(retries):
+        try:
+            Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(**fields)
+            return
+        except OperationalError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+
+
+def run_pending(worker='inline', limit=None):
+    """Run ready jobs in this thread until none are left (or ``limit`` ran). Returns the count."""
+    count = 0
+    while limit is None or count < limit:
+        jobs = claim(worker)
+        if not jobs:
+            break
+        execute(jobs[0])
+        count += 1
+    return count
+
+
+def stats():
+    """Per job name: how many are in each state, and timings of the finished ones."""
+    return list(
+        Job.objects.order_by('name').values('name').annotate(
+            queued=Count('id', filter=Q(status=Job.QUEUED)),
+            running=Count('id', filter=Q(status=Job.RUNNING)),
+            done=Count('id', filter=Q(status=Job.DONE)),
+            failed=Count('id', filter=Q(status=Job.FAILED)),
+            avg_wait_ms=Avg('wait_ms', filter=Q(status=Job.DONE)),
+            avg_ms=Avg('duration_ms', filter=Q(status=Job.DONE)),
+            max_ms=Max('duration_ms', filter=Q(status=Job.DONE)),
+        )
+    )
+
+
+# --- Handlers ---------------------------------------------------------------------
+
+@register('send_mail')
+def send_mail(subject, body, to, from_email=None, html=None):
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html:
+        message.attach_alternative(html, 'text/html')
+    message.send()
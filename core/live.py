@@ -0,0 +1,187 @@
+"""Live inbox updates over Server-Sent Events.
+
+``inbox_stream`` (``core.views``) keeps one idle connection per open inbox
+under ASGI. New rows are never pushed through the broker itself: ``notify``
+only wakes the recipient's streams, which then read new messages and the
+unread counter with one cheap query each, from the last event id they sent.
+That makes reconnects (``Last-Event-ID``) and missed wake-ups harmless.
+
+The broker is in-process. With several workers a message saved in one
+worker cannot wake a stream held by another, so every stream also polls
+every ``LIVE_POLL_INTERVAL`` seconds; set it to 0 when a single worker
+serves all streams. Database work runs in the shared thread pool and the
+connection is closed right after, so an idle stream holds neither a
+thread nor a database connection.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Message, Profile
+
+POLL_LIMIT = 50
+
+
+class Subscription:
+    def __init__(self, loop):
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def notify(self):
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # Event loop already closed (worker shutting down)
+            pass
+
+    async def wait(self, timeout):
+        """Wait for a notification; returns False on timeout."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+
+class Broker:
+    """In-process fan-out of wake-ups to the streams subscribed under a key."""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def subscribe(self, key):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[key].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions[key].discard(subscription)
+                if not self._subscriptions[key]:
+                    del self._subscriptions[key]
+
+    def publish(self, key):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(key, ()))
+        for subscription in subscriptions:
+            subscription.notify()
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscriptions.values())
+
+
+broker = Broker()
+
+
+def notify(user_id):
+    """Wake the user's open streams once the current transaction commits."""
+    transaction.on_commit(lambda: broker.publish(user_id))
+
+
+def latest_message_id(profile_id):
+    return Message.objects.filter(recipient_id=profile_id).order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def poll(profile_id, after_id):
+    """Return ``(new messages, unread count)`` for a stream."""
+    rows = list(
+        Message.objects
+        .filter(recipient_id=profile_id, pk__gt=after_id)
+        .order_by('pk')
+        .values('pk', 'conversation_id', 'subject', 'body', 'sent_at',
+                'sender__user__username', 'sender__user_id')[:POLL_LIMIT]
+    )
+    unread = Profile.objects.filter(pk=profile_id).values_list('unread_count', flat=True).first() or 0
+    messages = [
+        {
+            'id': row['pk'],
+            'conversation_id': row['conversation_id'],
+            'subject': row['subject'],
+            'body': row['body'][:200],
+            'sent_at': row['sent_at'].isoformat(),
+            'sender': row['sender__user__username'],
+            'sender_user_id': row['sender__user_id'],
+        }
+        for row in rows
+    ]
+    return messages, unread
+
+
+def release_connection():
+    """Close the calling thread's connection; run it through ``sync_to_async``."""
+    connection.close()
+
+
+def poll_and_release(profile_id, after_id):
+    """``poll()`` for a held stream: close the pool thread's connection afterwards."""
+    try:
+        return poll(profile_id, after_id)
+    finally:
+        release_connection()
+
+
+def format_event(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append('data: ' + json.dumps(data))
+    return '\n'.join(lines) + '\n\n'
+
+
+def poll_interval():
+    return getattr(settings, 'LIVE_POLL_INTERVAL', 30)
+
+
+def heartbeat_interval():
+    return getattr(settings, 'LIVE_HEARTBEAT_INTERVAL', 15)
+
+
+def events_since(after_id, messages, unread, last_unread=None):
+    """SSE chunks for a poll result; returns ``(chunks, last id, unread)``."""
+    chunks = []
+    for message in messages:
+        chunks.append(format_event('message', message, event_id=message['id']))
+        after_id = message['id']
+    if unread != last_unread:
+        chunks.append(format_event('unread', {'count': unread}))
+    return chunks, after_id, unread
+
+
+async def stream(user_id, profile_id, after_id, poll_func):
+    """Yield SSE chunks for one connection until ``LIVE_STREAM_MAX_SECONDS`` pass.
+
+    ``poll_func(profile_id, after_id)`` is awaited for data; the client
+    reconnects with ``Last-Event-ID`` when the stream ends.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, 'LIVE_STREAM_MAX_SECONDS', 300)
+    interval = poll_interval()
+    unread = None
+    with broker.subscribe(user_id) as subscription:
+        yield f'retry: {heartbeat_interval() * 1000}\n\n'
+        next_poll = 0
+        while True:
+            now = loop.time()
+            if now >= next_poll:
+                messages, count = await poll_func(profile_id, after_id)
+                chunks, after_id, unread = events_since(after_id, messages, count, unread)
+                for chunk in chunks:
+                    yield chunk
+                next_poll = now + interval if interval else float('inf')
+            if loop.time() >= deadline:
+                return
+            timeout = min(heartbeat_interval(), max(next_poll - loop.time(), 0), deadline - loop.time())
+            if await subscription.wait(timeout):
+                next_poll = 0
+            elif loop.time() < next_poll:
+                yield ': ping\n\n'
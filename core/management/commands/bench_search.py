@@ -0,0 +1,92 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import search
+from core.models import Keyword, Profile, Project
+
+VOCABULARY = (
+    "sensor network deep learning imaging diagnosis energy grid solar water irrigation "
+    "robot drone vision language model security cloud embedded firmware satellite "
+    "battery hydrogen climate soil crop genome protein vaccine clinic hospital "
+    "education platform mobile blockchain logistics supply chain bridge concrete "
+    "turbine aerodynamics composite material sustainable recycling waste smart city"
+).split()
+
+DEFAULT_QUERIES = ["learning", "solar energy", "robot vision", "supply chain logistics", "vaccin", "zzzz"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark full-text project search against the legacy icontains filter. "
+        "Synthetic projects are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--query", action="append", dest="queries", help="Query to time (repeatable).")
+
+    def handle(self, *args, **options):
+        if search.get_backend() is None:
+            raise CommandError("No full-text backend for this database.")
+        queries = options["queries"] or DEFAULT_QUERIES
+        with transaction.atomic():
+            self._populate(options["projects"], random.Random(options["seed"]))
+            self.stdout.write(f"{'query':<28}{'icontains ms':>14}{'hits':>8}{'fts ms':>10}{'hits':>8}{'speedup':>10}")
+            for query in queries:
+                legacy_ms, legacy_hits = self._time(options["repeat"], lambda: list(
+                    Project.objects.filter(search.icontains_filter(query)).distinct().values_list("pk", flat=True)
+                ))
+                fts_ms, fts_hits = self._time(options["repeat"], lambda: search.search_projects(query))
+                speedup = legacy_ms / fts_ms if fts_ms else float("inf")
+                self.stdout.write(
+                    f"{query:<28}{legacy_ms:>14.1f}{legacy_hits:>8}{fts_ms:>10.1f}{fts_hits:>8}{speedup:>9.1f}x"
+                )
+            transaction.set_rollback(True)
+
+    def _time(self, repeat, fn):
+        timings = []
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), len(result)
+
+    def _populate(self, count, rng):
+        self.stdout.write(f"Generating {count} projects...")
+        start = time.perf_counter()
+        user = User.objects.create(username="bench-search-owner")
+        owner = Profile.objects.create(user=user, user_type="researcher")
+        keywords = Keyword.objects.bulk_create(
+            [Keyword(code=f"bench-{word}", label=word.title()) for word in VOCABULARY[:20]]
+        )
+
+        def words(n):
+            return " ".join(rng.choice(VOCABULARY) for _ in range(n))
+
+        batch_size = 5000
+        Through = Project.keywords.through
+        for offset in range(0, count, batch_size):
+            projects = Project.objects.bulk_create([
+                Project(
+                    title=words(6).capitalize(),
+                    description=words(80),
+                    project_type="research",
+                    posted_by=owner,
+                )
+                for _ in range(min(batch_size, count - offset))
+            ])
+            Through.objects.bulk_create([
+                Through(project_id=project.pk, keyword_id=keyword.pk)
+                for project in projects
+                for keyword in rng.sample(keywords, 3)
+            ])
+        indexed = search.rebuild()
+        self.stdout.write(f"Indexed {indexed} projects in {time.perf_counter() - start:.1f}s")
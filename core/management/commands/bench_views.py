@@ -0,0 +1,298 @@
+import datetime
+import json
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core import instrumentation, synthetic
+from core.models import ConversationParticipant, Document, Event, Message, Profile, Project, ProjectParticipant
+from core.urls import urlpatterns
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ANONYMOUS = 'anonymous'
+
+# Results of the reference run that later runs are compared with by default.
+# Regenerate it with --output when a change makes the pages faster (or is
+# accepted as slower), on the same dataset: see its "meta".
+BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'bench_views_baseline.json')
+
+# Metrics compared against the baseline and how: 'ratio' allows --tolerance, 'exact' any increase
+COMPARED = {'p95_ms': 'ratio', 'queries': 'exact', 'bytes': 'ratio'}
+
+
+def _own_project(profile):
+    projects = Project.objects.order_by('-pk')
+    if profile is not None:
+        own = projects.filter(posted_by=profile).values_list('pk', flat=True).first()
+        if own:
+            return own
+    return projects.values_list('pk', flat=True).first()
+
+
+def _conversation(profile):
+    memberships = ConversationParticipant.objects.order_by('-last_message_at', '-id')
+    if profile is not None:
+        memberships = memberships.filter(profile=profile)
+    return memberships.values_list('conversation_id', flat=True).first()
+
+
+def _application(profile):
+    applications = ProjectParticipant.objects.order_by('-pk')
+    if profile is not None:
+        own = applications.filter(project__posted_by=profile).values_list('pk', flat=True).first()
+        if own:
+            return own
+    return applications.values_list('pk', flat=True).first()
+
+
+def _document(profile):
+    documents = Document.objects.order_by('-pk')
+    if profile is not None:
+        own = documents.filter(owner=profile).values_list('pk', flat=True).first()
+        if own:
+            return own
+    return documents.values_list('pk', flat=True).first()
+
+
+def _reset_user(profile):
+    return profile.user if profile is not None else Profile.objects.select_related('user').order_by('pk').first().user
+
+
+# URL kwarg name -> function(profile or None) returning its value (None: no data, skip the route)
+URL_KWARGS = {
+    'project_id': _own_project,
+    'conversation_id': _conversation,
+    'event_id': lambda profile: Event.objects.order_by('start', 'id').values_list('pk', flat=True).first(),
+    'application_id': _application,
+    'document_id': _document,
+    'uidb64': lambda profile: urlsafe_base64_encode(force_bytes(_reset_user(profile).pk)),
+    'token': lambda profile: default_token_generator.make_token(_reset_user(profile)),
+}
+
+# Row counts recorded with the results
+DATASET_MODELS = (Profile, Project, ProjectParticipant, Message, Event, Document)
+
+# Routes that end the session; the client logs back in after each request
+RELOGIN = {'logout'}
+
+
+def routes():
+    """``[(name, kwarg names)]`` for every named route in ``core.urls``."""
+    return [
+        (pattern.name, list(pattern.pattern.regex.groupindex))
+        for pattern in urlpatterns if getattr(pattern, 'name', None)
+    ]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(timings, queries, db_times, template_times, size):
+    timings = sorted(timings)
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': max(queries),
+        'db_ms': round(statistics.median(db_times), 3),
+        'template_ms': round(statistics.median(template_times), 3),
+        'bytes': size,
+    }
+
+
+def compare(baseline, current, tolerance=0.2, min_ms=1.0):
+    """Return ``[(key, metric, old, new)]`` for results that regressed against ``baseline``.
+
+    Latencies and sizes may grow by ``tolerance`` (and latencies by at least
+    ``min_ms``) before they count; any extra query is a regression.
+    """
+    regressions = []
+    for key, new in sorted(current.items()):
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for metric, rule in COMPARED.items():
+            before, after = old.get(metric), new.get(metric)
+            if before is None or after is None:
+                continue
+            if rule == 'exact':
+                worse = after > before
+            else:
+                slack = max(before * tolerance, min_ms if metric.endswith('_ms') else 0)
+                worse = after > before + slack
+            if worse:
+                regressions.append((key, metric, before, after))
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every named route in core.urls through the test client, anonymously and "
+        "as one user of each profile type, and report p50/p95/p99 latency, queries, DB "
+        "time, response size and peak RSS. Results are written as JSON and can be "
+        "compared with a baseline from an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20, help="Timed requests per route and user.")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per route and user.")
+        parser.add_argument("--scale", type=float,
+                            help="Generate synthetic data (see seed --scale) inside a transaction that is rolled back.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--route", action="append", dest="routes", help="Only this route name (repeatable).")
+        parser.add_argument("--as", action="append", dest="user_types", metavar="USER_TYPE",
+                            help=f"Only this profile type or '{ANONYMOUS}' (repeatable).")
+        parser.add_argument("--output", default="bench_views.json", help="Where to write the JSON results.")
+        parser.add_argument("--baseline", default=BASELINE,
+                            help="JSON results of an earlier run to compare with (default: the committed "
+                                 "baseline); an empty value skips the comparison.")
+        parser.add_argument("--tolerance", type=float, default=0.2,
+                            help="Allowed relative growth of latency and size over the baseline.")
+        parser.add_argument("--fail-on-regression", action="store_true",
+                            help="Exit with an error when the baseline comparison finds a regression.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"]) as fh:
+                    baseline = json.load(fh)
+            except FileNotFoundError:
+                raise CommandError(f"No baseline at {options['baseline']}; pass --baseline= to skip the comparison.")
+
+        with transaction.atomic():
+            if options["scale"] is not None:
+                counts = synthetic.counts(options["scale"])
+                self.stdout.write("Generating " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+                synthetic.Generator(seed=options["seed"]).run(**counts)
+            results = self._run(options)
+            rows = {model.__name__: model.objects.count() for model in DATASET_MODELS}
+            transaction.set_rollback(True)
+
+        report = {
+            'meta': {
+                'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'vendor': connection.vendor,
+                'requests': options["requests"],
+                'scale': options["scale"],
+                'seed': options["seed"],
+                # What was measured: compare runs over similar data only
+                'rows': rows,
+            },
+            'results': results,
+        }
+        with open(options["output"], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+        self.stdout.write(f"\nWrote {len(results)} results to {options['output']}")
+
+        if baseline is not None:
+            if baseline.get('meta', {}).get('rows') not in (None, rows):
+                self.stdout.write(self.style.WARNING(
+                    f"The baseline was measured on different data ({baseline['meta']['rows']}); "
+                    "latencies may not be comparable."
+                ))
+            regressions = compare(baseline.get('results', {}), results, options["tolerance"])
+            self._report_regressions(regressions)
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+
+    def _users(self, wanted):
+        users = []
+        for user_type, _ in [(ANONYMOUS, None), *Profile.USER_TYPES]:
+            if wanted and user_type not in wanted:
+                continue
+            if user_type == ANONYMOUS:
+                users.append((ANONYMOUS, None))
+                continue
+            profile = Profile.objects.select_related('user').filter(user_type=user_type).order_by('pk').first()
+            if profile is None:
+                self.stdout.write(f"skipping {user_type}: no profile of this type")
+            else:
+                users.append((user_type, profile))
+        return users
+
+    def _run(self, options):
+        instrumentation.install_template_timer()
+        selected = [route for route in routes() if not options["routes"] or route[0] in options["routes"]]
+        if not selected:
+            raise CommandError("No matching routes.")
+        results = {}
+        hosts = ['testserver', *settings.ALLOWED_HOSTS]
+        self.stdout.write(
+            f"{'route':<34}{'p50':>8}{'p95':>8}{'p99':>8}{'queries':>8}{'db ms':>8}{'bytes':>9}{'rss MB':>8}  status"
+        )
+        # Measured here rather than by QueryBudgetMiddleware, so over-budget views are reported, not logged
+        with override_settings(ALLOWED_HOSTS=hosts, QUERY_BUDGET_ENABLED=False, QUERY_BUDGET_STRICT=False):
+            for user_type, profile in self._users(options["user_types"]):
+                client = Client()
+                if profile is not None:
+                    client.force_login(profile.user)
+                for name, kwarg_names in selected:
+                    kwargs = {kwarg: URL_KWARGS[kwarg](profile) for kwarg in kwarg_names}
+                    key = f"{name}@{user_type}"
+                    if any(value is None for value in kwargs.values()):
+                        self.stdout.write(f"{key:<34}skipped: no data for {', '.join(kwarg_names)}")
+                        continue
+                    url = reverse(name, kwargs=kwargs)
+                    results[key] = self._measure(client, url, profile if name in RELOGIN else None, options)
+                    self._print(key, results[key])
+        return results
+
+    def _measure(self, client, url, relogin, options):
+        timings, queries, db_times, template_times = [], [], [], []
+        size = status = 0
+        for n in range(options["warmup"] + options["requests"]):
+            with instrumentation.collect() as metrics:
+                start = time.perf_counter()
+                response = client.get(url, secure=True)
+                elapsed = time.perf_counter() - start
+            if relogin is not None:
+                client.force_login(relogin.user)
+            if n < options["warmup"]:
+                continue
+            status = response.status_code
+            size = len(response.content) if not response.streaming else 0
+            timings.append(elapsed * 1000)
+            queries.append(metrics.queries)
+            db_times.append(metrics.db_time * 1000)
+            template_times.append(metrics.template_time * 1000)
+        result = summarize(timings, queries, db_times, template_times, size)
+        result['status'] = status
+        result['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+        return result
+
+    def _print(self, key, result):
+        rss = f"{result['peak_rss_kb'] / 1024:.0f}" if result['peak_rss_kb'] is not None else '-'
+        self.stdout.write(
+            f"{key:<34}{result['p50_ms']:>8.1f}{result['p95_ms']:>8.1f}{result['p99_ms']:>8.1f}"
+            f"{result['queries']:>8}{result['db_ms']:>8.1f}{result['bytes']:>9}{rss:>8}  {result['status']}"
+        )
+
+    def _report_regressions(self, regressions):
+        self.stdout.write("")
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+            return
+        self.stdout.write(self.style.ERROR(f"{len(regressions)} regression(s) against the baseline:"))
+        for key, metric, before, after in regressions:
+            self.stdout.write(f"  {key:<34}{metric:<10}{before:>10} -> {after}")
@@ -0,0 +1,98 @@
+import os
+import subprocess
+from urllib.error import URLError
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core import assets
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the self-hosted stylesheet bundle: move inline <style> blocks into static files, "
+        "vendor the fonts and icons, compile and purge Tailwind, and minify it all into css/site.css."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vendor", action="store_true",
+                            help="Download the fonts and icons again even if they are already vendored.")
+        parser.add_argument("--styles-only", action="store_true",
+                            help="Only move inline <style> blocks into static/css/pages/.")
+        parser.add_argument("--collect", action="store_true",
+                            help="Run collectstatic afterwards (hashed names, gzip and brotli variants).")
+
+    def handle(self, *args, **options):
+        self.extract_styles()
+        if options["styles_only"]:
+            return
+        static_dir = assets.static_dir()
+        fonts_dir = os.path.join(static_dir, assets.VENDOR_DIR, "fonts")
+        icons_dir = os.path.join(static_dir, assets.VENDOR_DIR, "bootstrap-icons")
+        try:
+            if options["vendor"] or not os.path.exists(os.path.join(fonts_dir, "fonts.css")):
+                written = assets.vendor_fonts(fonts_dir)
+                self.stdout.write(f"Vendored {len(written)} font file(s) into {fonts_dir}")
+            if options["vendor"] or not os.path.exists(os.path.join(icons_dir, "bootstrap-icons.css")):
+                assets.vendor_bootstrap_icons(icons_dir)
+                self.stdout.write(f"Vendored bootstrap-icons {assets.BOOTSTRAP_ICONS_VERSION} into {icons_dir}")
+        except (OSError, URLError) as error:
+            raise CommandError(f"Could not download the fonts and icons: {error}")
+
+        cli = assets.tailwind_cli()
+        if not cli:
+            raise CommandError(
+                "The standalone Tailwind CLI was not found. Install it "
+                "(https://tailwindcss.com/blog/standalone-cli) and put it on PATH or set TAILWIND_CLI."
+            )
+        try:
+            tailwind = assets.compile_tailwind(cli, "assets/tailwind.config.js", "assets/site.css")
+        except (OSError, subprocess.CalledProcessError) as error:
+            raise CommandError(f"Tailwind failed: {getattr(error, 'stderr', '') or error}")
+
+        with open(os.path.join(fonts_dir, "fonts.css"), encoding="utf-8") as fh:
+            fonts = assets.rebase_urls(fh.read(), "../vendor/fonts/")
+        with open(os.path.join(icons_dir, "bootstrap-icons.css"), encoding="utf-8") as fh:
+            icons_css = fh.read()
+        used = assets.used_icons(assets.template_files(".html", ".js"))
+        icons = assets.rebase_urls(assets.purge_icon_css(icons_css, used), "../vendor/bootstrap-icons/")
+
+        bundle = assets.minify_css("\n".join([fonts, icons, tailwind]))
+        path = os.path.join(static_dir, assets.BUNDLE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(bundle + "\n")
+        assets.bundle_built.cache_clear()
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {path} ({len(bundle) / 1024:.1f} KiB, {len(used)} icon(s) kept)."
+        ))
+
+        if options["collect"]:
+            call_command("collectstatic", interactive=False, verbosity=options["verbosity"])
+
+    def extract_styles(self):
+        moved = 0
+        for root_dir in assets.template_dirs():
+            for path in assets.template_files(".html"):
+                if not path.startswith(root_dir):
+                    continue
+                name = os.path.relpath(path, root_dir).replace(os.sep, "/")
+                # Mail clients ignore linked stylesheets
+                if name.endswith("_email.html"):
+                    continue
+                with open(path, encoding="utf-8") as fh:
+                    source = fh.read()
+                css_name = assets.page_css_name(name)
+                new_source, css = assets.extract_inline_styles(source, css_name)
+                if not css:
+                    continue
+                css_path = os.path.join(assets.static_dir(), css_name)
+                os.makedirs(os.path.dirname(css_path), exist_ok=True)
+                with open(css_path, "w", encoding="utf-8") as fh:
+                    fh.write(css)
+                with open(path, "w", encoding="utf-8") as fh:
+                    fh.write(new_source)
+                moved += 1
+                self.stdout.write(f"{name}: inline styles moved to {css_name}")
+        if moved:
+            self.stdout.write(self.style.SUCCESS(f"Moved the inline styles of {moved} template(s)."))
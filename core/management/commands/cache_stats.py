@@ -0,0 +1,25 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core import caching
+
+
+class Command(BaseCommand):
+    help = "Show cache hit/miss statistics per cache and key family, across all workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Clear the counters after printing them.")
+
+    def handle(self, *args, **options):
+        for alias, families in caching.stats().items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{alias} ({caches[alias].__class__.__name__})"))
+            if not families:
+                self.stdout.write("  no lookups recorded")
+            for family, counts in sorted(families.items()):
+                total = counts['hits'] + counts['misses']
+                ratio = counts['hits'] / total if total else 0
+                self.stdout.write(
+                    f"  {family:<20} {counts['hits']:>9} hits {counts['misses']:>9} misses {ratio:>7.1%}"
+                )
+            if options["reset"]:
+                caches[alias].reset_stats()
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import translations
+
+
+class Command(BaseCommand):
+    help = "Compile the .po catalogs in LOCALE_PATHS whose content changed since the last compile."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Only report stale catalogs (exit status 1 if any); nothing is parsed or written.")
+        parser.add_argument("--force", action="store_true", help="Compile every catalog.")
+        parser.add_argument("--workers", type=int, default=None, help="Processes (default: one per CPU).")
+
+    def handle(self, *args, **options):
+        locale_dirs = [str(path) for path in settings.LOCALE_PATHS]
+        if options["check"]:
+            outdated = [f"{locale_dir}/{key}" for locale_dir in locale_dirs for key in translations.stale(locale_dir)]
+            if outdated:
+                raise CommandError(f"{len(outdated)} catalog(s) need compiling: {', '.join(outdated)}")
+            self.stdout.write("Translations are up to date.")
+            return
+
+        compiled, failures, total = 0, {}, 0
+        for locale_dir in locale_dirs:
+            done, failed, found = translations.compile_all(locale_dir, options["workers"], options["force"])
+            for key in done:
+                self.stdout.write(f"Compiled {locale_dir}/{key}")
+            compiled += len(done)
+            total += found
+            failures.update({f"{locale_dir}/{key}": error for key, error in failed.items()})
+        for path, error in failures.items():
+            self.stderr.write(f"{path}: {error}")
+        if failures:
+            raise CommandError(f"{len(failures)} of {total} catalog(s) failed to compile.")
+        self.stdout.write(self.style.SUCCESS(f"Compiled {compiled} of {total} catalog(s); the rest were unchanged."))
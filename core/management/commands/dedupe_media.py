@@ -0,0 +1,61 @@
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import blobs
+from core.models import Blob
+from core.storage import cas_storage, content_hash, hashed_name, is_hashed
+
+
+class Command(BaseCommand):
+    help = (
+        "Move uploads stored under their original names (documents/, cvs/) into "
+        "content-addressed storage, so identical files are kept once, then recount "
+        "the references of every stored file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be merged and freed.")
+        parser.add_argument("--prune", action="store_true", help="Also delete stored files nothing refers to.")
+
+    def handle(self, *args, **options):
+        storage = cas_storage()
+        referenced = blobs.references()
+        legacy = sorted(name for name in referenced if not is_hashed(name))
+        seen = {name for name in referenced if is_hashed(name)}
+        moves, freed, missing = {}, 0, 0
+        for name in legacy:
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f"missing: {name}")
+                continue
+            with storage.open(name) as fh:
+                content = File(fh, name)
+                digest, size = content_hash(content)
+                target = hashed_name(digest, name)
+                if target in seen or storage.exists(target):
+                    freed += size
+                elif not options["dry_run"]:
+                    target = storage.save(name, content)
+            seen.add(target)
+            moves[name] = target
+
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(
+            f"{verb} {len(moves)} file(s) into content-addressed storage; "
+            f"{len(moves) - len(set(moves.values()))} duplicate(s), {freed / 2 ** 20:.1f} MB freed, {missing} missing."
+        )
+        if options["dry_run"]:
+            return
+
+        with transaction.atomic():
+            for model, field in blobs.REFERENCES:
+                for name, target in moves.items():
+                    model.objects.filter(**{field: name}).update(**{field: target})
+            Blob.objects.filter(name__in=list(moves)).delete()
+            changed = blobs.recount()
+        for name in moves:
+            storage.delete(name)
+        self.stdout.write(f"Recounted references: {changed} blob(s) changed.")
+        if options["prune"]:
+            self.stdout.write(f"Pruned {blobs.prune()} unreferenced file(s).")
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+from core.models import Event, Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream projects, a project's applications or an event's participants as CSV or "
+        "JSON Lines, in constant memory, to a file or stdout."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("what", choices=["projects", "applications", "event-participants"])
+        parser.add_argument("--project", type=int, help="Project id (applications).")
+        parser.add_argument("--event", type=int, help="Event id (event-participants).")
+        parser.add_argument("--format", choices=sorted(exports.FORMATS), default="csv")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout).")
+        parser.add_argument("--chunk-size", type=int, help="Rows per database round trip.")
+
+    def handle(self, *args, **options):
+        export = self._export(options)
+        rows = 0
+
+        def counted(lines):
+            # A CSV record holding a newline spans several lines, so count records
+            nonlocal rows
+            for rows, line in enumerate(lines, 1):
+                yield line
+
+        out = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else None
+        try:
+            lines = exports.lines(export, options["format"], options["chunk_size"])
+            for block in exports.blocks(counted(lines)):
+                if out:
+                    out.write(block)
+                else:
+                    self.stdout.write(block, ending="")
+        finally:
+            if out:
+                out.close()
+        if options["format"] == "csv":
+            rows -= 1  # the header
+        if options["output"]:
+            self.stderr.write(f"Wrote {rows} rows to {options['output']}")
+
+    def _export(self, options):
+        what = options["what"]
+        if what == "projects":
+            return exports.projects()
+        if what == "applications":
+            project = Project.objects.filter(pk=options["project"]).first() if options["project"] else None
+            if project is None:
+                raise CommandError("applications needs an existing --project id.")
+            return exports.applications(project)
+        event = Event.objects.filter(pk=options["event"]).first() if options["event"] else None
+        if event is None:
+            raise CommandError("event-participants needs an existing --event id.")
+        return exports.event_participants(event)
@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core import previews
+from core.models import Document
+
+
+class Command(BaseCommand):
+    help = "Render the missing previews of every uploaded document (backfill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Files rendered in parallel.")
+
+    def handle(self, *args, **options):
+        names = [
+            name for name in Document.objects.order_by().values_list("file", flat=True).distinct()
+            if previews.supported(name)
+        ]
+        rendered = failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            for name, written in zip(names, pool.map(self.render, names)):
+                if written is None:
+                    failed += 1
+                    self.stderr.write(f"failed: {name}")
+                elif written:
+                    rendered += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered previews for {rendered} of {len(names)} file(s); {failed} failed."
+        ))
+
+    def render(self, name):
+        try:
+            return previews.render(name)
+        except Exception:
+            return None
@@ -0,0 +1,170 @@
+import statistics
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import explain
+from core.models import ConversationParticipant, Profile
+
+# (url name, url kwargs for the profile or None to skip, query string)
+PAGES = [
+    ('project_list', lambda profile: {}, ''),
+    ('project_list', lambda profile: {}, '?q=data'),
+    ('project_detail', lambda profile: _first(profile.posted_projects, 'project_id'), ''),
+    ('suggestions', lambda profile: {}, ''),
+    ('dashboard', lambda profile: {}, ''),
+    ('inbox', lambda profile: {}, ''),
+    ('conversation', lambda profile: _conversation(profile), ''),
+    ('events_list', lambda profile: {}, ''),
+    ('profile', lambda profile: {}, ''),
+    ('user_projects', lambda profile: {}, ''),
+    ('my_applications', lambda profile: {}, ''),
+    ('manage_applications', lambda profile: _first(profile.posted_projects, 'project_id'), ''),
+]
+
+
+def _first(queryset, kwarg):
+    pk = queryset.order_by('-pk').values_list('pk', flat=True).first()
+    return {kwarg: pk} if pk else None
+
+
+def _conversation(profile):
+    pk = (
+        ConversationParticipant.objects.filter(profile=profile, last_message_at__isnull=False)
+        .order_by('-last_message_at').values_list('conversation_id', flat=True).first()
+    )
+    return {'conversation_id': pk} if pk else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the main pages as a user, EXPLAIN every SELECT they run, flag full "
+        "scans and sorts, and propose composite indexes. With --timings, time the "
+        "flagged statements before and after trial-creating the proposed indexes "
+        "inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Username to browse as (default: the profile with most projects).")
+        parser.add_argument("--timings", type=int, default=0, metavar="N",
+                            help="Time each flagged statement N times before and after the proposed indexes.")
+        parser.add_argument("--verbose-sql", action="store_true", help="Print full SQL for flagged statements.")
+
+    def handle(self, *args, **options):
+        if explain.get_planner(connection) is None:
+            raise CommandError(f"No plan reader for the {connection.vendor} backend.")
+        profile = self._profile(options["user"])
+        statements = self._capture(profile)
+        self.stdout.write(f"Captured {len(statements)} distinct SELECTs as {profile.user.username}\n")
+
+        proposals = OrderedDict()
+        flagged = []
+        for sql, (view_name, params) in statements.items():
+            findings = explain.inspect(sql, params)
+            if not findings:
+                continue
+            flagged.append((sql, params))
+            self.stdout.write(self.style.MIGRATE_HEADING(view_name))
+            self.stdout.write("  " + (sql if options["verbose_sql"] else _shorten(sql)))
+            for finding in findings:
+                self.stdout.write(f"    {finding.kind:<5} {finding.table}: {finding.detail}")
+                self._propose(proposals, sql, finding.table, view_name)
+
+        self.stdout.write("")
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS("No new indexes to propose."))
+            return
+        self.stdout.write(self.style.MIGRATE_HEADING("Proposed indexes"))
+        for (model, _), (index, views) in proposals.items():
+            self.stdout.write(
+                f"  {model.__name__}: models.Index(fields={index.fields!r}, name={index.name!r})"
+                f"  # {', '.join(sorted(views))}"
+            )
+        if options["timings"]:
+            self._timings(flagged, [(model, index) for (model, _), (index, _) in proposals.items()], options["timings"])
+
+    def _profile(self, username):
+        profiles = Profile.objects.select_related('user')
+        if username:
+            profile = profiles.filter(user__username=username).first()
+        else:
+            profile = profiles.annotate(n=Count('posted_projects')).order_by('-n', 'pk').first()
+        if profile is None:
+            raise CommandError("No matching profile; create data first (manage.py seed).")
+        return profile
+
+    def _capture(self, profile):
+        """Map each distinct SELECT to the first view that ran it and its params."""
+        client = Client()
+        client.force_login(profile.user)
+        statements = OrderedDict()
+        hosts = ['testserver', *settings.ALLOWED_HOSTS]
+        with override_settings(ALLOWED_HOSTS=hosts, QUERY_BUDGET_STRICT=False):
+            for name, kwargs, query in PAGES:
+                url_kwargs = kwargs(profile)
+                if url_kwargs is None:
+                    self.stdout.write(f"skipping {name}: no data for this user")
+                    continue
+                with explain.capture() as captured:
+                    response = client.get(reverse(name, kwargs=url_kwargs) + query, secure=True)
+                if response.status_code != 200:
+                    self.stderr.write(f"{name}{query} returned {response.status_code}; skipped")
+                    continue
+                for sql, params in captured:
+                    statements.setdefault(sql, (name + query, params))
+        client.logout()
+        return statements
+
+    def _propose(self, proposals, sql, table, view_name):
+        model = explain.model_for_table(table) if table else None
+        if model is None:
+            return
+        columns = explain.propose(sql, table)
+        if not columns or explain.covered(columns, explain.existing_indexes(model)):
+            return
+        index = explain.as_index(model, columns)
+        _, views = proposals.setdefault((model, tuple(index.fields)), (index, set()))
+        views.add(view_name)
+
+    def _timings(self, flagged, proposals, repeat):
+        self.stdout.write("")
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Timings (median of {repeat}, ms)"))
+        before = [self._time(sql, params, repeat) for sql, params in flagged]
+        with transaction.atomic():
+            editor = connection.schema_editor()
+            with connection.cursor() as cursor:
+                for model, index in proposals:
+                    cursor.execute(str(index.create_sql(model, editor)))
+            after = [self._time(sql, params, repeat) for sql, params in flagged]
+            transaction.set_rollback(True)
+        self.stdout.write(f"  {'before':>9} {'after':>9}  statement")
+        for (sql, _), old, new in zip(flagged, before, after):
+            self.stdout.write(f"  {old:>9.2f} {new:>9.2f}  {_shorten(sql, 70)}")
+        self.stdout.write(f"  {sum(before):>9.2f} {sum(after):>9.2f}  total")
+
+    def _time(self, sql, params, repeat):
+        timings = []
+        with connection.cursor() as cursor:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+
+def _shorten(sql, width=110):
+    sql = ' '.join(sql.split())
+    if len(sql) <= width:
+        return sql
+    head = sql[:width // 2]
+    where = sql.find(' WHERE ')
+    tail = sql[where:where + width // 2] if where != -1 else sql[-width // 2:]
+    return f"{head} ...{tail}"
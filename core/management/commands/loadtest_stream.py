@@ -0,0 +1,125 @@
+import asyncio
+import secrets
+import statistics
+import time
+import urllib.parse
+import urllib.request
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many idle live-inbox streams against a running server, report how many "
+        "it holds, then send one message and time its fan-out to every stream. "
+        "Run it against the same database as the server, e.g. with SERVER=asgi and "
+        "WEB_CONCURRENCY=1 to measure connections per worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running server.")
+        parser.add_argument("--connections", type=int, default=1000)
+        parser.add_argument("--rate", type=int, default=200, help="New connections per second while ramping up.")
+        parser.add_argument("--hold", type=float, default=10.0, help="Seconds to keep every stream idle.")
+        parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the fan-out.")
+
+    def handle(self, *args, **options):
+        url = urllib.parse.urlsplit(options["url"])
+        if url.scheme != "http":
+            raise CommandError("Only plain http:// servers are supported.")
+        reader = self._session("loadtest-reader")
+        sender = self._session("loadtest-sender")
+        asyncio.run(self._run(url, reader, sender, options))
+
+    def _session(self, username):
+        user, _ = User.objects.get_or_create(username=username)
+        profile, _ = Profile.objects.get_or_create(user=user, defaults={"user_type": "student"})
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return profile.pk, session.session_key
+
+    async def _run(self, url, reader, sender, options):
+        streams = []
+        failures = 0
+        started = time.perf_counter()
+        interval = 1 / options["rate"]
+        for _ in range(options["connections"]):
+            try:
+                streams.append(await self._open(url, reader[1]))
+            except (OSError, asyncio.TimeoutError, ConnectionError):
+                failures += 1
+            await asyncio.sleep(interval)
+        self.stdout.write(
+            f"opened {len(streams)} streams in {time.perf_counter() - started:.1f}s ({failures} failed)"
+        )
+
+        await asyncio.sleep(options["hold"])
+        alive = sum(1 for _, stream_writer in streams if not stream_writer.is_closing())
+        self.stdout.write(f"holding {alive} idle streams after {options['hold']:.0f}s")
+
+        waiters = [asyncio.create_task(self._wait_for_message(stream_reader)) for stream_reader, _ in streams]
+        sent = time.perf_counter()
+        await asyncio.to_thread(self._send, url, sender[1], reader[0])
+        done, pending = await asyncio.wait(waiters, timeout=options["timeout"])
+        latencies = sorted((task.result() - sent) * 1000 for task in done if task.result() is not None)
+        for task in pending:
+            task.cancel()
+        for _, stream_writer in streams:
+            stream_writer.close()
+
+        self.stdout.write(f"message delivered to {len(latencies)}/{len(streams)} streams")
+        if latencies:
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+            self.stdout.write(
+                f"fan-out latency ms: p50 {statistics.median(latencies):.1f} "
+                f"p95 {p95:.1f} max {latencies[-1]:.1f}"
+            )
+
+    async def _open(self, url, session_key):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(url.hostname, url.port or 80), 10)
+        writer.write((
+            f"GET {reverse('inbox_stream')} HTTP/1.1\r\n"
+            f"Host: {url.netloc}\r\n"
+            f"Cookie: {settings.SESSION_COOKIE_NAME}={session_key}\r\n"
+            "Accept: text/event-stream\r\n\r\n"
+        ).encode())
+        await writer.drain()
+        status = await asyncio.wait_for(reader.readline(), 10)
+        if b" 200 " not in status:
+            writer.close()
+            raise ConnectionError(status.decode(errors="replace").strip())
+        # Headers, then the stream's opening retry: line
+        while not (await asyncio.wait_for(reader.readline(), 10)).startswith(b"retry:"):
+            pass
+        return reader, writer
+
+    async def _wait_for_message(self, reader):
+        while line := await reader.readline():
+            if line.startswith(b"event: message"):
+                return time.perf_counter()
+        return None
+
+    def _send(self, url, session_key, recipient_id):
+        token = secrets.token_hex(16)
+        body = urllib.parse.urlencode({
+            "csrfmiddlewaretoken": token,
+            "recipient": recipient_id,
+            "subject": "Load test",
+            "body": "Fan-out probe",
+        }).encode()
+        request = urllib.request.Request(
+            urllib.parse.urljoin(url.geturl(), reverse("compose")),
+            data=body,
+            headers={"Cookie": f"{settings.SESSION_COOKIE_NAME}={session_key}; {settings.CSRF_COOKIE_NAME}={token}"},
+        )
+        urllib.request.urlopen(request, timeout=30).close()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core import suggestions
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed project suggestions for every profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = suggestions.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt suggestions for {total} profile(s)."))
@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from core import jobs
+
+# Seconds between the housekeeping passes (requeueing lost jobs, pruning old ones)
+HOUSEKEEPING_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (core.jobs). Each process polls the job table "
+        "from a pool of threads; start more processes, here or on other hosts, to scale out."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=None,
+                            help="Jobs run at once per process (default: JOB_WORKER_THREADS).")
+        parser.add_argument("--processes", type=int, default=1, help="Worker processes to fork.")
+        parser.add_argument("--poll-interval", type=float, default=None,
+                            help="Seconds to sleep when the queue is empty (default: JOB_POLL_INTERVAL).")
+        parser.add_argument("--once", action="store_true", help="Exit once no job is ready instead of polling.")
+        parser.add_argument("--stats", action="store_true", help="Print per-job counts and timings, then exit.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            return self.print_stats()
+        self.threads = options["threads"] or settings.JOB_WORKER_THREADS
+        self.poll_interval = options["poll_interval"] if options["poll_interval"] is not None else settings.JOB_POLL_INTERVAL
+        self.once = options["once"]
+        self.stop = threading.Event()
+        previous = {signum: signal.signal(signum, lambda *_: self.stop.set()) for signum in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            if options["processes"] <= 1:
+                self.run_process()
+            else:
+                self.run_processes(options["processes"])
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+    def run_processes(self, count):
+        # Children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [context.Process(target=self.run_process) for _ in range(count)]
+        for child in children:
+            child.start()
+        while any(child.is_alive() for child in children):
+            if self.stop.wait(1):
+                # Pass the shutdown on; each child finishes its running jobs
+                for child in children:
+                    if child.is_alive():
+                        os.kill(child.pid, signal.SIGTERM)
+                break
+        for child in children:
+            child.join()
+
+    def run_process(self):
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Worker {prefix} started with {self.threads} thread(s).")
+        threads = [
+            threading.Thread(target=self.loop, args=(f"{prefix}:{n}",), name=f"job-worker-{n}", daemon=True)
+            for n in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        next_housekeeping = 0.0
+        while not self.stop.is_set():
+            alive = [thread for thread in threads if thread.is_alive()]
+            if not alive:
+                break
+            if time.monotonic() >= next_housekeeping and not self.once:
+                self.housekeeping()
+                next_housekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL
+            alive[0].join(timeout=1)
+        # Let running jobs finish
+        for thread in threads:
+            thread.join()
+        connections.close_all()
+        self.stdout.write(f"Worker {prefix} stopped.")
+
+    def loop(self, worker):
+        try:
+            while not self.stop.is_set():
+                try:
+                    claimed = jobs.claim(worker)
+                except DatabaseError as error:
+                    # e.g. SQLite "database is locked" under write contention
+                    self.stderr.write(f"{worker}: could not claim a job: {error}")
+                    self.stop.wait(min(self.poll_interval, 0.1))
+                    continue
+                if claimed:
+                    jobs.execute(claimed[0])
+                elif self.once:
+                    break
+                else:
+                    self.stop.wait(self.poll_interval)
+        finally:
+            connections.close_all()
+
+    def housekeeping(self):
+        try:
+            requeued, pruned = jobs.requeue_stale(), jobs.prune_finished()
+        except DatabaseError as error:
+            self.stderr.write(f"Housekeeping failed: {error}")
+            return
+        if requeued or pruned:
+            self.stdout.write(f"Requeued {requeued} lost job(s), pruned {pruned} finished job(s).")
+
+    def print_stats(self):
+        rows = jobs.stats()
+        if not rows:
+            self.stdout.write("No jobs.")
+            return
+        self.stdout.write(
+            f"{'job':<24}{'queued':>8}{'running':>8}{'done':>8}{'failed':>8}{'avg wait ms':>13}{'avg ms':>10}{'max ms':>10}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['name']:<24}{row['queued']:>8}{row['running']:>8}{row['done']:>8}{row['failed']:>8}"
+                f"{row['avg_wait_ms'] or 0:>13.1f}{row['avg_ms'] or 0:>10.1f}{row['max_ms'] or 0:>10.1f}"
+            )
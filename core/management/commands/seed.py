@@ -1,13 +1,54 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
+from core import synthetic
 from core.models import Keyword, Organization, Profile, Project, Event
 from django.utils import timezone
 import datetime
 
 class Command(BaseCommand):
-    help = "Seed database with sample data"
+    help = (
+        "Seed database with sample data. With --scale (or any of the count options), "
+        "bulk-generate deterministic synthetic data for load testing instead."
+    )
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float,
+                            help=f"Multiplier for synthetic data; 1 unit is {synthetic.PER_SCALE}.")
+        parser.add_argument("--profiles", type=int, help="Override the number of synthetic profiles.")
+        parser.add_argument("--projects", type=int, help="Override the number of synthetic projects.")
+        parser.add_argument("--messages", type=int, help="Override the number of synthetic messages.")
+        parser.add_argument("--events", type=int, help="Override the number of synthetic events.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--password", default="password", help="Password of every synthetic user.")
+        parser.add_argument("--suggestions", action="store_true",
+                            help="Also rebuild project suggestions (slow: profiles x open projects).")
+
+    def handle(self, *args, **options):
+        overrides = {name: options[name] for name in synthetic.PER_SCALE}
+        if options["scale"] is None and all(value is None for value in overrides.values()):
+            self.seed_sample()
+        else:
+            self.seed_synthetic(synthetic.counts(1 if options["scale"] is None else options["scale"], **overrides), options)
+
+    def seed_synthetic(self, counts, options):
+        prefix = synthetic.username_prefix(options["seed"])
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Synthetic users for seed {options['seed']} already exist; "
+                "use another --seed or start from an empty database (manage.py flush)."
+            )
+        self.stdout.write("Generating " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+        generator = synthetic.Generator(
+            seed=options["seed"], batch_size=options["batch_size"], password=options["password"],
+            log=self.stdout.write,
+        )
+        created = generator.run(rebuild_suggestions=options["suggestions"], **counts)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded database with {sum(created.values())} synthetic rows (users {prefix}0..{counts['profiles'] - 1})."
+        ))
+
+    def seed_sample(self):
         # Keyword list (sample from slides)
         keywords = [
             ("ai", "Artificial Intelligence"),
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary database into the SQLite replica, to try replica routing locally. "
+        "With --every it keeps copying, so the replica lags like a real one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--every", type=float, default=None, help="Seconds between copies (default: copy once).")
+
+    def handle(self, *args, **options):
+        if not replicas.configured():
+            raise CommandError("DATABASE_REPLICA_URL is not set.")
+        primary, replica = settings.DATABASES["default"], settings.DATABASES[replicas.REPLICA_ALIAS]
+        if not all(db["ENGINE"] == "django.db.backends.sqlite3" for db in (primary, replica)):
+            raise CommandError("Both the primary and the replica must be SQLite files; use real replication otherwise.")
+        source, target = str(primary["NAME"]), str(replica["NAME"])
+        if source == target:
+            raise CommandError("The primary and the replica are the same file.")
+        while True:
+            replicas.copy_sqlite(source, target)
+            self.stdout.write(f"Copied {source} -> {target}")
+            if options["every"] is None:
+                return
+            time.sleep(options["every"])
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import translation
+
+from core import fragments, stats, unread
+from core.models import Profile, Project
+
+
+class Command(BaseCommand):
+    help = "Fill the shared cache: dashboard stats, unread badges and the first project list pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=1, help="Project list pages to render per language.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        stats.refresh_global_stats()
+        self.stdout.write("Dashboard statistics cached.")
+
+        timeout = getattr(settings, 'UNREAD_COUNT_CACHE_TIMEOUT', 300)
+        batch, users = {}, 0
+        for user_id, count in Profile.objects.values_list('user_id', 'unread_count').iterator():
+            batch[unread.cache_key(user_id)] = count
+            if len(batch) >= options["batch_size"]:
+                users += len(batch)
+                cache.set_many(batch, timeout)
+                batch = {}
+        users += len(batch)
+        cache.set_many(batch, timeout)
+        self.stdout.write(f"Unread counters cached for {users} user(s).")
+
+        per_page = getattr(settings, 'PAGINATE_BY', 20)
+        projects = list(
+            Project.objects.select_related('posted_by__user')
+            .order_by('-created_at', '-id')[:per_page * options["pages"]]
+        )
+        for language, _ in settings.LANGUAGES:
+            with translation.override(language):
+                for applicant in (False, True):
+                    fragments.cached_cards(projects, applicant)
+        cards = len(projects) * len(settings.LANGUAGES) * 2
+        self.stdout.write(self.style.SUCCESS(f"Cached {cards} project card(s)."))
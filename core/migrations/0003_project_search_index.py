@@ -0,0 +1,50 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_project_fts USING fts5("
+    "title, keywords, description, tokenize = 'unicode61 remove_diacritics 2')",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE TABLE IF NOT EXISTS core_project_fts ("
+    "project_id bigint PRIMARY KEY REFERENCES core_project (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS core_project_fts_document_gin ON core_project_fts USING GIN (document)",
+]
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = SQLITE_FORWARD
+    elif vendor == 'postgresql':
+        statements = POSTGRES_FORWARD
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+    # Backfill existing projects
+    from core import search
+    search._available.pop(schema_editor.connection.alias, None)
+    Project = apps.get_model('core', 'Project')
+    if Project.objects.using(schema_editor.connection.alias).exists():
+        search.rebuild(using=schema_editor.connection.alias)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS core_project_fts")
+    from core import search
+    search._available.pop(schema_editor.connection.alias, None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_eventparticipant'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-17 22:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_suggestions(apps, schema_editor):
+    Profile = apps.get_model('core', 'Profile')
+    if Profile.objects.using(schema_editor.connection.alias).exists():
+        from core import suggestions
+        suggestions.rebuild()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_project_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suggestions', to='core.profile')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suggestions', to='core.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', '-score'], name='core_sugg_profile_score_idx')],
+                'unique_together': {('profile', 'project')},
+            },
+        ),
+        migrations.RunPython(backfill_suggestions, migrations.RunPython.noop),
+    ]
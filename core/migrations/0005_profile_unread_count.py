@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-17 22:17
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counts(apps, schema_editor):
+    Profile = apps.get_model('core', 'Profile')
+    Message = apps.get_model('core', 'Message')
+    unread = (
+        Message.objects.filter(recipient=OuterRef('pk'), read=False)
+        .order_by().values('recipient').annotate(n=Count('pk')).values('n')
+    )
+    Profile.objects.using(schema_editor.connection.alias).update(
+        unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_projectsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2 on 2026-10-17 22:46
+
+import re
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+REPLY_PREFIX = re.compile(r'^\s*((re|fwd?)\s*:\s*)*', re.IGNORECASE)
+
+
+def thread_existing_messages(apps, schema_editor):
+    """Group existing messages into one conversation per pair of profiles and subject."""
+    db = schema_editor.connection.alias
+    Message = apps.get_model('core', 'Message')
+    Conversation = apps.get_model('core', 'Conversation')
+    ConversationParticipant = apps.get_model('core', 'ConversationParticipant')
+
+    threads = defaultdict(list)
+    rows = Message.objects.using(db).order_by('sent_at', 'id').values_list(
+        'pk', 'sender_id', 'recipient_id', 'subject', 'sent_at', 'read'
+    )
+    for row in rows.iterator():
+        _, sender_id, recipient_id, subject, _, _ = row
+        pair = tuple(sorted({sender_id, recipient_id}))
+        threads[pair, REPLY_PREFIX.sub('', subject).strip().lower()].append(row)
+
+    for (pair, _), messages in threads.items():
+        last_id, _, _, _, last_at, _ = messages[-1]
+        conversation = Conversation.objects.using(db).create(subject=messages[0][3], last_message_id=last_id)
+        unread = defaultdict(int)
+        for _, _, recipient_id, _, _, read in messages:
+            if not read:
+                unread[recipient_id] += 1
+        ConversationParticipant.objects.using(db).bulk_create([
+            ConversationParticipant(
+                conversation=conversation, profile_id=profile_id,
+                last_message_at=last_at, unread_count=unread[profile_id],
+            )
+            for profile_id in pair
+        ])
+        Message.objects.using(db).filter(pk__in=[row[0] for row in messages]).update(conversation=conversation)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_profile_unread_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('unread_count', models.PositiveIntegerField(default=0, editable=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.message')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='core.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', '-sent_at', '-id'], name='core_msg_thread_idx'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='core.conversation'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='profile',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_memberships', to='core.profile'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='participants',
+            field=models.ManyToManyField(related_name='conversations', through='core.ConversationParticipant', to='core.profile'),
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(fields=['profile', '-last_message_at', '-id'], name='core_conv_inbox_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='conversationparticipant',
+            unique_together={('conversation', 'profile')},
+        ),
+        # Made NOT NULL in 0011: on PostgreSQL the deferred FK checks queued by the
+        # back-fill block any ALTER TABLE later in this transaction
+        migrations.RunPython(thread_existing_messages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-17 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_conversations'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start', 'id'], name='core_event_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-created_at', '-id'], name='core_project_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['posted_by', '-created_at', '-id'], name='core_project_poster_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectparticipant',
+            index=models.Index(fields=['profile', '-applied_at', '-id'], name='core_part_profile_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectparticipant',
+            index=models.Index(fields=['project', '-applied_at', '-id'], name='core_part_project_applied_idx'),
+        ),
+    ]
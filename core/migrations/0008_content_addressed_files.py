@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-17 23:40
+
+import core.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_files(apps, schema_editor):
+    """Create a Blob for every file already referenced, with its reference count."""
+    db = schema_editor.connection.alias
+    Blob = apps.get_model('core', 'Blob')
+    counts = {}
+    for model_name, field in (('Document', 'file'), ('Profile', 'cv')):
+        rows = (
+            apps.get_model('core', model_name).objects.using(db)
+            .exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            .order_by().values_list(field).annotate(n=Count('pk'))
+        )
+        for name, n in rows:
+            counts[name] = counts.get(name, 0) + n
+    Blob.objects.using(db).bulk_create(
+        [Blob(name=name, ref_count=n) for name, n in counts.items()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_view_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='file',
+            field=models.FileField(storage=core.storage.cas_storage, upload_to='documents/'),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='cv',
+            field=models.FileField(blank=True, null=True, storage=core.storage.cas_storage, upload_to='cvs/'),
+        ),
+        migrations.RunPython(count_existing_files, migrations.RunPython.noop),
+    ]
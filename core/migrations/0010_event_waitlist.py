@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-17 23:58
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_seats(apps, schema_editor):
+    """Existing registrations all hold a seat."""
+    db = schema_editor.connection.alias
+    Event = apps.get_model('core', 'Event')
+    EventParticipant = apps.get_model('core', 'EventParticipant')
+    taken = (
+        EventParticipant.objects.using(db).filter(event=OuterRef('pk'))
+        .order_by().values('event').annotate(n=Count('pk')).values('n')
+    )
+    Event.objects.using(db).update(seats_taken=Coalesce(Subquery(taken), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='eventparticipant',
+            name='status',
+            field=models.CharField(choices=[('registered', 'Registered'), ('waitlisted', 'Waitlisted')], default='registered', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='eventparticipant',
+            index=models.Index(fields=['event', 'status', 'registered_at', 'id'], name='core_event_waitlist_idx'),
+        ),
+        migrations.RunPython(count_seats, migrations.RunPython.noop),
+    ]
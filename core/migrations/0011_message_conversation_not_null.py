@@ -0,0 +1,22 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Every message has a conversation once 0006 has back-filled them. Kept apart
+# from that data migration so the ALTER TABLE runs in its own transaction,
+# after the back-fill's deferred foreign key checks have fired (PostgreSQL).
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_event_waitlist'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='core.conversation'),
+        ),
+    ]
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .storage import cas_storage
+
 INSTITUTIONS = [
     ("university", "Université"),
     ("public_research", "Établissement public de recherche"),
@@ -65,12 +67,34 @@ class Profile(models.Model):
     bio = models.TextField(blank=True)
     contact_email = models.EmailField(blank=True, null=True)
     phone = models.CharField(max_length=50, blank=True, null=True)
-    cv = models.FileField(upload_to='cvs/', blank=True, null=True)
+    cv = models.FileField(upload_to='cvs/', storage=cas_storage, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalised count of unread received messages (see core.unread)
+    unread_count = models.PositiveIntegerField(default=0, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'cv' in field_names:
+            instance._loaded_cv = instance.cv.name
+        return instance
 
     def __str__(self):
         return f"{self.user.username} ({self.get_user_type_display()})"
 
+class ProjectQuerySet(models.QuerySet):
+    def for_detail(self):
+        """Everything the detail page shows: one query for the project, poster and
+        participant count, one for the keywords."""
+        return (
+            self.select_related('posted_by__user', 'posted_by__organization')
+            .prefetch_related('keywords')
+            # Accepted members only: applications come and go without changing the page
+            .annotate(participant_count=models.Count(
+                'projectparticipant', filter=models.Q(projectparticipant__accepted=True)
+            ))
+        )
+
 class Project(models.Model):
     PROJECT_TYPES = [
         ('mission', 'Mission Courte'),
@@ -100,6 +124,14 @@ class Project(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     budget = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
 
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='core_project_recent_idx'),
+            models.Index(fields=['posted_by', '-created_at', '-id'], name='core_project_poster_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -119,21 +151,173 @@ class ProjectParticipant(models.Model):
 
     class Meta:
         unique_together = ('project', 'profile')
+        indexes = [
+            models.Index(fields=['profile', '-applied_at', '-id'], name='core_part_profile_applied_idx'),
+            models.Index(fields=['project', '-applied_at', '-id'], name='core_part_project_applied_idx'),
+        ]
+
+    @classmethod
+    def apply(cls, project, profile):
+        """Add ``profile`` as a candidate. Returns the new row, or None when the profile had already applied.
+
+        The insert runs in its own transaction, so the unique constraint (not
+        a prior lookup) decides between two concurrent applications.
+        """
+        try:
+            with transaction.atomic():
+                return cls.objects.create(project=project, profile=profile)
+        except IntegrityError:
+            return None
 
     def __str__(self):
         return f"{self.profile.user.username} -> {self.project.title} ({self.role})"
 
+class ProjectSuggestion(models.Model):
+    """Precomputed top-K project matches for a profile (see core.suggestions)."""
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='suggestions')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='suggestions')
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('profile', 'project')
+        indexes = [
+            models.Index(fields=['profile', '-score'], name='core_sugg_profile_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.profile.user.username} -> {self.project.title} ({self.score:.2f})"
+
 class Document(models.Model):
     owner = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='documents')
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='documents', blank=True, null=True)
     title = models.CharField(max_length=255)
-    file = models.FileField(upload_to='documents/')
+    file = models.FileField(upload_to='documents/', storage=cas_storage)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored file so saves can move its reference (see core.blobs)
+        if 'file' in field_names:
+            instance._loaded_file = instance.file.name
+        return instance
+
     def __str__(self):
         return self.title
 
+class Blob(models.Model):
+    """A stored file and how many rows point at it. Uploads are stored once per
+    content hash (core.storage); ``ref_count`` is kept by ``core.blobs``."""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    size = models.BigIntegerField(blank=True, null=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+class Job(models.Model):
+    """A unit of background work, run by ``manage.py run_worker`` (see core.jobs)."""
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUSES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    priority = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    # Renewed by the worker's heartbeat while the job runs: the start of its lease
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # Of the last attempt: time spent waiting past run_at, and running
+    wait_ms = models.FloatField(blank=True, null=True)
+    duration_ms = models.FloatField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at'], name='core_job_ready_idx')]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+class Conversation(models.Model):
+    """A message thread. ``last_message`` and the participants' unread counts are
+    kept in step by ``core.signals`` so the inbox never scans messages."""
+    subject = models.CharField(max_length=255, blank=True)
+    participants = models.ManyToManyField(Profile, through='ConversationParticipant', related_name='conversations')
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def start(cls, profile_ids, subject=''):
+        conversation = cls.objects.create(subject=subject)
+        ConversationParticipant.objects.bulk_create([
+            ConversationParticipant(conversation=conversation, profile_id=profile_id)
+            for profile_id in set(profile_ids)
+        ])
+        return conversation
+
+    def __str__(self):
+        return self.subject or f"Conversation {self.pk}"
+
+class ConversationParticipant(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='memberships')
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='conversation_memberships')
+    # Copied from the conversation so the inbox is one range scan on (profile, last_message_at)
+    last_message_at = models.DateTimeField(blank=True, null=True)
+    unread_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        unique_together = ('conversation', 'profile')
+        indexes = [models.Index(fields=['profile', '-last_message_at', '-id'], name='core_conv_inbox_idx')]
+
+    @property
+    def correspondent(self):
+        """The other side of a two-person thread, from its last message."""
+        message = self.conversation.last_message
+        if message is None:
+            return None
+        return message.recipient if message.sender_id == self.profile_id else message.sender
+
+    def __str__(self):
+        return f"{self.profile.user.username} in {self.conversation}"
+
+class MessageQuerySet(models.QuerySet):
+    def mark_read(self):
+        """Mark unread messages in this queryset as read, keeping unread counters in step.
+
+        Returns the number of messages that changed.
+        """
+        from .unread import adjust
+
+        total = 0
+        groups = (
+            self.filter(read=False).order_by()
+            .values_list('recipient_id', 'recipient__user_id', 'conversation_id').distinct()
+        )
+        for recipient_id, user_id, conversation_id in list(groups):
+            with transaction.atomic():
+                changed = self.filter(
+                    recipient_id=recipient_id, conversation_id=conversation_id, read=False
+                ).update(read=True)
+                if changed:
+                    adjust(recipient_id, -changed, user_id=user_id, conversation_id=conversation_id)
+            total += changed
+        return total
+
 class Message(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='sent_messages')
     recipient = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='received_messages')
     subject = models.CharField(max_length=255, blank=True)
@@ -141,6 +325,28 @@ class Message(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
 
+    objects = MessageQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['conversation', '-sent_at', '-id'], name='core_msg_thread_idx')]
+
+    def save(self, *args, **kwargs):
+        # A message sent outside a thread starts a new one
+        if self.conversation_id is None:
+            with transaction.atomic():
+                self.conversation = Conversation.start([self.sender_id, self.recipient_id], self.subject)
+                super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored read flag so saves can adjust unread counters
+        if 'read' in field_names:
+            instance._loaded_read = instance.read
+        return instance
+
     def __str__(self):
         return f"{self.sender.user.username} -> {self.recipient.user.username} [{self.subject}]"
 
@@ -152,19 +358,37 @@ class Event(models.Model):
     start = models.DateTimeField()
     end = models.DateTimeField()
     capacity = models.PositiveIntegerField(blank=True, null=True)
+    # Confirmed registrations, kept by core.registrations so a seat is claimed with one UPDATE
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['start', 'id'], name='core_event_start_idx')]
+
+    @property
+    def seats_left(self):
+        return None if self.capacity is None else max(self.capacity - self.seats_taken, 0)
+
     def __str__(self):
         return self.title
 
 class EventParticipant(models.Model):
+    REGISTERED, WAITLISTED = 'registered', 'waitlisted'
+    STATUSES = [
+        (REGISTERED, 'Registered'),
+        (WAITLISTED, 'Waitlisted'),
+    ]
+
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=STATUSES, default=REGISTERED)
     registered_at = models.DateTimeField(auto_now_add=True)
     attended = models.BooleanField(default=False)
 
     class Meta:
         unique_together = ('event', 'profile')
+        # The waitlist, in the order it is promoted
+        indexes = [models.Index(fields=['event', 'status', 'registered_at', 'id'], name='core_event_waitlist_idx')]
 
     def __str__(self):
         return f"{self.profile.user.username} -> {self.event.title}"
@@ -0,0 +1,219 @@
+"""Keyset (cursor) pagination for list views.
+
+A page is addressed by an opaque cursor holding the sort-key values of the
+row next to it, e.g. ``(created_at, id)`` of the last project on the previous
+page. Fetching a page is then a bounded range scan on the ordering index, so
+page N costs the same as page 1 (no OFFSET), and totals come from a count
+capped at ``PAGINATION_COUNT_LIMIT`` rows instead of loading every row.
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.http import QueryDict
+
+AFTER = 'a'
+BEFORE = 'b'
+
+
+class InvalidCursor(Exception):
+    """Raised by fetch functions when cursor values don't fit the ordering."""
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, values], separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(direction, values)`` or ``(None, None)`` for a missing/garbled cursor."""
+    if not token:
+        return None, None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None, None
+    if direction not in (AFTER, BEFORE) or not isinstance(values, list):
+        return None, None
+    # Sort keys are scalars; keyset comparisons cannot use NULL
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        return None, None
+    return direction, values
+
+
+def bounded_count(queryset, limit=None):
+    """Count rows up to ``limit``; returns ``(count, capped)``."""
+    if limit is None:
+        limit = getattr(settings, 'PAGINATION_COUNT_LIMIT', 1000)
+    count = queryset.order_by().values('pk')[:limit + 1].count()
+    return min(count, limit), count > limit
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None,
+                 count=None, count_capped=False, query_params=None, cursor_param='cursor'):
+        if query_params is None:
+            query_params = QueryDict(mutable=True)
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_capped = count_capped
+        self._query_params = query_params
+        self._cursor_param = cursor_param
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def count_label(self):
+        """Human readable total, e.g. ``"42"`` or ``"1000+"``."""
+        if self.count is None:
+            return ''
+        return f"{self.count}+" if self.count_capped else str(self.count)
+
+    def _url(self, cursor):
+        params = self._query_params.copy()
+        params[self._cursor_param] = cursor
+        return '?' + params.urlencode()
+
+    @property
+    def next_url(self):
+        return self._url(self.next_cursor) if self.has_next else None
+
+    @property
+    def previous_url(self):
+        return self._url(self.previous_cursor) if self.has_previous else None
+
+
+def paginate_with(request, fetch, key, per_page=None, cursor_param='cursor'):
+    """Paginate an arbitrary ordered source.
+
+    ``fetch(limit, after=None, before=None)`` must return up to ``limit`` rows
+    strictly after ``after`` in display order, or strictly before ``before``
+    (nearest first, i.e. in reverse display order), and raise InvalidCursor
+    for values it cannot use. ``key(row)`` returns the JSON-serialisable list
+    of sort-key values for a row.
+    """
+    per_page = per_page or getattr(settings, 'PAGINATE_BY', 20)
+    direction, values = decode_cursor(request.GET.get(cursor_param))
+    try:
+        return _page(fetch, key, per_page, direction, values, request, cursor_param)
+    except InvalidCursor:
+        return _page(fetch, key, per_page, None, None, request, cursor_param)
+
+
+def _page(fetch, key, per_page, direction, values, request, cursor_param):
+    if direction == BEFORE:
+        rows = list(fetch(per_page + 1, before=values))
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        previous_cursor = encode_cursor(BEFORE, key(rows[0])) if has_more and rows else None
+        next_cursor = encode_cursor(AFTER, key(rows[-1])) if rows else None
+    else:
+        rows = list(fetch(per_page + 1, after=values if direction == AFTER else None))
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(AFTER, key(rows[-1])) if has_more else None
+        previous_cursor = encode_cursor(BEFORE, key(rows[0])) if direction == AFTER and rows else None
+
+    query_params = request.GET.copy()
+    query_params.pop(cursor_param, None)
+    return CursorPage(rows, next_cursor, previous_cursor,
+                      query_params=query_params, cursor_param=cursor_param)
+
+
+def _parse_ordering(ordering):
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def _decode_values(model, fields, values):
+    """Convert cursor values to the key fields' types; InvalidCursor for any that do not fit."""
+    if len(values) != len(fields):
+        raise InvalidCursor
+    decoded = []
+    for (name, _), value in zip(fields, values):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            decoded.append(value)
+            continue
+        try:
+            value = field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor
+        if value is None:
+            raise InvalidCursor
+        decoded.append(value)
+    return decoded
+
+
+def keyset_filter(ordering, values, before=False):
+    """Build a Q selecting rows strictly after (or before) ``values`` in ``ordering``.
+
+    Expands ``(a, b) > (x, y)`` to ``a >= x AND (a > x OR (a = x AND b > y))``;
+    the redundant leading bound lets the planner use an index range scan.
+    """
+    fields = _parse_ordering(ordering)
+    clauses = []
+    for i, (name, descending) in enumerate(fields):
+        lookup = 'lt' if descending != before else 'gt'
+        clause = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_name, prev_value in zip([f for f, _ in fields[:i]], values[:i]):
+            clause &= Q(**{prev_name: prev_value})
+        clauses.append(clause)
+    first_name, first_desc = fields[0]
+    leading = Q(**{f"{first_name}__{'lte' if first_desc != before else 'gte'}": values[0]})
+    return leading & reduce(or_, clauses)
+
+
+def paginate(request, queryset, ordering, per_page=None, count=True, cursor_param='cursor'):
+    """Keyset-paginate ``queryset`` by ``ordering`` (which must end in a unique field)."""
+    fields = _parse_ordering(ordering)
+    reverse_ordering = [('' if desc else '-') + name for name, desc in fields]
+
+    def fetch(limit, after=None, before=None):
+        if after is not None:
+            values = _decode_values(queryset.model, fields, after)
+            return queryset.filter(keyset_filter(ordering, values)).order_by(*ordering)[:limit]
+        if before is not None:
+            values = _decode_values(queryset.model, fields, before)
+            return queryset.filter(keyset_filter(ordering, values, before=True)).order_by(*reverse_ordering)[:limit]
+        return queryset.order_by(*ordering)[:limit]
+
+    def key(obj):
+        return [_json_value(getattr(obj, name)) for name, _ in fields]
+
+    page = paginate_with(request, fetch, key, per_page=per_page, cursor_param=cursor_param)
+    if count:
+        page.count, page.count_capped = bounded_count(queryset)
+    return page
+
+
+def _json_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
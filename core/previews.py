@@ -0,0 +1,153 @@
+"""Document previews.
+
+Uploaded images and PDFs get small WebP previews, one per size in
+``PREVIEW_SIZES``. They are rendered off the request path: saving a document
+queues a ``previews.render`` job (``core.jobs``), and the preview view only
+ever serves a file that already exists; if it does not, the view queues the
+same job, unless one is already waiting or running for that file, and
+answers with a placeholder.
+
+Previews are cached on disk under ``PREVIEW_ROOT`` and named after the
+source file. With content-addressed uploads (``core.storage``) that name is
+the content hash, so every copy of a file shares its previews and a
+preview never goes stale.
+
+Images are decoded with Pillow (using JPEG draft mode to decode at reduced
+size). The first page of a PDF is rasterised by ``pdftoppm`` from poppler
+when it is installed; without it PDFs keep the generic placeholder.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, UnidentifiedImageError
+
+from . import jobs
+from .models import Job
+from .storage import cas_storage, is_hashed
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.gif'}
+PDF_EXTENSIONS = {'.pdf'}
+
+
+def sizes():
+    return getattr(settings, 'PREVIEW_SIZES', {'small': 240, 'large': 960})
+
+
+def preview_storage():
+    root = getattr(settings, 'PREVIEW_ROOT', None) or os.path.join(settings.MEDIA_ROOT, 'previews')
+    return FileSystemStorage(location=root)
+
+
+def pdf_renderer():
+    return shutil.which('pdftoppm')
+
+
+def supported(source_name):
+    extension = os.path.splitext(source_name or '')[1].lower()
+    return extension in IMAGE_EXTENSIONS or (extension in PDF_EXTENSIONS and pdf_renderer() is not None)
+
+
+def preview_name(source_name, size):
+    """Where the ``size`` preview of ``source_name`` is cached."""
+    if is_hashed(source_name):
+        key = os.path.splitext(os.path.basename(source_name))[0]
+    else:
+        key = hashlib.sha256(source_name.encode()).hexdigest()
+    return f'{key[:2]}/{key}-{size}.webp'
+
+
+def ready(source_name, size):
+    return preview_storage().exists(preview_name(source_name, size))
+
+
+def discard(source_name):
+    """Delete the cached previews of a file that is gone."""
+    storage = preview_storage()
+    for label in sizes():
+        storage.delete(preview_name(source_name, label))
+
+
+# --- Rendering (job worker) -------------------------------------------------------
+
+def _open_source(source_name, width):
+    """Return a Pillow image of the file, or of the first page for PDFs."""
+    storage = cas_storage()
+    extension = os.path.splitext(source_name)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, 'page')
+            subprocess.run(
+                [pdf_renderer(), '-f', '1', '-l', '1', '-singlefile', '-png', '-scale-to', str(width),
+                 storage.path(source_name), out],
+                check=True, capture_output=True, timeout=getattr(settings, 'PREVIEW_RENDER_TIMEOUT', 30),
+            )
+            with Image.open(out + '.png') as page:
+                page.load()
+                return page.copy()
+    with storage.open(source_name) as fh:
+        image = Image.open(fh)
+        # JPEG can decode straight to a fraction of its size
+        image.draft('RGB', (width, width))
+        image.load()
+        return image
+
+
+def render(source_name):
+    """Write every missing preview size for ``source_name``. Returns the names written."""
+    target = preview_storage()
+    missing = {label: width for label, width in sizes().items() if not target.exists(preview_name(source_name, label))}
+    if not missing:
+        return []
+    image = _open_source(source_name, max(missing.values()))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'P') else 'RGB')
+    written = []
+    for label, width in sorted(missing.items(), key=lambda item: -item[1]):
+        image.thumbnail((width, width * 2))
+        name = preview_name(source_name, label)
+        path = target.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a reader never sees a half-written preview
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as tmp:
+            image.save(tmp, 'WEBP', quality=getattr(settings, 'PREVIEW_QUALITY', 80), method=4)
+        os.replace(tmp.name, path)
+        written.append(name)
+    return written
+
+
+# --- Scheduling -------------------------------------------------------------------
+
+def schedule(source_name):
+    """Queue a job rendering the previews; it runs if the current transaction commits."""
+    if supported(source_name):
+        jobs.enqueue('previews.render', {'source_name': source_name})
+
+
+def schedule_once(source_name):
+    """Queue a render for a preview someone asked for, unless one is pending already. Returns True if queued."""
+    if not supported(source_name):
+        return False
+    pending = Job.objects.filter(
+        name='previews.render', status__in=(Job.QUEUED, Job.RUNNING), payload__source_name=source_name
+    )
+    if pending.exists():
+        return False
+    jobs.enqueue('previews.render', {'source_name': source_name})
+    return True
+
+
+@jobs.register('previews.render')
+def render_job(source_name):
+    try:
+        render(source_name)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        # Retrying will not make the file readable
+        logger.warning('Could not render preview for %s', source_name, exc_info=True)
@@ -0,0 +1,146 @@
+"""Event registration with a seat limit and a waitlist.
+
+``Event.seats_taken`` counts confirmed registrations. A seat is claimed with
+a single conditional ``UPDATE ... SET seats_taken = seats_taken + 1 WHERE
+seats_taken < capacity``, so two requests can never take the last seat
+between them; whoever does not get one joins the waitlist, which is served
+in ``registered_at`` order. When a registered participant cancels (or the
+row is deleted any other way, see ``core.signals``) the seat is freed and
+claimed again the same way for the head of the waitlist, who is told by mail
+from a background job; if the capacity was lowered, nobody moves up until the
+event is below it.
+
+Every change first locks the event row: ``SELECT ... FOR UPDATE`` where the
+database has row locks (PostgreSQL), otherwise a no-op ``UPDATE`` that takes
+SQLite's write lock before anything is read. Registrations for one event
+are therefore serialized, and a cancellation cannot free a seat while a
+registration is deciding to waitlist.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils.translation import gettext as _
+
+from . import jobs
+from .models import Event, EventParticipant
+
+
+def lock_event(event_id):
+    """Serialize registration changes for ``event_id`` until the transaction ends."""
+    if connection.features.has_select_for_update:
+        list(Event.objects.select_for_update().filter(pk=event_id).values_list('pk'))
+    else:
+        Event.objects.filter(pk=event_id).update(seats_taken=F('seats_taken'))
+
+
+def _claim_seat(event_id):
+    """Take a free seat; False when the event is full."""
+    return bool(
+        Event.objects.filter(pk=event_id)
+        .filter(Q(capacity__isnull=True) | Q(seats_taken__lt=F('capacity')))
+        .update(seats_taken=F('seats_taken') + 1)
+    )
+
+
+def register(event, profile):
+    """Register ``profile`` for ``event``, or waitlist it when the event is full.
+
+    Returns ``(participant, created)``; registering twice returns the existing row.
+    """
+    with transaction.atomic():
+        lock_event(event.pk)
+        existing = EventParticipant.objects.filter(event=event, profile=profile).first()
+        if existing is not None:
+            return existing, False
+        seated = _claim_seat(event.pk)
+        participant = EventParticipant(
+            event=event, profile=profile,
+            status=EventParticipant.REGISTERED if seated else EventParticipant.WAITLISTED,
+        )
+        # Counted above; core.signals counts registrations created elsewhere (admin)
+        participant._seat_claimed = True
+        participant.save()
+    return participant, True
+
+
+def cancel(event, profile):
+    """Withdraw ``profile`` from ``event``; the seat goes to the waitlist. Returns True if it was there."""
+    with transaction.atomic():
+        lock_event(event.pk)
+        deleted = EventParticipant.objects.filter(event=event, profile=profile).delete()[0]
+    return bool(deleted)
+
+
+def release_seat(event_id):
+    """A registration is gone: free its seat and pass it to the head of the waitlist.
+
+    The seat is given through the same conditional claim as in ``register()``,
+    so nobody is promoted while the event is still full (its capacity was
+    lowered below the number registered). Returns the promoted participant, if any.
+    """
+    lock_event(event_id)
+    Event.objects.filter(pk=event_id).update(seats_taken=Greatest(F('seats_taken') - 1, 0))
+    return _seat_next(event_id)
+
+
+def fill(event_id):
+    """Promote waitlisted participants into free seats (after the capacity grew). Returns how many."""
+    promoted = 0
+    with transaction.atomic():
+        lock_event(event_id)
+        while _seat_next(event_id) is not None:
+            promoted += 1
+    return promoted
+
+
+def waitlist(event_id):
+    return EventParticipant.objects.filter(event_id=event_id, status=EventParticipant.WAITLISTED).order_by(
+        'registered_at', 'id'
+    )
+
+
+def waitlist_position(participant):
+    """1-based place of a waitlisted participant in the queue."""
+    return waitlist(participant.event_id).filter(
+        Q(registered_at__lt=participant.registered_at)
+        | Q(registered_at=participant.registered_at, id__lt=participant.id)
+    ).count() + 1
+
+
+def _seat_next(event_id):
+    """Claim a free seat for the head of the waitlist. Returns the promoted participant, or None."""
+    participant = waitlist(event_id).select_related('event', 'profile__user').first()
+    if participant is None or not _claim_seat(event_id):
+        return None
+    EventParticipant.objects.filter(pk=participant.pk).update(status=EventParticipant.REGISTERED)
+    participant.status = EventParticipant.REGISTERED
+    _notify_promoted(participant)
+    return participant
+
+
+def _notify_promoted(participant):
+    email = participant.profile.contact_email or participant.profile.user.email
+    if not email:
+        return
+    jobs.enqueue('send_mail', {
+        'subject': _('You have a seat at %(event)s') % {'event': participant.event.title},
+        'body': _(
+            'A seat opened up and you have been moved from the waitlist to the participants of '
+            '%(event)s, starting %(start)s.'
+        ) % {'event': participant.event.title, 'start': participant.event.start.strftime('%Y-%m-%d %H:%M')},
+        'from_email': settings.DEFAULT_FROM_EMAIL,
+        'to': [email],
+    })
+
+
+def recount(event_ids=None):
+    """Recompute ``seats_taken`` from the rows (repair). Returns the number of events changed."""
+    events = Event.objects.all() if event_ids is None else Event.objects.filter(pk__in=event_ids)
+    changed = 0
+    for event in events.only('pk', 'seats_taken'):
+        taken = EventParticipant.objects.filter(event_id=event.pk, status=EventParticipant.REGISTERED).count()
+        if taken != event.seats_taken:
+            Event.objects.filter(pk=event.pk).update(seats_taken=taken)
+            changed += 1
+    return changed
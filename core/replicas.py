@@ -0,0 +1,158 @@
+"""Read replica routing.
+
+When ``DATABASE_REPLICA_URL`` is set, the ``replica`` database alias serves
+the reads of views marked ``@replica_reads`` (the read-heavy listing pages)
+so they do not compete with writes on the primary. Everything else, and
+every write, uses ``default``.
+
+A replica lags behind the primary, so a user who just wrote something must
+not be sent to it: any unsafe request (POST, ...), and any request that
+wrote through the ORM, sets a short-lived cookie that pins that browser to
+the primary for ``REPLICA_PIN_SECONDS``. Within a request, the first write
+switches the remaining reads to the primary as well, and reads inside a
+transaction on the primary stay there.
+
+Sessions and the database cache are always read from the primary. Code
+running outside a request (commands, the job worker, tests) is not routed
+at all.
+
+Locally, point ``DATABASE_URL`` and ``DATABASE_REPLICA_URL`` at two SQLite
+files and run ``manage.py sync_sqlite_replica --every 2`` to copy the
+primary into the replica with a lag. ``REPLICA_READS=False`` turns routing
+off while keeping the alias.
+"""
+import contextvars
+import sqlite3
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Never served from the replica, and writing them does not pin the user
+PRIMARY_APPS = {'sessions', 'django_cache'}
+
+
+class _RequestState:
+    __slots__ = ('reads', 'wrote')
+
+    def __init__(self):
+        self.reads = False
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('replica_state', default=None)
+
+
+def configured():
+    return REPLICA_ALIAS in settings.DATABASES and getattr(settings, 'REPLICA_READS', True)
+
+
+def replica_reads(view):
+    """Let the reads of this view go to the replica (for GET requests of users not pinned to the primary)."""
+    view.replica_reads = True
+    return view
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+def pinned(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None:
+            return None
+        if (
+            not state.reads
+            or model._meta.app_label in PRIMARY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            # Explicit, or reads through an instance loaded from the replica would follow it there
+            return DEFAULT_DB_ALIAS
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_APPS:
+            state.reads = False
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db != REPLICA_ALIAS
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # Under ASGI, async views (the live inbox stream) run without a thread hop
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # A coroutine process_view is awaited by the async handler instead of run in a thread
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = _RequestState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(request, response, state)
+
+    async def __acall__(self, request):
+        state = _RequestState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(request, response, state)
+
+    def pin(self, request, response, state):
+        """Keep a user who just wrote on the primary for ``REPLICA_PIN_SECONDS``."""
+        if state.wrote or request.method not in SAFE_METHODS:
+            seconds = pin_seconds()
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time()) + seconds), max_age=seconds,
+                httponly=True, samesite='Lax', secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS and getattr(view_func, 'replica_reads', False) and not pinned(request):
+            _state.get().reads = True
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        ReplicaMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+
+def copy_sqlite(source, target):
+    """Copy the SQLite database ``source`` into ``target`` (a consistent snapshot, for local replicas)."""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
@@ -0,0 +1,254 @@
+"""Full-text search over projects.
+
+The index lives in a side table, ``core_project_fts``, keyed by project id:
+
+* SQLite: an FTS5 virtual table (title, keywords, description) ranked with bm25.
+* PostgreSQL: a weighted ``tsvector`` column with a GIN index, ranked with
+  ``ts_rank_cd``.
+
+Both backends return ``(project_id, score)`` pairs where a *lower* score is a
+better match, so callers can order and page through results the same way.
+The table is created by migration 0003 and kept in sync by ``core.signals``.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+
+FTS_TABLE = 'core_project_fts'
+
+# Relative weights for (title, keywords, description)
+FIELD_WEIGHTS = (10.0, 5.0, 1.0)
+
+MAX_TERMS = 8
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a user query into safe search terms (no operators, no quotes)."""
+    return _TOKEN_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+def icontains_filter(query):
+    """Legacy substring filter, used when no full-text backend is available."""
+    return (
+        Q(title__icontains=query) |
+        Q(description__icontains=query) |
+        Q(keywords__label__icontains=query)
+    )
+
+
+class SQLiteBackend:
+    vendor = 'sqlite'
+
+    def upsert(self, cursor, rows):
+        ids = [row[0] for row in rows]
+        self.delete(cursor, ids)
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, keywords, description) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+    def delete(self, cursor, ids):
+        for chunk in _chunks(ids, 500):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk)
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search_sql(self, terms):
+        # Every term is a quoted prefix query; FTS5 ANDs them implicitly.
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(w) for w in FIELD_WEIGHTS)
+        sql = (
+            f"SELECT rowid AS project_id, bm25({FTS_TABLE}, {weights}) AS score "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        )
+        return sql, [match]
+
+
+class PostgresBackend:
+    vendor = 'postgresql'
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (project_id, document) VALUES ("
+            "%s, "
+            "setweight(to_tsvector('simple', %s), 'A') || "
+            "setweight(to_tsvector('simple', %s), 'B') || "
+            "setweight(to_tsvector('simple', %s), 'C')"
+            ") ON CONFLICT (project_id) DO UPDATE SET document = EXCLUDED.document",
+            rows,
+        )
+
+    def delete(self, cursor, ids):
+        if ids:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE project_id = ANY(%s)", [list(ids)])
+
+    def clear(self, cursor):
+        cursor.execute(f"TRUNCATE {FTS_TABLE}")
+
+    def search_sql(self, terms):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        # ts_rank_cd weights are ordered {D, C, B, A}
+        weights = '{0.0, %s, %s, %s}' % tuple(w / FIELD_WEIGHTS[0] for w in reversed(FIELD_WEIGHTS))
+        sql = (
+            f"SELECT project_id, -ts_rank_cd('{weights}'::float4[], document, query) AS score "
+            f"FROM {FTS_TABLE}, to_tsquery('simple', %s) query WHERE document @@ query"
+        )
+        return sql, [tsquery]
+
+
+_BACKENDS = {
+    'sqlite': SQLiteBackend(),
+    'postgresql': PostgresBackend(),
+}
+
+_available = {}
+
+
+def _read_connection():
+    # The raw SQL goes where the router sends project reads (the replica in @replica_reads views)
+    from .models import Project
+
+    return connections[router.db_for_read(Project)]
+
+
+def _write_connection():
+    from .models import Project
+
+    return connections[router.db_for_write(Project)]
+
+
+def get_backend(connection=None):
+    """Return the search backend for ``connection`` (default: the read one), or None if the index is missing."""
+    connection = connection or _read_connection()
+    backend = _BACKENDS.get(connection.vendor)
+    if backend is None:
+        return None
+    if connection.alias not in _available:
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        _available[connection.alias] = FTS_TABLE in tables
+    return backend if _available[connection.alias] else None
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _documents(project_ids, using):
+    """Yield ``(id, title, keywords, description)`` rows for the given projects."""
+    from .models import Project
+
+    labels = {}
+    through = Project.keywords.through.objects.using(using).filter(project_id__in=project_ids)
+    for project_id, label in through.values_list('project_id', 'keyword__label'):
+        labels.setdefault(project_id, []).append(label)
+    projects = Project.objects.using(using).filter(pk__in=project_ids)
+    for pk, title, description in projects.values_list('pk', 'title', 'description'):
+        yield (pk, title, ' '.join(labels.get(pk, ())), description)
+
+
+def index_projects(project_ids, using=None):
+    """(Re)index the given projects; ids that no longer exist are dropped.
+
+    ``using`` is a database alias; by default the router's choice for writes.
+    """
+    connection = connections[using] if using else _write_connection()
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    project_ids = list(project_ids)
+    with connection.cursor() as cursor:
+        for chunk in _chunks(project_ids, 500):
+            rows = list(_documents(chunk, connection.alias))
+            missing = set(chunk) - {row[0] for row in rows}
+            if rows:
+                backend.upsert(cursor, rows)
+            if missing:
+                backend.delete(cursor, missing)
+
+
+def remove_projects(project_ids):
+    connection = _write_connection()
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, list(project_ids))
+
+
+def rebuild(batch_size=2000, using=None):
+    """Rebuild the whole index from the Project table. Returns the number of rows indexed."""
+    from .models import Project
+
+    connection = connections[using] if using else _write_connection()
+    backend = get_backend(connection)
+    if backend is None:
+        return 0
+    with connection.cursor() as cursor:
+        backend.clear(cursor)
+    total = 0
+    ids = Project.objects.using(connection.alias).order_by('pk').values_list('pk', flat=True)
+    for chunk in _chunks(ids, batch_size):
+        index_projects(chunk, using=connection.alias)
+        total += len(chunk)
+    return total
+
+
+def search_projects(query, limit=None, after=None, before=None):
+    """Return ranked ``[(project_id, score), ...]`` for ``query``, best match first.
+
+    ``after`` / ``before`` are optional ``(score, project_id)`` pairs; only
+    results ranked strictly after (or before, nearest first) are returned,
+    which lets callers page through results. Returns None when no full-text
+    backend is available for the database.
+    """
+    connection = _read_connection()
+    backend = get_backend(connection)
+    if backend is None:
+        return None
+    terms = tokenize(query)
+    if not terms:
+        return []
+    if limit is None:
+        limit = getattr(settings, 'SEARCH_RESULTS_LIMIT', 200)
+
+    inner_sql, params = backend.search_sql(terms)
+    sql = f"SELECT project_id, score FROM ({inner_sql}) hits"
+    if after is not None:
+        score, pk = after
+        sql += " WHERE score > %s OR (score = %s AND project_id > %s) ORDER BY score, project_id"
+        params += [score, score, pk]
+    elif before is not None:
+        score, pk = before
+        sql += " WHERE score < %s OR (score = %s AND project_id < %s) ORDER BY score DESC, project_id DESC"
+        params += [score, score, pk]
+    else:
+        sql += " ORDER BY score, project_id"
+    sql += " LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(int(pk), float(score)) for pk, score in cursor.fetchall()]
+
+
+def count_projects(query, limit):
+    """Count matches for ``query`` up to ``limit``; None without a backend."""
+    connection = _read_connection()
+    backend = get_backend(connection)
+    if backend is None:
+        return None
+    terms = tokenize(query)
+    if not terms:
+        return 0
+    inner_sql, params = backend.search_sql(terms)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM ({inner_sql} LIMIT %s) hits", params + [limit])
+        return cursor.fetchone()[0]
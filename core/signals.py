@@ -0,0 +1,282 @@
+from django.db.models import Case, F, QuerySet, When
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import blobs, fragments, previews, registrations, search, suggestions, unread
+from .models import Conversation, ConversationParticipant, Document, Event, EventParticipant, Keyword, Message, Profile, Project, ProjectParticipant
+
+
+# --- Search index sync -------------------------------------------------------
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_projects([instance.pk])
+
+
+@receiver(post_delete, sender=Project)
+def unindex_project(sender, instance, **kwargs):
+    search.remove_projects([instance.pk])
+
+
+@receiver(m2m_changed, sender=Project.keywords.through)
+def reindex_project_keywords(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            search.index_projects([instance.pk])
+        return
+    # keyword.project_set.add(...) etc.: instance is a Keyword
+    if action == 'pre_clear':
+        instance._project_ids = list(instance.project_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        search.index_projects(pk_set)
+    elif action == 'post_clear':
+        search.index_projects(getattr(instance, '_project_ids', ()))
+
+
+@receiver(post_save, sender=Keyword)
+def reindex_keyword_projects(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    search.index_projects(instance.project_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Keyword)
+def remember_keyword_projects(sender, instance, **kwargs):
+    instance._project_ids = list(instance.project_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Keyword)
+def reindex_deleted_keyword_projects(sender, instance, **kwargs):
+    search.index_projects(getattr(instance, '_project_ids', ()))
+
+
+# --- Project versioning ------------------------------------------------------
+# Cached cards and the detail page's ETag/Last-Modified are derived from
+# updated_at, which keyword and participant changes don't touch by themselves.
+
+@receiver(m2m_changed, sender=Project.keywords.through)
+def touch_project_cards(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        fragments.touch_projects([instance.pk])
+    elif action == 'post_clear':
+        fragments.touch_projects(getattr(instance, '_project_ids', ()))  # stashed on pre_clear above
+    else:
+        fragments.touch_projects(pk_set)
+
+
+@receiver(post_save, sender=Keyword)
+def touch_keyword_project_cards(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    fragments.touch_projects(instance.project_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Keyword)
+def touch_deleted_keyword_project_cards(sender, instance, **kwargs):
+    fragments.touch_projects(getattr(instance, '_project_ids', ()))
+
+
+# Pages show a project's accepted members only. Applying or withdrawing changes
+# nothing there, so it does not write to the (possibly busy) project row;
+# edits of existing rows (admin) may flip ``accepted`` and always count.
+@receiver(post_save, sender=ProjectParticipant)
+def touch_participant_project(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and not instance.accepted):
+        return
+    fragments.touch_projects([instance.project_id])
+
+
+@receiver(post_delete, sender=ProjectParticipant)
+def touch_member_project(sender, instance, origin=None, **kwargs):
+    if not instance.accepted:
+        return
+    if isinstance(origin, QuerySet):
+        # A bulk delete sends one signal per row; touch each project once
+        touched = origin.__dict__.setdefault('_touched_project_ids', set())
+        if instance.project_id in touched:
+            return
+        touched.add(instance.project_id)
+    fragments.touch_projects([instance.project_id])
+
+
+# --- Suggestions (precomputed top-K per profile) -----------------------------
+
+@receiver(post_save, sender=Profile)
+def refresh_profile_suggestions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    suggestions.refresh_profile(instance.pk)
+
+
+@receiver(m2m_changed, sender=Profile.keywords.through)
+def refresh_profile_keyword_suggestions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        suggestions.refresh_profile(instance.pk)
+    elif pk_set:
+        for profile_id in pk_set:
+            suggestions.refresh_profile(profile_id)
+
+
+@receiver(post_save, sender=Project)
+def refresh_project_suggestions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    suggestions.refresh_project(instance.pk)
+
+
+@receiver(m2m_changed, sender=Project.keywords.through)
+def refresh_project_keyword_suggestions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        suggestions.refresh_project(instance.pk)
+    elif pk_set:
+        for project_id in pk_set:
+            suggestions.refresh_project(project_id)
+
+
+@receiver(pre_delete, sender=Project)
+def remember_suggestion_holders(sender, instance, **kwargs):
+    instance._suggestion_holders = list(instance.suggestions.values_list('profile_id', flat=True))
+
+
+@receiver(post_delete, sender=Project)
+def refill_suggestion_holders(sender, instance, **kwargs):
+    for profile_id in getattr(instance, '_suggestion_holders', ()):
+        suggestions.refresh_profile(profile_id)
+
+
+# --- Unread message counters -------------------------------------------------
+
+def _recipient_user_id(message):
+    # Avoid a query when the recipient profile is already loaded
+    if Message.recipient.is_cached(message):
+        return message.recipient.user_id
+    return None
+
+
+@receiver(post_save, sender=Message)
+def count_unread_message(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_read = True if created else getattr(instance, '_loaded_read', None)
+    if was_read is not None and was_read != instance.read:
+        unread.adjust(
+            instance.recipient_id, -1 if instance.read else 1,
+            user_id=_recipient_user_id(instance),
+            # New messages are counted per thread by advance_conversation()
+            conversation_id=None if created else instance.conversation_id,
+        )
+    instance._loaded_read = instance.read
+
+
+@receiver(post_delete, sender=Message)
+def uncount_deleted_message(sender, instance, **kwargs):
+    if not instance.read:
+        unread.adjust(
+            instance.recipient_id, -1,
+            user_id=_recipient_user_id(instance), conversation_id=instance.conversation_id,
+        )
+
+
+# --- Conversation last-message pointers ----------------------------------------
+
+def _point_to_last_message(conversation_id, message_id, sent_at, **participant_updates):
+    Conversation.objects.filter(pk=conversation_id).update(last_message_id=message_id)
+    ConversationParticipant.objects.filter(conversation_id=conversation_id).update(
+        last_message_at=sent_at, **participant_updates
+    )
+
+
+@receiver(post_save, sender=Message)
+def advance_conversation(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    updates = {}
+    if not instance.read:
+        updates['unread_count'] = F('unread_count') + Case(When(profile_id=instance.recipient_id, then=1), default=0)
+    _point_to_last_message(instance.conversation_id, instance.pk, instance.sent_at, **updates)
+
+
+@receiver(post_delete, sender=Message)
+def rewind_conversation(sender, instance, **kwargs):
+    # The pointer was cleared by SET_NULL only if this was the last message
+    if not Conversation.objects.filter(pk=instance.conversation_id, last_message_id__isnull=True).exists():
+        return
+    previous = (
+        Message.objects.filter(conversation_id=instance.conversation_id)
+        .order_by('-sent_at', '-id').values_list('pk', 'sent_at').first()
+    )
+    _point_to_last_message(instance.conversation_id, *(previous or (None, None)))
+
+
+# --- Stored file reference counts ------------------------------------------------
+
+def _move_reference(instance, field, loaded_attr):
+    """Move the file reference if ``field`` changed; returns True when it did."""
+    if field in instance.get_deferred_fields():
+        return False
+    name = getattr(instance, field).name or ''
+    previous = getattr(instance, loaded_attr, '') or ''
+    setattr(instance, loaded_attr, name)
+    if name == previous:
+        return False
+    if not blobs.take_counted(name):
+        blobs.acquire(name)
+    blobs.release(previous)
+    return True
+
+
+@receiver(post_save, sender=Document)
+def count_document_file(sender, instance, raw=False, **kwargs):
+    if not raw and _move_reference(instance, 'file', '_loaded_file'):
+        previews.schedule(instance.file.name)
+
+
+@receiver(post_save, sender=Profile)
+def count_profile_cv(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _move_reference(instance, 'cv', '_loaded_cv')
+
+
+@receiver(post_delete, sender=Document)
+def release_document_file(sender, instance, **kwargs):
+    blobs.release(instance.file.name)
+
+
+@receiver(post_delete, sender=Profile)
+def release_profile_cv(sender, instance, **kwargs):
+    blobs.release(instance.cv.name)
+
+
+# --- Event seats (see core.registrations) -----------------------------------------
+
+@receiver(post_save, sender=EventParticipant)
+def count_event_seat(sender, instance, created, raw=False, **kwargs):
+    # core.registrations.register() claims its seat itself, before the insert
+    if created and not raw and instance.status == EventParticipant.REGISTERED and not getattr(instance, '_seat_claimed', False):
+        Event.objects.filter(pk=instance.event_id).update(seats_taken=F('seats_taken') + 1)
+
+
+@receiver(post_delete, sender=EventParticipant)
+def release_event_seat(sender, instance, origin=None, **kwargs):
+    # Nothing to hand over when the event itself is being deleted
+    if isinstance(origin, Event) or (isinstance(origin, QuerySet) and origin.model is Event):
+        return
+    if instance.status == EventParticipant.REGISTERED:
+        registrations.release_seat(instance.event_id)
+
+
+@receiver(post_save, sender=Event)
+def fill_event_seats(sender, instance, created, raw=False, **kwargs):
+    # A full save writes back the seat count loaded with the instance; recount it,
+    # then let the waitlist into any seats a raised capacity added
+    if not created and not raw:
+        registrations.recount([instance.pk])
+        registrations.fill(instance.pk)
@@ -0,0 +1,74 @@
+"""Dashboard statistics.
+
+Site-wide counters change slowly and are the same for everyone, so they are
+computed at most once per ``DASHBOARD_STATS_TIMEOUT`` seconds and shared
+through the cache. Per-user counters are collapsed into a single query of
+correlated COUNT subqueries, each served by a foreign-key index.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Document, Message, Profile, Project
+
+GLOBAL_STATS_KEY = 'dashboard:global-stats'
+
+RECENT_PROJECTS = 5
+
+
+def compute_global_stats():
+    stats = Project.objects.aggregate(
+        total_projects=Count('pk'),
+        open_projects=Count('pk', filter=Q(status='open')),
+    )
+    stats['total_users'] = Profile.objects.count()
+    stats['recent_projects'] = list(
+        Project.objects
+        .only('id', 'title', 'description', 'project_type', 'specialization_needed', 'status', 'created_at')
+        .order_by('-created_at', '-id')[:RECENT_PROJECTS]
+    )
+    return stats
+
+
+def refresh_global_stats():
+    stats = compute_global_stats()
+    cache.set(GLOBAL_STATS_KEY, stats, getattr(settings, 'DASHBOARD_STATS_TIMEOUT', 300))
+    return stats
+
+
+def global_stats():
+    """Site-wide counters and recent projects, served from the shared cache."""
+    stats = cache.get(GLOBAL_STATS_KEY)
+    if stats is None:
+        stats = refresh_global_stats()
+    return stats
+
+
+def count_of(model, field):
+    """Correlated COUNT of ``model`` rows whose ``field`` points at the outer row."""
+    rows = (
+        model.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def user_stats(profile):
+    """Per-profile counters in one query."""
+    return (
+        Profile.objects
+        .filter(pk=profile.pk)
+        .annotate(
+            projects_posted=count_of(Project, 'posted_by'),
+            messages_sent=count_of(Message, 'sender'),
+            messages_received=count_of(Message, 'recipient'),
+            documents_uploaded=count_of(Document, 'owner'),
+        )
+        .values('projects_posted', 'messages_sent', 'messages_received', 'documents_uploaded')
+        .get()
+    )
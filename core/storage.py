@@ -0,0 +1,77 @@
+"""Content-addressed file storage for uploads.
+
+``ContentAddressedStorage`` names every file after the SHA-256 of its
+content (``cas/ab/cd/abcd....pdf``). The hash is computed from the upload's
+``chunks()``, so a large upload is read from its temporary file in pieces and
+never held in memory; when a file with that name already exists nothing is
+written, and the new row simply points at the existing file. The directory
+from ``upload_to`` is ignored so that documents and CVs share one namespace.
+
+Files are shared between rows, so they must not be deleted with a row;
+``core.blobs`` counts the references and removes a file when its last
+reference goes. ``save()`` takes the new row's reference itself, before it
+looks for an existing file: otherwise a concurrent prune could delete that
+file between the check and the row's insert.
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+PREFIX = 'cas'
+CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(content, chunk_size=CHUNK_SIZE):
+    """Return ``(sha256 hex digest, size)`` of a Django ``File``, read in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in content.chunks(chunk_size):
+        digest.update(chunk)
+        size += len(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest(), size
+
+
+def hashed_name(digest, original_name=''):
+    extension = os.path.splitext(original_name or '')[1].lower()
+    return f'{PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_hashed(name):
+    return bool(name) and name.startswith(PREFIX + '/')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest, size = content_hash(content)
+        name = hashed_name(digest, name)
+        from . import blobs  # core.blobs imports the models, which import this module
+
+        with transaction.atomic(savepoint=False):
+            # Waits for a prune of this name in progress; once counted, the file is kept
+            blobs.acquire(name, size=size)
+            if not self.exists(name):
+                name = self._save(name, content)
+        blobs.mark_counted(name)
+        return name
+
+
+_storage = None
+
+
+def cas_storage():
+    """Storage for ``FileField(storage=...)``; a callable so migrations don't pin it."""
+    global _storage
+    if _storage is None:
+        _storage = ContentAddressedStorage()
+    return _storage
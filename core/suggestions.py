@@ -0,0 +1,231 @@
+"""Project suggestions for profiles.
+
+Every profile keeps a precomputed top-K list of open projects in
+``ProjectSuggestion``. A match is scored on keyword overlap (Dice
+coefficient) plus a bonus when the project's ``specialization_needed``
+matches the profile's ``specialization``. Keyword sets are encoded as integer
+bitmasks (one bit per keyword id), so an overlap is a single AND + popcount.
+
+The lists are maintained incrementally by ``core.signals``:
+
+* a profile change re-scores that profile against candidate projects;
+* a project change re-scores that project against candidate profiles and
+  merges it into their existing lists.
+
+Candidates are only rows sharing a keyword or the specialization, so neither
+path scans the full profiles x projects product. Reading suggestions is a
+single query on the ``(profile, -score)`` index.
+"""
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Profile, Project, ProjectParticipant, ProjectSuggestion
+
+KEYWORD_WEIGHT = 1.0
+SPECIALIZATION_WEIGHT = 0.5
+
+# 'other' is the default specialization; matching on it says nothing
+NEUTRAL_SPECIALIZATION = 'other'
+
+
+def top_k():
+    return getattr(settings, 'SUGGESTIONS_TOP_K', 20)
+
+
+class Vector:
+    __slots__ = ('keyword_ids', 'mask', 'size', 'specialization')
+
+    def __init__(self, keyword_ids, specialization):
+        self.keyword_ids = tuple(set(keyword_ids))
+        mask = 0
+        for keyword_id in self.keyword_ids:
+            mask |= 1 << keyword_id
+        self.mask = mask
+        self.size = mask.bit_count()
+        self.specialization = specialization
+
+
+def score(profile_vec, project_vec):
+    total = 0.0
+    if profile_vec.size and project_vec.size:
+        shared = (profile_vec.mask & project_vec.mask).bit_count()
+        total += KEYWORD_WEIGHT * 2 * shared / (profile_vec.size + project_vec.size)
+    if (profile_vec.specialization == project_vec.specialization
+            and profile_vec.specialization != NEUTRAL_SPECIALIZATION):
+        total += SPECIALIZATION_WEIGHT
+    return total
+
+
+def _chunks(items, size=500):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _matching(keyword_ids, specialization, keyword_lookup, specialization_field):
+    q = Q(**{f'{keyword_lookup}__in': keyword_ids}) if keyword_ids else Q(pk__in=[])
+    if specialization != NEUTRAL_SPECIALIZATION:
+        q |= Q(**{specialization_field: specialization})
+    return q
+
+
+def _project_vectors(queryset):
+    """Return ``{project_id: (Vector, posted_by_id)}`` for ``queryset``."""
+    keywords = defaultdict(list)
+    through = Project.keywords.through.objects.filter(project__in=queryset.values('pk'))
+    for project_id, keyword_id in through.values_list('project_id', 'keyword_id'):
+        keywords[project_id].append(keyword_id)
+    return {
+        pk: (Vector(keywords[pk], specialization), posted_by_id)
+        for pk, specialization, posted_by_id in queryset.values_list('pk', 'specialization_needed', 'posted_by_id')
+    }
+
+
+def _profile_vectors(queryset):
+    """Return ``{profile_id: Vector}`` for ``queryset``."""
+    keywords = defaultdict(list)
+    through = Profile.keywords.through.objects.filter(profile__in=queryset.values('pk'))
+    for profile_id, keyword_id in through.values_list('profile_id', 'keyword_id'):
+        keywords[profile_id].append(keyword_id)
+    return {
+        pk: Vector(keywords[pk], specialization)
+        for pk, specialization in queryset.values_list('pk', 'specialization')
+    }
+
+
+def refresh_profile(profile_id):
+    """Recompute the full top-K list of one profile."""
+    vectors = _profile_vectors(Profile.objects.filter(pk=profile_id))
+    if profile_id not in vectors:
+        return
+    vec = vectors[profile_id]
+    candidates = (
+        Project.objects
+        .filter(status='open')
+        .filter(_matching(vec.keyword_ids, vec.specialization, 'keywords', 'specialization_needed'))
+        .exclude(posted_by_id=profile_id)
+        .distinct()
+    )
+    scored = (
+        (score(vec, project_vec), project_id)
+        for project_id, (project_vec, _) in _project_vectors(candidates).items()
+    )
+    best = heapq.nlargest(top_k(), (item for item in scored if item[0] > 0))
+    with transaction.atomic():
+        ProjectSuggestion.objects.filter(profile_id=profile_id).delete()
+        ProjectSuggestion.objects.bulk_create([
+            ProjectSuggestion(profile_id=profile_id, project_id=project_id, score=value)
+            for value, project_id in best
+        ])
+
+
+def refresh_project(project_id):
+    """Merge one project's (new) scores into every affected profile's list."""
+    k = top_k()
+    holders = set(ProjectSuggestion.objects.filter(project_id=project_id).values_list('profile_id', flat=True))
+    projects = _project_vectors(Project.objects.filter(pk=project_id, status='open'))
+    if project_id not in projects:
+        # Closed or deleted: drop it everywhere and let the holders refill.
+        ProjectSuggestion.objects.filter(project_id=project_id).delete()
+        for profile_id in holders:
+            refresh_profile(profile_id)
+        return
+
+    vec, posted_by_id = projects[project_id]
+    candidates = (
+        Profile.objects
+        .filter(_matching(vec.keyword_ids, vec.specialization, 'keywords', 'specialization'))
+        .exclude(pk=posted_by_id)
+        .distinct()
+    )
+    scores = {}
+    for profile_id, profile_vec in _profile_vectors(candidates).items():
+        value = score(profile_vec, vec)
+        if value > 0:
+            scores[profile_id] = value
+
+    lists = defaultdict(list)
+    for chunk in _chunks(set(scores) | holders):
+        rows = ProjectSuggestion.objects.filter(profile_id__in=chunk).values_list('pk', 'profile_id', 'project_id', 'score')
+        for pk, profile_id, other_project_id, value in rows:
+            lists[profile_id].append((value, other_project_id, pk))
+
+    to_create, to_update, to_delete, to_refill = [], [], [], []
+    for profile_id in set(scores) | holders:
+        entries = lists[profile_id]
+        current = next((e for e in entries if e[1] == project_id), None)
+        new_score = scores.get(profile_id)
+        if current is not None:
+            if new_score is None:
+                to_delete.append(current[2])
+                if len(entries) >= k:
+                    to_refill.append(profile_id)
+            elif new_score != current[0]:
+                if new_score < current[0] and len(entries) >= k:
+                    to_refill.append(profile_id)
+                else:
+                    to_update.append(ProjectSuggestion(pk=current[2], score=new_score))
+        elif len(entries) < k:
+            to_create.append(ProjectSuggestion(profile_id=profile_id, project_id=project_id, score=new_score))
+        else:
+            worst = min(entries)
+            if new_score > worst[0]:
+                to_delete.append(worst[2])
+                to_create.append(ProjectSuggestion(profile_id=profile_id, project_id=project_id, score=new_score))
+
+    with transaction.atomic():
+        for chunk in _chunks(to_delete):
+            ProjectSuggestion.objects.filter(pk__in=chunk).delete()
+        ProjectSuggestion.objects.bulk_update(to_update, ['score'], batch_size=500)
+        ProjectSuggestion.objects.bulk_create(to_create, batch_size=500)
+    for profile_id in to_refill:
+        refresh_profile(profile_id)
+
+
+def rebuild(batch_size=500):
+    """Recompute every profile's list. Returns the number of profiles processed."""
+    k = top_k()
+    projects = _project_vectors(Project.objects.filter(status='open'))
+    profile_ids = list(Profile.objects.order_by('pk').values_list('pk', flat=True))
+    for chunk in _chunks(profile_ids, batch_size):
+        vectors = _profile_vectors(Profile.objects.filter(pk__in=chunk))
+        rows = []
+        for profile_id, vec in vectors.items():
+            scored = (
+                (score(vec, project_vec), project_id)
+                for project_id, (project_vec, posted_by_id) in projects.items()
+                if posted_by_id != profile_id
+            )
+            rows.extend(
+                ProjectSuggestion(profile_id=profile_id, project_id=project_id, score=value)
+                for value, project_id in heapq.nlargest(k, (item for item in scored if item[0] > 0))
+            )
+        with transaction.atomic():
+            ProjectSuggestion.objects.filter(profile_id__in=chunk).delete()
+            ProjectSuggestion.objects.bulk_create(rows, batch_size=1000)
+    return len(profile_ids)
+
+
+def suggestions_for(profile, limit=None):
+    """Return the profile's suggested projects, best first, with ``match_score`` set."""
+    rows = (
+        ProjectSuggestion.objects
+        .filter(profile=profile)
+        .select_related('project__posted_by__user')
+        .prefetch_related('project__keywords')
+        .annotate(user_has_applied=Exists(
+            ProjectParticipant.objects.filter(project=OuterRef('project'), profile=profile)
+        ))
+        .order_by('-score', 'project_id')[:limit or top_k()]
+    )
+    projects = []
+    for row in rows:
+        project = row.project
+        project.match_score = row.score
+        project.user_has_applied = row.user_has_applied
+        projects.append(project)
+    return projects
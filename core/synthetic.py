@@ -0,0 +1,373 @@
+"""Deterministic synthetic data for load testing (``manage.py seed --scale N``).
+
+Every row is drawn from one ``random.Random(seed)`` in a fixed order and
+timestamped relative to ``EPOCH``, so the same seed and counts always produce
+the same data. Rows are written with ``bulk_create`` in batches, which skips
+``save()`` and the signals in ``core.signals``; the generator therefore sets
+the denormalised columns itself (unread counters, a conversation's last
+message, its participants' ``last_message_at``) and rebuilds the search index
+at the end. Project suggestions are derived from the generated profiles and
+projects and are only rebuilt on request, as they cost profiles x projects.
+"""
+import datetime
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from . import search, suggestions
+from .models import (
+    INSTITUTIONS, SPECIALIZATIONS, CompanySubscription, Conversation, ConversationParticipant, Document,
+    Event, EventParticipant, Keyword, Message, Organization, Profile, Project, ProjectParticipant,
+    SubscriptionPlan,
+)
+
+EPOCH = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+HISTORY_DAYS = 730
+
+# Rows per unit of --scale; --scale 100 is 10k profiles, 20k projects and 1M messages
+PER_SCALE = {'profiles': 100, 'projects': 200, 'messages': 10_000, 'events': 20}
+
+VOCABULARY = (
+    "sensor network deep learning imaging diagnosis energy grid solar water irrigation "
+    "robot drone vision language model security cloud embedded firmware satellite "
+    "battery hydrogen climate soil crop genome protein vaccine clinic hospital "
+    "education platform mobile blockchain logistics supply chain bridge concrete "
+    "turbine aerodynamics composite material sustainable recycling waste smart city"
+).split()
+
+USER_TYPES = [('student', 50), ('researcher', 25), ('company', 10), ('university', 5), ('association', 5), ('medical', 5)]
+POSTER_TYPES = {'researcher', 'company', 'university', 'association', 'medical'}
+PROJECT_STATUSES = [('open', 60), ('in_progress', 20), ('completed', 15), ('cancelled', 5)]
+PLANS = [('Basic', Decimal('0.00')), ('Pro', Decimal('490.00')), ('Enterprise', Decimal('1990.00'))]
+SUBJECTS = ["Question about {}", "Application: {}", "Meeting about {}", "Follow-up on {}", "{} dataset", ""]
+
+
+def counts(scale=1, **overrides):
+    """Row counts for ``scale``; any non-None keyword in ``overrides`` wins."""
+    result = {name: int(per * scale) for name, per in PER_SCALE.items()}
+    result.update({name: value for name, value in overrides.items() if value is not None})
+    return result
+
+
+def username_prefix(seed):
+    return f'load{seed}-'
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the values set on ``auto_now``/``auto_now_add`` fields."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Generator:
+    """Write ``counts()``-shaped synthetic data. Call ``run()`` once per instance."""
+
+    def __init__(self, seed=0, batch_size=5000, password='password', log=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.password = password
+        self.prefix = username_prefix(seed)
+        self.log = log or (lambda message: None)
+        self.created = {}
+
+    def run(self, profiles, projects, messages, events, rebuild_suggestions=False):
+        """Generate everything in one transaction. Returns ``{model name: rows created}``."""
+        start = time.perf_counter()
+        with transaction.atomic(), explicit_timestamps(
+            Profile, Project, ProjectParticipant, Document, Conversation, Message, Event, EventParticipant,
+        ):
+            keywords = self._keywords()
+            organizations = self._organizations(max(3, profiles // 50))
+            people = self._profiles(profiles, organizations, keywords)
+            posted = self._projects(projects, people, keywords)
+            self._applications(posted, people)
+            self._documents(posted)
+            self._messages(messages, people)
+            self._events(events, organizations, people)
+            self._subscriptions(people)
+        indexed = search.rebuild()
+        self.log(f"indexed {indexed} projects for search")
+        if rebuild_suggestions:
+            self.log(f"rebuilt suggestions for {suggestions.rebuild()} profiles")
+        self.log(f"done in {time.perf_counter() - start:.1f}s")
+        return self.created
+
+    # --- helpers -----------------------------------------------------------------
+
+    def _bulk(self, model, rows):
+        """``bulk_create`` ``rows`` in batches; returns the saved objects (with pks)."""
+        saved = []
+        for offset in range(0, len(rows), self.batch_size):
+            saved += model.objects.bulk_create(rows[offset:offset + self.batch_size])
+        self.created[model.__name__] = self.created.get(model.__name__, 0) + len(saved)
+        return saved
+
+    def _step(self, label, started, count):
+        self.log(f"{label:<24}{count:>10} rows {time.perf_counter() - started:>7.1f}s")
+
+    def _weighted(self, choices):
+        values, weights = zip(*choices)
+        return self.rng.choices(values, weights)[0]
+
+    def _words(self, low, high):
+        return ' '.join(self.rng.choices(VOCABULARY, k=self.rng.randint(low, high)))
+
+    def _moment(self, days=HISTORY_DAYS):
+        """A time within ``days`` before ``EPOCH``, biased towards recent."""
+        return EPOCH - datetime.timedelta(seconds=int(days * 86400 * self.rng.random() ** 2))
+
+    def _after(self, moment, max_days):
+        offset = datetime.timedelta(seconds=self.rng.randint(60, max(60, int(max_days * 86400))))
+        return min(moment + offset, EPOCH)
+
+    # --- stages --------------------------------------------------------------------
+
+    def _keywords(self):
+        started = time.perf_counter()
+        codes = sorted(set(VOCABULARY))
+        Keyword.objects.bulk_create([Keyword(code=code, label=code.title()) for code in codes], ignore_conflicts=True)
+        keywords = list(Keyword.objects.filter(code__in=codes).order_by('code').values_list('pk', flat=True))
+        self._step('keywords', started, len(keywords))
+        return keywords
+
+    def _organizations(self, count):
+        started = time.perf_counter()
+        kinds = [code for code, _ in INSTITUTIONS]
+        rows = []
+        for n in range(count):
+            name = f"{self._words(1, 2).title()} {self.rng.choice(['Institute', 'Lab', 'Center', 'Group'])} {n}"
+            rows.append(Organization(
+                name=name, org_type=self.rng.choice(kinds), description=self._words(10, 30),
+                contact_email=f"contact@org{n}.{self.prefix.rstrip('-')}.example.com",
+            ))
+        organizations = self._bulk(Organization, rows)
+        self._step('organizations', started, len(organizations))
+        return [organization.pk for organization in organizations]
+
+    def _profiles(self, count, organizations, keywords):
+        started = time.perf_counter()
+        password = make_password(self.password)  # hashed once: per-user hashing dominates otherwise
+        specializations = [code for code, _ in SPECIALIZATIONS]
+        joined = sorted(self._moment() for _ in range(count))
+        users = self._bulk(User, [
+            User(username=f'{self.prefix}{n}', email=f'{self.prefix}{n}@example.com', password=password,
+                 date_joined=joined[n])
+            for n in range(count)
+        ])
+        profiles = self._bulk(Profile, [
+            Profile(
+                user_id=user.pk,
+                user_type=self._weighted(USER_TYPES),
+                organization_id=self.rng.choice(organizations) if self.rng.random() < 0.7 else None,
+                specialization=self.rng.choice(specializations),
+                bio=self._words(0, 40),
+                created_at=user.date_joined,
+            )
+            for user in users
+        ])
+        Through = Profile.keywords.through
+        self._bulk(Through, [
+            Through(profile_id=profile.pk, keyword_id=keyword)
+            for profile in profiles
+            for keyword in self.rng.sample(keywords, min(len(keywords), self.rng.randint(1, 5)))
+        ])
+        self._step('users and profiles', started, len(profiles))
+        return profiles
+
+    def _projects(self, count, people, keywords):
+        started = time.perf_counter()
+        posters = [profile for profile in people if profile.user_type in POSTER_TYPES] or people
+        types = [code for code, _ in Project.PROJECT_TYPES]
+        specializations = [code for code, _ in SPECIALIZATIONS]
+        rows = []
+        for _ in range(count if posters else 0):
+            poster = self.rng.choice(posters)
+            created = self._after(poster.created_at, HISTORY_DAYS * self.rng.random())
+            rows.append(Project(
+                title=self._words(3, 8).capitalize(),
+                description=self._words(40, 160),
+                project_type=self.rng.choice(types),
+                posted_by_id=poster.pk,
+                specialization_needed=self.rng.choice(specializations),
+                duration=f"{self.rng.randint(1, 12)} months",
+                status=self._weighted(PROJECT_STATUSES),
+                budget=Decimal(self.rng.randrange(1000, 200_000, 500)) if self.rng.random() < 0.4 else None,
+                created_at=created,
+                updated_at=created,
+            ))
+        projects = self._bulk(Project, rows)
+        Through = Project.keywords.through
+        self._bulk(Through, [
+            Through(project_id=project.pk, keyword_id=keyword)
+            for project in projects
+            for keyword in self.rng.sample(keywords, min(len(keywords), self.rng.randint(1, 4)))
+        ])
+        self._step('projects', started, len(projects))
+        return projects
+
+    def _applications(self, projects, people):
+        started = time.perf_counter()
+        roles = [('candidate', 80), ('member', 10), ('supervisor', 5), ('company_contact', 5)]
+        rows = []
+        for project in projects:
+            wanted = min(len(people) - 1, int(self.rng.expovariate(0.5)))
+            applicants = set()
+            while len(applicants) < wanted:
+                profile = self.rng.choice(people)
+                if profile.pk != project.posted_by_id:
+                    applicants.add(profile.pk)
+            for profile_id in sorted(applicants):
+                applied = self._after(project.created_at, 30)
+                accepted = project.status != 'open' and self.rng.random() < 0.5
+                rows.append(ProjectParticipant(
+                    project_id=project.pk, profile_id=profile_id, role=self._weighted(roles),
+                    applied_at=applied, accepted=accepted,
+                    joined_at=self._after(applied, 14) if accepted else None,
+                ))
+        self._bulk(ProjectParticipant, rows)
+        self._step('applications', started, len(rows))
+
+    def _documents(self, projects):
+        started = time.perf_counter()
+        rows = [
+            Document(
+                owner_id=project.posted_by_id, project_id=project.pk, title=self._words(2, 5).capitalize(),
+                file=f'documents/{self.prefix}{project.pk}.pdf', uploaded_at=self._after(project.created_at, 60),
+            )
+            for project in projects if self.rng.random() < 0.3
+        ]
+        self._bulk(Document, rows)
+        self._step('documents', started, len(rows))
+
+    def _messages(self, count, people):
+        """Threads between pairs of profiles; a few long threads and many short ones."""
+        started = time.perf_counter()
+        if count <= 0 or len(people) < 2:
+            return
+        threads = max(1, count // 10)
+        lengths = [0] * threads
+        for _ in range(count):
+            lengths[int(threads * self.rng.random() ** 2)] += 1
+        lengths = [length for length in lengths if length]
+
+        pairs, rows = [], []
+        for _ in lengths:
+            first, second = self.rng.sample(people, 2)
+            topic = self._words(1, 3)
+            pairs.append((first.pk, second.pk, self.rng.choice(SUBJECTS).format(topic).strip()))
+            rows.append(Conversation(subject=pairs[-1][2], created_at=self._moment(HISTORY_DAYS // 2)))
+        conversations = self._bulk(Conversation, rows)
+        self._step('conversations', started, len(conversations))
+
+        memberships, unread_totals = [], defaultdict(int)
+        batch = []
+        for conversation, (first, second, subject), length in zip(conversations, pairs, lengths):
+            moment = conversation.created_at
+            unread = {first: 0, second: 0}
+            for n in range(length):
+                sender, recipient = (first, second) if self.rng.random() < 0.5 else (second, first)
+                moment = self._after(moment, 2)
+                # Only the tail of a thread is still unread
+                read = n < length - 3 or self.rng.random() < 0.6
+                if not read:
+                    unread[recipient] += 1
+                batch.append(Message(
+                    conversation_id=conversation.pk, sender_id=sender, recipient_id=recipient,
+                    subject=subject if n == 0 else f"Re: {subject}" if subject else '',
+                    body=self._words(5, 60), sent_at=moment, read=read,
+                ))
+            memberships += [
+                ConversationParticipant(
+                    conversation_id=conversation.pk, profile_id=profile_id,
+                    last_message_at=moment, unread_count=unread[profile_id],
+                )
+                for profile_id in (first, second)
+            ]
+            for profile_id, n in unread.items():
+                unread_totals[profile_id] += n
+            if len(batch) >= self.batch_size:
+                self._bulk(Message, batch)
+                batch = []
+        self._bulk(Message, batch)
+        self._bulk(ConversationParticipant, memberships)
+
+        last = Message.objects.filter(conversation=OuterRef('pk')).order_by('-sent_at', '-id').values('pk')[:1]
+        Conversation.objects.filter(pk__range=(conversations[0].pk, conversations[-1].pk)).update(
+            last_message=Subquery(last)
+        )
+        by_id = {profile.pk: profile for profile in people}
+        changed = []
+        for profile_id, n in unread_totals.items():
+            by_id[profile_id].unread_count += n
+            changed.append(by_id[profile_id])
+        Profile.objects.bulk_update(changed, ['unread_count'], batch_size=1000)
+        self._step('messages', started, count)
+
+    def _events(self, count, organizations, people):
+        started = time.perf_counter()
+        rows = []
+        for _ in range(count):
+            # Half past, half upcoming relative to EPOCH
+            begins = EPOCH + datetime.timedelta(days=self.rng.uniform(-180, 180))
+            rows.append(Event(
+                title=f"{self._words(2, 4).title()} {self.rng.choice(['Workshop', 'Meetup', 'Summit', 'Hackathon'])}",
+                description=self._words(20, 80), organizer_id=self.rng.choice(organizations),
+                location=self._words(1, 2).title(), start=begins,
+                end=begins + datetime.timedelta(hours=self.rng.randint(2, 48)),
+                capacity=self.rng.choice([None, 20, 50, 100, 250]),
+                created_at=begins - datetime.timedelta(days=self.rng.randint(7, 90)),
+            ))
+        events = self._bulk(Event, rows)
+        attendees = []
+        for event in events:
+            wanted = min(len(people), event.capacity or 30, self.rng.randint(0, 60))
+            for profile in self.rng.sample(people, wanted):
+                attendees.append(EventParticipant(
+                    event_id=event.pk, profile_id=profile.pk,
+                    registered_at=event.created_at + (event.start - event.created_at) * self.rng.random(),
+                    attended=event.start < EPOCH and self.rng.random() < 0.7,
+                ))
+        self._bulk(EventParticipant, attendees)
+        taken = {}
+        for attendee in attendees:
+            taken[attendee.event_id] = taken.get(attendee.event_id, 0) + 1
+        for event in events:
+            event.seats_taken = taken.get(event.pk, 0)
+        Event.objects.bulk_update(events, ['seats_taken'], batch_size=self.batch_size)
+        self._step('events', started, len(events))
+
+    def _subscriptions(self, people):
+        started = time.perf_counter()
+        plans = []
+        for name, price in PLANS:
+            plan, _ = SubscriptionPlan.objects.get_or_create(name=name, defaults={'price_per_year': price})
+            plans.append(plan.pk)
+        rows = []
+        for profile in people:
+            if profile.user_type == 'company' and self.rng.random() < 0.6:
+                began = self._after(profile.created_at, 90)
+                rows.append(CompanySubscription(
+                    company_id=profile.pk, plan_id=self.rng.choice(plans),
+                    started_at=began, expires_at=began + datetime.timedelta(days=365),
+                ))
+        self._bulk(CompanySubscription, rows)
+        self._step('subscriptions', started, len(rows))
@@ -0,0 +1,16 @@
+from django import template
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from core import assets
+
+register = template.Library()
+
+
+@register.simple_tag
+def site_stylesheets():
+    """The built stylesheet bundle, or the CDN tags until ``build_assets`` has run."""
+    if assets.bundle_built():
+        return format_html('<link rel="stylesheet" href="{}">', static(assets.BUNDLE))
+    return render_to_string('includes/cdn_stylesheets.html')
@@ -0,0 +1,138 @@
+"""Incremental compilation of the gettext catalogs under ``locale/``.
+
+A ``.po`` file is compiled only when its content hash differs from the one
+recorded in ``locale/.compiled.json`` at its last successful compile, or
+when its ``.mo`` is missing, so an unchanged deploy only hashes a few files.
+Stale catalogs are compiled in a process pool, one catalog (locale and
+domain) per task. Every failure is collected and reported together; a
+failed catalog keeps its old ``.mo`` and is retried on the next run.
+
+Besides parse errors, a translation whose ``python-format`` placeholders
+do not appear in the source string is an error, as with ``msgfmt --check``:
+it would raise at runtime when Django interpolates it.
+
+Used by ``manage.py compile_translations`` and ``scripts/compile_translations.py``;
+this module does not need Django settings.
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import polib
+
+MANIFEST = '.compiled.json'
+
+PLACEHOLDER_RE = re.compile(r'%(?:\((\w+)\))?[-#0 +]*\d*(?:\.\d+)?([sdifrxXeEgGco%])')
+
+
+def catalogs(locale_dir):
+    return sorted(Path(locale_dir).rglob('*.po'))
+
+
+def content_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def load_manifest(locale_dir):
+    try:
+        with open(Path(locale_dir) / MANIFEST, encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(locale_dir, manifest):
+    path = Path(locale_dir) / MANIFEST
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+    os.replace(tmp, path)
+
+
+def stale(locale_dir):
+    """``{relative po path: hash}`` of the catalogs that need compiling."""
+    base = Path(locale_dir)
+    manifest = load_manifest(base)
+    changed = {}
+    for po_path in catalogs(base):
+        key = po_path.relative_to(base).as_posix()
+        digest = content_hash(po_path)
+        if manifest.get(key) != digest or not po_path.with_suffix('.mo').exists():
+            changed[key] = digest
+    return changed
+
+
+def format_errors(po):
+    """Translations that use placeholders their source string does not provide."""
+    errors = []
+    for entry in po.translated_entries():
+        if 'python-format' not in entry.flags:
+            continue
+        sources = [entry.msgid, entry.msgid_plural] if entry.msgid_plural else [entry.msgid]
+        allowed = {match for source in sources for match in PLACEHOLDER_RE.findall(source)}
+        translations = entry.msgstr_plural.values() if entry.msgid_plural else [entry.msgstr]
+        for translation in translations:
+            extra = set(PLACEHOLDER_RE.findall(translation)) - allowed
+            if extra:
+                names = ', '.join(sorted(f'%({name})' if name else f'%{kind}' for name, kind in extra))
+                errors.append(f'line {entry.linenum}: unknown placeholder(s) {names} in {entry.msgid[:40]!r}')
+    return errors
+
+
+def compile_catalog(po_path):
+    """Compile one catalog next to itself. Returns an error message, or None."""
+    try:
+        po = polib.pofile(str(po_path))
+        errors = format_errors(po)
+        if errors:
+            return '; '.join(errors)
+        mo_path = Path(po_path).with_suffix('.mo')
+        tmp = mo_path.with_suffix('.mo.tmp')
+        po.save_as_mofile(str(tmp))
+        os.replace(tmp, mo_path)
+    except Exception as error:
+        return f'{type(error).__name__}: {error}'
+    return None
+
+
+def compile_all(locale_dir, workers=None, force=False):
+    """Compile the stale catalogs (every catalog with ``force``).
+
+    Returns ``(compiled, failures, total)``: the relative paths compiled,
+    ``{relative path: error}`` and the number of catalogs found.
+    """
+    base = Path(locale_dir)
+    manifest = load_manifest(base)
+    found = catalogs(base)
+    todo = (
+        {path.relative_to(base).as_posix(): content_hash(path) for path in found} if force else stale(base)
+    )
+    if not todo:
+        return [], {}, len(found)
+
+    keys = sorted(todo)
+    paths = [str(base / key) for key in keys]
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers == 1:
+        results = [compile_catalog(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(compile_catalog, paths))
+
+    compiled, failures = [], {}
+    for key, error in zip(keys, results):
+        if error is None:
+            manifest[key] = todo[key]
+            compiled.append(key)
+        else:
+            manifest.pop(key, None)
+            failures[key] = error
+    # Forget catalogs that were deleted
+    present = {path.relative_to(base).as_posix() for path in found}
+    manifest = {key: digest for key, digest in manifest.items() if key in present}
+    save_manifest(base, manifest)
+    return compiled, failures, len(found)
@@ -0,0 +1,71 @@
+"""Unread-message counters for the site-wide nav badge.
+
+``Profile.unread_count`` is adjusted atomically with ``F()`` expressions
+whenever a message is created, deleted or changes its read flag, so the
+badge never needs a COUNT over messages. ``ConversationParticipant.unread_count``
+is kept the same way for each thread listed in the inbox. The profile total
+is also cached per user; every adjustment deletes the cache key once the
+transaction commits, and the short timeout bounds staleness when the cache
+is not shared between workers.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from . import live
+from .models import ConversationParticipant, Message, Profile
+
+
+def cache_key(user_id):
+    return f'unread:{user_id}'
+
+
+def invalidate(user_id):
+    transaction.on_commit(lambda: cache.delete(cache_key(user_id)))
+    live.notify(user_id)
+
+
+def adjust(profile_id, delta, user_id=None, conversation_id=None):
+    """Add ``delta`` (may be negative) to a profile's unread counter, and to its
+    counter for ``conversation_id`` when given."""
+    Profile.objects.filter(pk=profile_id).update(unread_count=Greatest(F('unread_count') + delta, 0))
+    if conversation_id is not None:
+        ConversationParticipant.objects.filter(conversation_id=conversation_id, profile_id=profile_id).update(
+            unread_count=Greatest(F('unread_count') + delta, 0)
+        )
+    if user_id is None:
+        user_id = Profile.objects.filter(pk=profile_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        invalidate(user_id)
+
+
+def recount(profile_ids=None):
+    """Recompute stored counters from the Message table (repair / backfill)."""
+    profiles = Profile.objects.all() if profile_ids is None else Profile.objects.filter(pk__in=profile_ids)
+    counts = dict(
+        Message.objects.filter(read=False, recipient__in=profiles.values('pk'))
+        .order_by().values_list('recipient_id').annotate(n=Count('pk'))
+    )
+    for profile_id, user_id, stored in profiles.values_list('pk', 'user_id', 'unread_count'):
+        actual = counts.get(profile_id, 0)
+        if actual != stored:
+            Profile.objects.filter(pk=profile_id).update(unread_count=actual)
+            invalidate(user_id)
+    per_thread = (
+        Message.objects.filter(read=False, recipient=OuterRef('profile'), conversation=OuterRef('conversation'))
+        .order_by().values('conversation').annotate(n=Count('pk')).values('n')
+    )
+    ConversationParticipant.objects.filter(profile__in=profiles.values('pk')).update(
+        unread_count=Coalesce(Subquery(per_thread, output_field=IntegerField()), 0)
+    )
+
+
+def count_for_user(user):
+    key = cache_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Profile.objects.filter(user_id=user.pk).values_list('unread_count', flat=True).first() or 0
+        cache.set(key, count, getattr(settings, 'UNREAD_COUNT_CACHE_TIMEOUT', 300))
+    return count
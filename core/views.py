@@ -1,24 +1,41 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.templatetags.static import static
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Exists, OuterRef, Prefetch
-from django.views.decorators.cache import cache_page
+from django.db.models import Q, Count, Exists, OuterRef, Prefetch, Subquery
 from django.contrib.auth import login, logout
 from django.contrib import messages
-from django.utils.translation import gettext as _
+from django.utils.translation import get_language, gettext as _
 from django.utils import timezone
+from django.db import transaction
+from django.urls import reverse
+from django.conf import settings
+from django.views.decorators.http import condition
 from django.contrib.auth.views import (
     PasswordResetView,
     PasswordResetDoneView,
     PasswordResetConfirmView,
     PasswordResetCompleteView
 )
-from .models import Project, ProjectParticipant, Profile, Document, Message, Event, EventParticipant, Keyword, Organization
-from .forms import ProjectForm, DocumentForm, MessageForm, RegisterForm, ProfileForm
+from .models import Project, ProjectParticipant, Profile, Document, Message, ConversationParticipant, Event, EventParticipant, Keyword, Organization
+from . import exports, fragments, live, previews, registrations, search, stats, suggestions, unread
+from .instrumentation import query_budget
+from .replicas import replica_reads
+from .pagination import InvalidCursor, bounded_count, paginate, paginate_with
+from .forms import ProjectForm, DocumentForm, MessageForm, ReplyForm, RegisterForm, ProfileForm
 from django.contrib.auth.forms import AuthenticationForm
 
+@query_budget(3)
 def about(request):
     return render(request, 'about.html')
 
+@query_budget(20)
 def register(request):
     if request.method == 'POST':
         form = RegisterForm(request.POST)
@@ -30,20 +47,13 @@ def register(request):
         form = RegisterForm()
     return render(request, 'auth/register.html', {'form': form})
 
+@replica_reads
+@query_budget(8)
 @login_required
 def project_list(request):
     q = request.GET.get('q', '').strip()
-    projects_qs = (
-        Project.objects.all()
-        .select_related('posted_by__user')
-        .prefetch_related('keywords')
-    )
-    if q:
-        projects_qs = projects_qs.filter(
-            Q(title__icontains=q) |
-            Q(description__icontains=q) |
-            Q(keywords__label__icontains=q)
-        ).distinct()
+    # Keywords are only loaded for cards missing from the fragment cache
+    projects_qs = Project.objects.all().select_related('posted_by__user')
     if request.user.is_authenticated:
         projects_qs = projects_qs.annotate(
             user_has_applied=Exists(
@@ -53,9 +63,49 @@ def project_list(request):
                 )
             )
         )
-    projects = list(projects_qs)
-    return render(request, 'projects/project_list.html', {'projects': projects})
+    page = None
+    if q and search.get_backend() is not None:
+        page = _search_page(request, projects_qs, q)
+    if page is None:
+        if q:
+            projects_qs = projects_qs.filter(search.icontains_filter(q)).distinct()
+        page = paginate(request, projects_qs, ('-created_at', '-id'))
+    return render(request, 'projects/project_list.html', {
+        'projects': page.object_list,
+        'cards': fragments.render_cards(request, page.object_list),
+        'page': page,
+    })
+
+def _search_key(values):
+    """A search cursor's ``[score, id]`` as ``(score, id)``; anything else is an InvalidCursor."""
+    if values is None:
+        return None
+    if len(values) != 2:
+        raise InvalidCursor
+    score, pk = values
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or isinstance(pk, bool) or not isinstance(pk, int):
+        raise InvalidCursor
+    return float(score), pk
+
+def _search_page(request, projects_qs, q):
+    """Page through full-text hits in relevance order, keyed on (score, id)."""
+    def fetch(limit, after=None, before=None):
+        return search.search_projects(q, limit=limit, after=_search_key(after), before=_search_key(before))
 
+    page = paginate_with(request, fetch, key=lambda hit: [hit[1], hit[0]])
+    by_pk = projects_qs.in_bulk([pk for pk, _ in page.object_list])
+    projects = []
+    for pk, score in page.object_list:
+        if pk in by_pk:
+            by_pk[pk].search_rank = score
+            projects.append(by_pk[pk])
+    page.object_list = projects
+    limit = settings.PAGINATION_COUNT_LIMIT
+    count = search.count_projects(q, limit + 1)
+    page.count, page.count_capped = min(count, limit), count > limit
+    return page
+
+@query_budget(34)
 @login_required
 def project_create(request):
     # Permission: only researchers and companies can create projects
@@ -78,81 +128,106 @@ def project_create(request):
         form = ProjectForm()
     return render(request, 'projects/project_form.html', {'form': form})
 
+def _project_updated_at(request, project_id):
+    # condition() asks for the ETag and Last-Modified separately; look it up once
+    if not hasattr(request, '_project_updated_at'):
+        request._project_updated_at = (
+            Project.objects.filter(pk=project_id).values_list('updated_at', flat=True).first()
+        )
+    return request._project_updated_at
+
+def _can_revalidate(request):
+    # Pending flash messages are shown by the next full render; never answer 304 over them
+    return not len(messages.get_messages(request))
+
+def _project_detail_etag(request, project_id):
+    updated_at = _project_updated_at(request, project_id)
+    if updated_at is None or not _can_revalidate(request):
+        return None
+    # The page also shows the viewer's role and the nav badge, and is translated
+    viewer = getattr(request.user, 'profile', None)
+    parts = [
+        project_id, updated_at.isoformat(), get_language(), request.user.pk,
+        viewer.user_type if viewer else '', unread.count_for_user(request.user),
+    ]
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+def _project_detail_last_modified(request, project_id):
+    if not _can_revalidate(request):
+        return None
+    return _project_updated_at(request, project_id)
+
+@replica_reads
+@query_budget(7)
 @login_required
+@condition(etag_func=_project_detail_etag, last_modified_func=_project_detail_last_modified)
 def project_detail(request, project_id):
-    project = get_object_or_404(Project, id=project_id)
+    project = get_object_or_404(Project.objects.for_detail(), id=project_id)
     return render(request, 'projects/project_detail.html', {'project': project})
 
+def _apply_response(request, project, applied, level, message, status=200):
+    """Answer an apply/withdraw click.
+
+    fetch() calls asking for JSON and htmx requests get the card's new button
+    (``includes/project_apply_button.html``) so the page swaps just that;
+    plain form posts keep the redirect back to the list.
+    """
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    if wants_json or request.headers.get('HX-Request') == 'true':
+        project.user_has_applied = applied
+        # No request: the fragment needs only the CSRF token, not the context processors
+        html = render_to_string('includes/project_apply_button.html', {
+            'project': project, 'can_apply': fragments.can_apply(request.user), 'message': message,
+            'csrf_token': get_token(request),
+        })
+        if wants_json:
+            return JsonResponse({'applied': applied, 'message': message, 'html': html}, status=status)
+        return HttpResponse(html, status=status)
+    messages.add_message(request, level, message)
+    return redirect('project_list')
+
+@query_budget(8)
 @login_required
 def project_apply(request, project_id):
     project = get_object_or_404(Project, id=project_id)
-    if request.method == 'POST':
-        if request.user.profile.user_type not in ('student', 'researcher'):
-            messages.warning(request, _("Only students and researchers can apply to projects."))
-        elif project.status != 'open':
-            messages.warning(request, _("This project is not open for applications."))
-        else:
-            exists = ProjectParticipant.objects.filter(project=project, profile=request.user.profile).exists()
-            if exists:
-                messages.info(request, _("You have already applied to this project."))
-            else:
-                ProjectParticipant.objects.create(
-                    project=project,
-                    profile=request.user.profile,
-                    role='candidate',
-                    accepted=False
-                )
-                messages.success(request, _("Application submitted successfully."))
-    else:
-        messages.error(request, _("Invalid request method."))
-    return redirect('project_list')
+    if request.method != 'POST':
+        return _apply_response(request, project, False, messages.ERROR, _("Invalid request method."), status=405)
+    if request.user.profile.user_type not in ('student', 'researcher'):
+        return _apply_response(request, project, False, messages.WARNING,
+                               _("Only students and researchers can apply to projects."), status=403)
+    if project.status != 'open':
+        return _apply_response(request, project, False, messages.WARNING,
+                               _("This project is not open for applications."), status=409)
+    if ProjectParticipant.apply(project, request.user.profile) is None:
+        return _apply_response(request, project, True, messages.INFO, _("You have already applied to this project."))
+    return _apply_response(request, project, True, messages.SUCCESS, _("Application submitted successfully."))
 
+@query_budget(7)
 @login_required
 def project_withdraw(request, project_id):
     project = get_object_or_404(Project, id=project_id)
-    if request.method == 'POST':
-        participant = ProjectParticipant.objects.filter(
-            project=project, profile=request.user.profile
-        ).first()
-        if participant:
-            participant.delete()
-            messages.success(request, _("Your application has been withdrawn."))
-        else:
-            messages.info(request, _("You have no application for this project."))
-    else:
-        messages.error(request, _("Invalid request method."))
-    return redirect('project_list')
+    if request.method != 'POST':
+        return _apply_response(request, project, False, messages.ERROR, _("Invalid request method."), status=405)
+    deleted = ProjectParticipant.objects.filter(project=project, profile=request.user.profile).delete()[0]
+    if deleted:
+        return _apply_response(request, project, False, messages.SUCCESS, _("Your application has been withdrawn."))
+    return _apply_response(request, project, False, messages.INFO, _("You have no application for this project."))
 
+@query_budget(6)
 @login_required
 def suggestions_for_user(request):
-    # Logic for suggestions
-    return render(request, 'projects/suggestions.html')
+    projects = suggestions.suggestions_for(request.user.profile)
+    return render(request, 'projects/suggestions.html', {'suggestions': projects})
 
+@replica_reads
+@query_budget(8)
 @login_required
 def dashboard(request):
-    total_projects = Project.objects.count()
-    open_projects = Project.objects.filter(status='open').count()
-    total_users = Profile.objects.count()
-    recent_projects = Project.objects.order_by('-created_at')[:5]
-
-    # User-specific statistics
-    projects_posted = Project.objects.filter(posted_by=request.user.profile).count()
-    messages_sent = Message.objects.filter(sender=request.user.profile).count()
-    messages_received = Message.objects.filter(recipient=request.user.profile).count()
-    documents_uploaded = Document.objects.filter(owner=request.user.profile).count()
-
-    context = {
-        'total_projects': total_projects,
-        'open_projects': open_projects,
-        'total_users': total_users,
-        'recent_projects': recent_projects,
-        'projects_posted': projects_posted,
-        'messages_sent': messages_sent,
-        'messages_received': messages_received,
-        'documents_uploaded': documents_uploaded,
-    }
+    context = dict(stats.global_stats())
+    context.update(stats.user_stats(request.user.profile))
     return render(request, 'dashboard/index.html', context)
 
+@query_budget(10)
 @login_required
 def upload_document(request):
     if request.method == 'POST':
@@ -166,16 +241,141 @@ def upload_document(request):
         form = DocumentForm()
     return render(request, 'documents/upload.html', {'form': form})
 
+def _can_see_document(user, document):
+    if user.is_staff or document.owner.user_id == user.id:
+        return True
+    if document.project_id is None:
+        return False
+    return (
+        document.project.posted_by.user_id == user.id
+        or ProjectParticipant.objects.filter(project_id=document.project_id, profile__user_id=user.id).exists()
+    )
+
+@query_budget(5)
+@login_required
+def document_preview(request, document_id):
+    """Serve a cached WebP preview; never renders in the request (see core.previews)."""
+    document = get_object_or_404(
+        Document.objects.select_related('owner', 'project__posted_by').only(
+            'file', 'owner__user_id', 'project__posted_by__user_id'
+        ),
+        id=document_id,
+    )
+    if not _can_see_document(request.user, document):
+        raise Http404
+    size = request.GET.get('size', 'small')
+    if size not in previews.sizes():
+        raise Http404
+    name = document.file.name
+    storage = previews.preview_storage()
+    preview = previews.preview_name(name, size)
+    if storage.exists(preview):
+        response = FileResponse(storage.open(preview), content_type='image/webp')
+        # Named after the content hash, so a preview URL's bytes only change if the file does
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+    if previews.supported(name):
+        previews.schedule_once(name)
+        response = redirect(static('img/preview-pending.svg'))
+        response['Retry-After'] = '2'
+    else:
+        response = redirect(static('img/preview-file.svg'))
+    response['Cache-Control'] = 'no-store'
+    return response
+
+@query_budget(5)
 @login_required
 def inbox(request):
-    messages = (
-        Message.objects
-        .filter(recipient=request.user.profile)
-        .select_related('sender__user', 'recipient__user')
-        .order_by('-sent_at')
+    # One range scan on core_conv_inbox_idx: cost follows active threads, not message history
+    memberships = (
+        ConversationParticipant.objects
+        .filter(profile=request.user.profile, last_message_at__isnull=False)
+        .select_related('conversation__last_message__sender__user', 'conversation__last_message__recipient__user')
+    )
+    page = paginate(request, memberships, ('-last_message_at', '-id'), count=False)
+    return render(request, 'messages/inbox.html', {
+        'conversations': page.object_list,
+        'page': page,
+        # Live updates only make sense on the newest page
+        'stream_after': None if page.has_previous else max(
+            (membership.conversation.last_message_id for membership in page), default=0
+        ),
+    })
+
+@query_budget(12)
+@login_required
+def conversation_detail(request, conversation_id):
+    profile = request.user.profile
+    membership = get_object_or_404(
+        ConversationParticipant.objects.select_related('conversation'),
+        conversation_id=conversation_id, profile=profile,
     )
-    return render(request, 'messages/inbox.html', {'messages': messages})
+    conversation = membership.conversation
+    if request.method == 'POST':
+        form = ReplyForm(request.POST)
+        if form.is_valid():
+            recipient_id = (
+                conversation.memberships.exclude(profile=profile).values_list('profile_id', flat=True).first()
+                or profile.pk
+            )
+            reply = form.save(commit=False)
+            reply.conversation = conversation
+            reply.sender = profile
+            reply.recipient_id = recipient_id
+            reply.subject = conversation.subject
+            reply.save()
+            return redirect('conversation', conversation_id=conversation.pk)
+    else:
+        form = ReplyForm()
+    page = paginate(
+        request,
+        conversation.messages.select_related('sender__user'),
+        ('-sent_at', '-id'),
+        count=False,
+    )
+    if membership.unread_count:
+        # Opening the thread reads it; the page still shows them as "New" this time
+        conversation.messages.filter(recipient=profile, read=False).mark_read()
+    return render(request, 'messages/conversation.html', {
+        'conversation': conversation,
+        'thread_messages': page.object_list,
+        'page': page,
+        'form': form,
+    })
 
+@query_budget(5)
+@login_required
+async def inbox_stream(request):
+    """Server-Sent Events for new messages and the unread count (see core.live)."""
+    user = await request.auser()
+    profile_id = await Profile.objects.filter(user=user).values_list('pk', flat=True).afirst()
+    if profile_id is None:
+        raise Http404
+    after = request.headers.get('Last-Event-ID') or request.GET.get('after', '')
+    if after.isdigit():
+        after_id = int(after)
+    else:
+        after_id = await sync_to_async(live.latest_message_id)(profile_id)
+
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI a held connection would pin a worker: answer with what is
+        # new now and let EventSource reconnect after the poll interval.
+        messages_, unread = await sync_to_async(live.poll)(profile_id, after_id)
+        chunks, _, _ = live.events_since(after_id, messages_, unread)
+        retry = (live.poll_interval() or live.heartbeat_interval()) * 1000
+        response = HttpResponse(f'retry: {retry}\n\n' + ''.join(chunks), content_type='text/event-stream')
+    else:
+        # Release this request's connection; polls use the shared pool and close their own
+        await sync_to_async(live.release_connection)()
+        response = StreamingHttpResponse(
+            live.stream(user.pk, profile_id, after_id, sync_to_async(live.poll_and_release, thread_sensitive=False)),
+            content_type='text/event-stream',
+        )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@query_budget(13)
 @login_required
 def send_message(request):
     recipient_profile = None
@@ -185,7 +385,7 @@ def send_message(request):
             msg = form.save(commit=False)
             msg.sender = request.user.profile
             msg.save()
-            return redirect('inbox')
+            return redirect('conversation', conversation_id=msg.conversation_id)
     else:
         form = MessageForm()
         recipient_id = request.GET.get('recipient')
@@ -198,41 +398,76 @@ def send_message(request):
                 pass
     return render(request, 'messages/compose.html', {'form': form, 'recipient_profile': recipient_profile})
 
+@replica_reads
+@query_budget(6)
 @login_required
 def events_list(request):
     events_qs = (
         Event.objects.all()
         .select_related('organizer')
-        .order_by('start')
     )
     if request.user.is_authenticated:
         events_qs = events_qs.annotate(
-            user_is_registered=Exists(
+            user_status=Subquery(
                 EventParticipant.objects.filter(
                     event=OuterRef('pk'),
                     profile=request.user.profile
-                )
+                ).values('status')[:1]
             )
         )
-    events = list(events_qs)
-    return render(request, 'events/events_list.html', {'events': events})
+    page = paginate(request, events_qs, ('start', 'id'))
+    return render(request, 'events/events_list.html', {'events': page.object_list, 'page': page})
 
+@query_budget(11)
 @login_required
 def event_register(request, event_id):
     event = get_object_or_404(Event, id=event_id)
-    # Register current user to the event if not already registered
+    # Register current user to the event, or put them on its waitlist when it is full
     if request.method != 'POST':
         messages.error(request, _("Invalid request method."))
         return redirect('events_list')
 
-    already = EventParticipant.objects.filter(event=event, profile=request.user.profile).exists()
-    if already:
+    participant, created = registrations.register(event, request.user.profile)
+    if not created:
         messages.info(request, _("You are already registered for this event."))
+    elif participant.status == EventParticipant.WAITLISTED:
+        messages.info(request, _("This event is full. You are number %(position)d on the waitlist.") % {
+            'position': registrations.waitlist_position(participant),
+        })
     else:
-        EventParticipant.objects.create(event=event, profile=request.user.profile)
         messages.success(request, _("You have been registered for the event."))
     return redirect('events_list')
 
+@query_budget(15)
+@login_required
+def event_cancel(request, event_id):
+    event = get_object_or_404(Event, id=event_id)
+    if request.method != 'POST':
+        messages.error(request, _("Invalid request method."))
+        return redirect('events_list')
+
+    if registrations.cancel(event, request.user.profile):
+        messages.success(request, _("Your registration has been cancelled."))
+    else:
+        messages.info(request, _("You were not registered for this event."))
+    return redirect('events_list')
+
+@query_budget(5)
+@login_required
+def export_event_participants(request, event_id):
+    """Staff, and members of the organizing organization, can export the participant list."""
+    event = get_object_or_404(Event, id=event_id)
+    organization_id = Profile.objects.filter(user_id=request.user.id).values_list('organization_id', flat=True).first()
+    if not request.user.is_staff and (event.organizer_id is None or organization_id != event.organizer_id):
+        context = {
+            'message': _("You don't have permission to export participants for this event."),
+            'action_url': 'events_list',
+            'action_text': _("Browse Events"),
+        }
+        return render(request, 'projects/permission_denied.html', context)
+    return _export_response(request, exports.event_participants(event))
+
+@query_budget(9)
 def login_view(request):
     if request.method == 'POST':
         form = AuthenticationForm(request, data=request.POST)
@@ -244,15 +479,23 @@ def login_view(request):
         form = AuthenticationForm()
     return render(request, 'auth/login.html', {'form': form})
 
+@query_budget(4)
 def logout_view(request):
     logout(request)
     return redirect('about')
 
+@query_budget(7)
 @login_required
 def profile_view(request):
-    profile = request.user.profile
-    return render(request, 'auth/profile.html', {'profile': profile})
+    profile = get_object_or_404(
+        Profile.objects.select_related('user', 'organization').prefetch_related('keywords'),
+        user=request.user
+    )
+    context = {'profile': profile}
+    context.update(stats.user_stats(profile))
+    return render(request, 'auth/profile.html', context)
 
+@query_budget(23)
 @login_required
 def profile_edit(request):
     if request.method == 'POST':
@@ -264,52 +507,172 @@ def profile_edit(request):
         form = ProfileForm(instance=request.user.profile)
     return render(request, 'auth/profile_edit.html', {'form': form})
 
+@query_budget(7)
 @login_required
 def user_projects(request):
-    projects = (
+    projects_qs = (
         Project.objects
         .filter(posted_by=request.user.profile)
         .select_related('posted_by__user')
-        .prefetch_related('keywords', 'participants')
-        .order_by('-created_at')
+        .prefetch_related('keywords')
+        # A correlated count, not GROUP BY, so the (posted_by, created_at) index serves the ordering
+        .annotate(participant_count=stats.count_of(ProjectParticipant, 'project'))
     )
-    return render(request, 'projects/user_projects.html', {'projects': projects})
+    page = paginate(request, projects_qs, ('-created_at', '-id'))
+    return render(request, 'projects/user_projects.html', {'projects': page.object_list, 'page': page})
+
+def _export_response(request, export):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        raise Http404
+    # Rows are read and written while the response streams, after this view returns.
+    # ASGI needs an async iterator, or Django reads the whole export into memory first.
+    stream = exports.astream if isinstance(request, ASGIRequest) else exports.stream
+    response = StreamingHttpResponse(stream(export, fmt), content_type=exports.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{exports.filename(export, fmt)}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
+@query_budget(4)
+@login_required
+def export_projects(request):
+    """Staff export every project; everyone else exports the projects they posted."""
+    projects_qs = Project.objects.all()
+    if not request.user.is_staff:
+        projects_qs = projects_qs.filter(posted_by__user_id=request.user.id)
+    return _export_response(request, exports.projects(projects_qs))
+
+@query_budget(7)
 @login_required
 def my_applications(request):
-    applications = (
+    applications_qs = (
         ProjectParticipant.objects
         .filter(profile=request.user.profile)
         .select_related('project', 'project__posted_by__user')
-        .order_by('-applied_at')
     )
-    return render(request, 'projects/my_applications.html', {'applications': applications})
+    page = paginate(request, applications_qs, ('-applied_at', '-id'))
+    accepted_count, accepted_capped = bounded_count(applications_qs.filter(accepted=True))
+    return render(request, 'projects/my_applications.html', {
+        'applications': page.object_list,
+        'page': page,
+        'accepted_count': f"{accepted_count}+" if accepted_capped else accepted_count,
+    })
+
+APPLICATION_STATUSES = {
+    'accepted': Q(accepted=True),
+    'pending': Q(accepted=False),
+}
 
+@query_budget(6)
 @login_required
 def manage_applications(request, project_id):
-    project = get_object_or_404(Project, id=project_id)
-    if project.posted_by.user != request.user:
+    project = get_object_or_404(Project.objects.select_related('posted_by'), id=project_id)
+    if project.posted_by.user_id != request.user.id:
         context = {
             'message': _("You don't have permission to manage applications for this project."),
             'action_url': 'project_list',
             'action_text': _("Browse Projects"),
         }
         return render(request, 'projects/permission_denied.html', context)
-    applications = ProjectParticipant.objects.filter(project=project)
-    return render(request, 'projects/manage_applications.html', {'applications': applications, 'project': project})
+    applications_qs = ProjectParticipant.objects.filter(project=project)
+    counts = applications_qs.aggregate(
+        total=Count('pk'),
+        accepted=Count('pk', filter=Q(accepted=True)),
+    )
+    counts['pending'] = counts['total'] - counts['accepted']
+    status = request.GET.get('status', '')
+    if status in APPLICATION_STATUSES:
+        applications_qs = applications_qs.filter(APPLICATION_STATUSES[status])
+    else:
+        status = ''
+    page = paginate(
+        request,
+        applications_qs.select_related('profile__user', 'profile__organization'),
+        ('-applied_at', '-id'),
+        count=False,
+    )
+    page.count = counts[status or 'total']
+    return render(request, 'projects/manage_applications.html', {
+        'applications': page.object_list,
+        'page': page,
+        'project': project,
+        'counts': counts,
+        'status': status,
+    })
+
+@query_budget(4)
+@login_required
+def export_applications(request, project_id):
+    project = get_object_or_404(Project.objects.select_related('posted_by'), id=project_id)
+    if project.posted_by.user_id != request.user.id and not request.user.is_staff:
+        context = {
+            'message': _("You don't have permission to export applications for this project."),
+            'action_url': 'project_list',
+            'action_text': _("Browse Projects"),
+        }
+        return render(request, 'projects/permission_denied.html', context)
+    return _export_response(request, exports.applications(project))
+
+def _decide_applications(project, action, application_ids):
+    """Accept or reject applications to ``project`` in one statement; returns how many changed."""
+    applications = ProjectParticipant.objects.filter(project=project, pk__in=application_ids)
+    with transaction.atomic():
+        if action == 'accept':
+            changed = applications.filter(accepted=False).update(accepted=True, joined_at=timezone.now())
+            if changed:
+                # update() sends no signals; version the project like a single save would
+                fragments.touch_projects([project.pk])
+        else:
+            _, deleted = applications.delete()
+            changed = deleted.get(ProjectParticipant._meta.label, 0)
+    return changed
+
+def _application_ids(values):
+    return [int(value) for value in values if value.isdigit()]
+
+@query_budget(8)
+@login_required
+def decide_applications(request, project_id):
+    project = get_object_or_404(Project.objects.select_related('posted_by'), id=project_id)
+    if project.posted_by.user_id != request.user.id:
+        context = {
+            'message': _("You don't have permission to manage applications for this project."),
+            'action_url': 'project_list',
+            'action_text': _("Browse Projects"),
+        }
+        return render(request, 'projects/permission_denied.html', context)
+    action = request.POST.get('action')
+    if request.method != 'POST' or action not in ('accept', 'reject'):
+        messages.error(request, _("Invalid request method."))
+        return redirect('manage_applications', project_id=project.id)
+    changed = _decide_applications(project, action, _application_ids(request.POST.getlist('application_ids')))
+    if action == 'accept':
+        messages.success(request, _("%(count)d application(s) accepted.") % {'count': changed})
+    else:
+        messages.success(request, _("%(count)d application(s) rejected.") % {'count': changed})
+    url = reverse('manage_applications', args=[project.id])
+    status = request.POST.get('status')
+    if status in APPLICATION_STATUSES:
+        url += '?status=' + status
+    return redirect(url)
+
+def _decide_one(request, application_id, action):
+    application = get_object_or_404(
+        ProjectParticipant.objects.select_related('project__posted_by'), id=application_id
+    )
+    project = application.project
+    if request.method != 'POST':
+        messages.error(request, _("Invalid request method."))
+    elif project.posted_by.user_id == request.user.id:
+        _decide_applications(project, action, [application.pk])
+    return redirect('manage_applications', project_id=project.id)
 
+@query_budget(8)
 @login_required
 def accept_application(request, application_id):
-    application = get_object_or_404(ProjectParticipant, id=application_id)
-    if application.project.posted_by.user == request.user:
-        application.accepted = True
-        application.joined_at = timezone.now()
-        application.save()
-    return redirect('manage_applications', project_id=application.project.id)
+    return _decide_one(request, application_id, 'accept')
 
+@query_budget(8)
 @login_required
 def reject_application(request, application_id):
-    application = get_object_or_404(ProjectParticipant, id=application_id)
-    if application.project.posted_by.user == request.user:
-        application.delete()
-    return redirect('manage_applications', project_id=application.project.id)
+    return _decide_one(request, application_id, 'reject')
@@ -1,5 +1,6 @@
 ﻿from pathlib import Path
 import os
+import tempfile
 
 import dj_database_url
 
@@ -49,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.QueryBudgetMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -103,6 +106,20 @@ else:
         }
     }
 
+# Optional read replica (core.replicas): serves the reads of @replica_reads views.
+# After writing, a user reads from the primary for REPLICA_PIN_SECONDS.
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=600,
+        ssl_require=os.environ.get('DATABASE_SSL_REQUIRE', 'False').lower() in ('1', 'true', 'yes', 'on'),
+    )
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Off: keep the alias but serve every read from the primary (say, while the replica lags far behind)
+REPLICA_READS = os.environ.get('REPLICA_READS', 'True').lower() in ('1', 'true', 'yes', 'on')
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator', 'OPTIONS': {'min_length': 8}},
@@ -145,8 +162,12 @@ STORAGES = {
 }
 
 if not DEBUG:
+    # Content-hashed names served with far-future caching, plus .gz and (with Brotli installed) .br variants
     STORAGES['staticfiles']['BACKEND'] = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Standalone Tailwind CLI used by `manage.py build_assets` (core.assets); found on PATH when unset
+TAILWIND_CLI = os.environ.get('TAILWIND_CLI')
+
 # File upload constraints (used by DocumentForm validation)
 MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10 MB
 ALLOWED_FILE_TYPES = [
@@ -157,15 +178,89 @@ ALLOWED_FILE_TYPES = [
     'application/msword',
 ]
 
+# Background jobs (core.jobs), run by `manage.py run_worker`
+JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 4))
+JOB_POLL_INTERVAL = 1.0  # seconds between polls of an empty queue
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10  # seconds before the first retry, doubled for each further one
+JOB_RETRY_MAX_DELAY = 3600
+JOB_LEASE_SECONDS = 600  # a running job not renewed for this long is assumed lost and requeued
+JOB_KEEP_DONE_DAYS = 7
+
+# Document previews (core.previews): WebP widths, rendered by the job worker
+PREVIEW_ROOT = MEDIA_ROOT / 'previews'
+PREVIEW_SIZES = {'small': 240, 'large': 960}
+
+# Full-text project search (core.search)
+SEARCH_RESULTS_LIMIT = 200
+
+# Precomputed project suggestions per profile (core.suggestions)
+SUGGESTIONS_TOP_K = 20
+
+# Site-wide dashboard counters are recomputed at most this often (core.stats)
+DASHBOARD_STATS_TIMEOUT = 300
+
+# Upper bound on how stale a cached nav-badge unread count may be (core.unread)
+UNREAD_COUNT_CACHE_TIMEOUT = 300
+
+# Rendered project cards are versioned on updated_at; this only bounds unused entries (core.fragments)
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Live inbox over Server-Sent Events (core.live). Streams also poll because the
+# wake-up broker is per process; 0 disables polling when one worker serves all streams.
+LIVE_POLL_INTERVAL = int(os.environ.get('LIVE_POLL_INTERVAL', 30))
+LIVE_HEARTBEAT_INTERVAL = 15
+LIVE_STREAM_MAX_SECONDS = 300
+
+# Rows read per database round trip by the streaming exports (core.exports)
+EXPORT_CHUNK_SIZE = 2000
+
+# Keyset pagination (core.pagination)
+PAGINATE_BY = 20
+PAGINATION_COUNT_LIMIT = 1000
+
+# Per-view SQL query budgets (core.instrumentation). Strict mode raises instead of logging.
+QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED', str(DEBUG)).lower() in ('1', 'true', 'yes', 'on')
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', '').lower() in ('1', 'true', 'yes', 'on')
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'about'
 
+# Gunicorn runs several workers, so the cache must be shared between them or an
+# invalidation in one worker never reaches the others. REDIS_URL selects Redis
+# (needs the `redis` package), which evicts on its own and is the production
+# choice. Without it CACHE_BACKEND picks 'locmem' (default with DEBUG, for
+# runserver: per process, only for a single worker), 'file' (default otherwise: a directory
+# shared by every worker on the host) or 'db' (run `manage.py createcachetable`).
+# The file and db backends cull on every write: the file backend lists the
+# whole directory and the db backend counts the table, so each set() costs
+# O(CACHE_MAX_ENTRIES). The default limit is small for that reason; when more
+# entries are worth keeping (say the rendered project cards), use Redis rather
+# than raising it.
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if REDIS_URL else 'locmem' if DEBUG else 'file').lower()
+_cache_locations = {
+    'redis': REDIS_URL,
+    'file': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'kbtuneco-cache')),
+    'db': 'kbtuneco_cache',
+    'locmem': 'kbtuneco-cache',
+}
+_cache_backends = {
+    'redis': 'core.caching.RedisCache',
+    'file': 'core.caching.FileBasedCache',
+    'db': 'core.caching.DatabaseCache',
+    'locmem': 'core.caching.LocMemCache',
+}
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'kbtuneco-cache'
+        'BACKEND': _cache_backends[CACHE_BACKEND],
+        'LOCATION': _cache_locations[CACHE_BACKEND],
+        'KEY_PREFIX': 'kbtuneco',
+        'OPTIONS': {} if CACHE_BACKEND == 'redis' else {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 1000)),
+        },
     }
 }
 
@@ -1,30 +1,39 @@
+"""Compile the changed catalogs under locale/ without Django settings.
+
+Same as ``python manage.py compile_translations``; see core/translations.py.
+"""
 from pathlib import Path
+import argparse
 import sys
-import polib
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import translations  # noqa: E402
 
-def compile_all(locale_dir: str = "locale") -> int:
+
+def compile_all(locale_dir: str = "locale", workers: int | None = None, force: bool = False) -> int:
     base = Path(locale_dir)
     if not base.exists():
         print(f"[compile_translations] Locale directory not found: {base}")
         return 1
 
-    total = 0
-    for po_path in base.rglob("*.po"):
-        mo_path = po_path.with_suffix(".mo")
-        try:
-            po = polib.pofile(str(po_path))
-            mo_path.parent.mkdir(parents=True, exist_ok=True)
-            po.save_as_mofile(str(mo_path))
-            print(f"[compile_translations] Compiled {po_path} -> {mo_path}")
-            total += 1
-        except Exception as e:
-            print(f"[compile_translations] ERROR compiling {po_path}: {e}")
-            return 2
-
-    print(f"[compile_translations] Compiled {total} translation file(s).")
+    compiled, failures, total = translations.compile_all(base, workers, force)
+    for key in compiled:
+        print(f"[compile_translations] Compiled {base / key}")
+    for key, error in failures.items():
+        print(f"[compile_translations] ERROR compiling {base / key}: {error}")
+    if failures:
+        print(f"[compile_translations] {len(failures)} of {total} catalog(s) failed.")
+        return 2
+
+    print(f"[compile_translations] Compiled {len(compiled)} of {total} translation file(s); the rest were unchanged.")
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(compile_all())
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("locale_dir", nargs="?", default="locale")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+    sys.exit(compile_all(args.locale_dir, args.workers, args.force))
@@ -3,8 +3,25 @@ set -o errexit
 set -o nounset
 
 python manage.py migrate --noinput
+python manage.py createcachetable
 python manage.py ensure_superuser
+# Without the Tailwind CLI the committed bundle (or the CDN fallback) is used
+if [ -n "${TAILWIND_CLI:-}" ] || command -v tailwindcss >/dev/null; then
+  python manage.py build_assets
+fi
 python manage.py collectstatic --noinput
+# Only catalogs whose .po changed are recompiled, so this is near-free on most deploys
+python manage.py compile_translations
+python manage.py warm_cache
+
+# SERVER=asgi serves the live inbox stream without holding a worker per open inbox
+if [ "${SERVER:-wsgi}" = "asgi" ]; then
+  exec gunicorn kbtuneco.asgi:application \
+    --worker-class uvicorn.workers.UvicornWorker \
+    --bind 0.0.0.0:${PORT:-8000} \
+    --workers ${WEB_CONCURRENCY:-3} \
+    --timeout ${GUNICORN_TIMEOUT:-120}
+fi
 
 gunicorn kbtuneco.wsgi:application \
   --bind 0.0.0.0:${PORT:-8000} \
@@ -1,10 +1,40 @@
 import pytest
+from django.conf import settings as django_settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
 from django.test import RequestFactory
 from django.test.client import Client
 from core.models import Profile, Organization, Keyword, Project
 
 
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix, tmp_path_factory):
+    """Add a second, separate SQLite database as the read replica.
+
+    Routing to it is off (``REPLICA_READS``) except in the tests that turn it
+    on; they copy the primary into it first.
+    """
+    path = tmp_path_factory.mktemp('replica') / 'replica.sqlite3'
+    # The connection settings are loaded already; configure_settings() fills in the defaults
+    django_settings.DATABASES.update(connections.configure_settings({
+        'default': django_settings.DATABASES['default'],
+        'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(path), 'TEST': {'NAME': str(path)}},
+    }))
+    django_settings.REPLICA_READS = False
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    """Start every test with an empty, process-local cache."""
+    settings.CACHES = {
+        'default': {'BACKEND': 'core.caching.LocMemCache', 'LOCATION': 'kbtuneco-tests'},
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def rf():
     """RequestFactory fixture for testing views."""
@@ -0,0 +1,58 @@
+"""Pytest plugin enforcing the per-view query budgets of core.instrumentation.
+
+Loaded from pytest.ini (``-p tests.query_budget``). Every request made through
+the Django test client during the run is measured; a view that runs more
+queries than its ``@query_budget`` fails the test that requested it. The run
+ends with a table of the worst request seen per view.
+"""
+import pytest
+
+from core import instrumentation
+
+_worst = {}
+
+
+def _record(sender, view_name, budget, metrics, **kwargs):
+    seen = _worst.get(view_name)
+    if seen is None or metrics.queries > seen[1].queries:
+        _worst[view_name] = (budget, metrics)
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    """Measure every request and fail the test when a view exceeds its budget."""
+    settings.QUERY_BUDGET_ENABLED = True
+    settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture
+def measured_requests():
+    """List of ``(view_name, budget, metrics)`` for requests made during the test."""
+    measured = []
+
+    def receiver(sender, view_name, budget, metrics, **kwargs):
+        measured.append((view_name, budget, metrics))
+
+    instrumentation.request_measured.connect(receiver)
+    yield measured
+    instrumentation.request_measured.disconnect(receiver)
+
+
+def pytest_configure(config):
+    instrumentation.request_measured.connect(_record)
+
+
+def pytest_unconfigure(config):
+    instrumentation.request_measured.disconnect(_record)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _worst:
+        return
+    terminalreporter.section('query budgets')
+    terminalreporter.write_line('%-28s %8s %7s %9s %9s' % ('view', 'queries', 'budget', 'db ms', 'tpl ms'))
+    for view_name, (budget, metrics) in sorted(_worst.items()):
+        terminalreporter.write_line('%-28s %8d %7s %9.1f %9.1f' % (
+            view_name, metrics.queries, '-' if budget is None else budget,
+            metrics.db_time * 1000, metrics.template_time * 1000,
+        ))
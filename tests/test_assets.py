@@ -0,0 +1,118 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import Context, Template
+from core import assets
+
+
+@pytest.fixture
+def static_dir(tmp_path, settings):
+    settings.STATICFILES_DIRS = [tmp_path]
+    assets.bundle_built.cache_clear()
+    yield tmp_path
+    assets.bundle_built.cache_clear()
+
+
+def vendor(static_dir):
+    fonts = static_dir / 'vendor' / 'fonts'
+    icons = static_dir / 'vendor' / 'bootstrap-icons'
+    fonts.mkdir(parents=True)
+    icons.mkdir(parents=True)
+    (fonts / 'fonts.css').write_text("@font-face { font-family: 'Inter'; src: url(inter.woff2) format('woff2'); }")
+    (icons / 'bootstrap-icons.css').write_text(
+        '@font-face { font-family: "bootstrap-icons"; src: url("./fonts/bootstrap-icons.woff2?abc") format("woff2"); }\n'
+        '.bi::before, [class^="bi-"]::before { font-family: bootstrap-icons !important; }\n'
+        '.bi-person::before { content: "\\f4e1"; }\n'
+        '.bi-zzz-unused::before { content: "\\f000"; }\n'
+    )
+
+
+class TestAssetHelpers:
+    """Test cases for the pure helpers behind build_assets."""
+
+    def test_inline_styles_become_a_static_link(self):
+        """Test that <style> blocks are replaced by one link and {% load static %} is added."""
+        source = (
+            "{% extends 'base.html' %}\n{% block extra_css %}\n"
+            "<style>\n    .a { color: red; }\n</style>\n<style>.b { color: blue; }</style>\n{% endblock %}\n"
+        )
+        new_source, css = assets.extract_inline_styles(source, 'css/pages/x.css')
+        assert new_source.startswith("{% extends 'base.html' %}\n{% load static %}\n")
+        assert new_source.count('<link rel="stylesheet" href="{% static \'css/pages/x.css\' %}">') == 1
+        assert '<style' not in new_source
+        assert css == '.a { color: red; }\n\n.b { color: blue; }\n'
+
+    def test_styles_with_template_syntax_stay_inline(self):
+        """Test that a block rendered by the template engine is left alone."""
+        source = '<style>.a { color: {{ colour }}; }</style>\n'
+        assert assets.extract_inline_styles(source, 'css/pages/x.css') == (source, '')
+
+    def test_page_css_name(self):
+        """Test that the stylesheet is named after its template."""
+        assert assets.page_css_name('projects/project_detail.html') == 'css/pages/projects-project_detail.css'
+
+    def test_icon_css_is_purged_to_used_icons(self):
+        """Test that only the used icon rules survive, along with the shared ones."""
+        css = '.bi::before { font-family: x; }\n.bi-house::before { content: "a"; }\n.bi-star::before, .bi-x::before { content: "b"; }\n'
+        purged = assets.purge_icon_css(css, {'bi-house', 'bi-x'})
+        assert '.bi::before' in purged and '.bi-house::before' in purged and '.bi-x::before' in purged
+        assert 'bi-star' not in purged
+
+    def test_minify_css(self):
+        """Test that comments and insignificant whitespace are removed."""
+        assert assets.minify_css('/* c */\n.a , .b {\n  color: red ;\n}\n') == '.a,.b{color: red}'
+
+    def test_rebase_urls(self):
+        """Test that relative urls are prefixed and lose their cache-busting query."""
+        css = 'a{src:url("./fonts/i.woff2?123")} b{src:url(data:x)} c{src:url(/abs.png)}'
+        assert assets.rebase_urls(css, '../vendor/icons/') == (
+            'a{src:url("../vendor/icons/fonts/i.woff2")} b{src:url(data:x)} c{src:url(/abs.png)}'
+        )
+
+
+class TestSiteStylesheets:
+    """Test cases for the {% site_stylesheets %} tag."""
+
+    def render(self):
+        return Template('{% load assets %}{% site_stylesheets %}').render(Context())
+
+    def test_falls_back_to_cdn_before_the_build(self, static_dir):
+        """Test that the CDN tags are used while no bundle exists."""
+        assert 'cdn.tailwindcss.com' in self.render()
+
+    def test_links_the_built_bundle(self, static_dir):
+        """Test that the built bundle replaces every CDN tag."""
+        (static_dir / 'css').mkdir()
+        (static_dir / 'css' / 'site.css').write_text('.a{}')
+        html = self.render()
+        assert html == '<link rel="stylesheet" href="/static/css/site.css">'
+
+
+class TestBuildAssetsCommand:
+    """Test cases for the build_assets management command."""
+
+    def test_missing_tailwind_cli_is_an_error(self, static_dir, settings, monkeypatch):
+        """Test that the command explains how to get the Tailwind CLI."""
+        vendor(static_dir)
+        settings.TAILWIND_CLI = None
+        monkeypatch.delenv('TAILWIND_CLI', raising=False)
+        monkeypatch.setenv('PATH', str(static_dir))
+        with pytest.raises(CommandError, match='Tailwind CLI'):
+            call_command('build_assets', stdout=io.StringIO())
+
+    def test_builds_a_minified_bundle(self, static_dir, settings, tmp_path_factory):
+        """Test that fonts, purged icons and Tailwind output end up in one minified file."""
+        vendor(static_dir)
+        cli = tmp_path_factory.mktemp('bin') / 'tailwindcss'
+        cli.write_text('#!/bin/sh\nprintf ".text-primary {\\n  color: #2563eb;\\n}\\n"\n')
+        cli.chmod(0o755)
+        settings.TAILWIND_CLI = str(cli)
+        call_command('build_assets', stdout=io.StringIO())
+        bundle = (static_dir / 'css' / 'site.css').read_text()
+        assert 'url(../vendor/fonts/inter.woff2)' in bundle
+        assert 'url("../vendor/bootstrap-icons/fonts/bootstrap-icons.woff2")' in bundle
+        assert '.bi-person::before' in bundle and 'bi-zzz-unused' not in bundle
+        assert '.text-primary{color: #2563eb}' in bundle
+        assert '\n' not in bundle.strip()
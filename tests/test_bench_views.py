@@ -0,0 +1,95 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from core.management.commands import bench_views
+from core.urls import urlpatterns
+
+
+def result(**metrics):
+    return {'p95_ms': 10.0, 'queries': 5, 'bytes': 1000, **metrics}
+
+
+class TestCompare:
+    """Test cases for comparing benchmark results with a baseline."""
+
+    def test_within_tolerance_is_not_a_regression(self):
+        """Test that small latency and size changes are ignored."""
+        baseline = {'inbox@student': result()}
+        assert bench_views.compare(baseline, {'inbox@student': result(p95_ms=10.9, bytes=1100)}) == []
+
+    def test_slower_bigger_or_more_queries(self):
+        """Test that latency, size and query count regressions are all reported."""
+        baseline = {'inbox@student': result()}
+        current = {'inbox@student': result(p95_ms=20.0, queries=6, bytes=5000)}
+        assert {metric for _, metric, _, _ in bench_views.compare(baseline, current)} == {'p95_ms', 'queries', 'bytes'}
+
+    def test_sub_millisecond_noise_is_ignored(self):
+        """Test that fast routes need to slow down by min_ms before counting."""
+        baseline = {'about@anonymous': result(p95_ms=0.5)}
+        assert bench_views.compare(baseline, {'about@anonymous': result(p95_ms=1.2)}) == []
+
+    def test_new_routes_have_nothing_to_compare(self):
+        """Test that results missing from the baseline are skipped."""
+        assert bench_views.compare({}, {'inbox@student': result()}) == []
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        assert [bench_views.percentile(values, pct) for pct in (50, 95, 99)] == [50, 95, 99]
+        assert bench_views.percentile([7], 99) == 7
+
+
+def test_committed_baseline_covers_the_watched_pages():
+    """Test that the stored baseline the command compares with by default has the pages to watch."""
+    with open(bench_views.BASELINE) as fh:
+        baseline = json.load(fh)
+    assert {'project_list@student', 'dashboard@student', 'inbox@student'} <= set(baseline['results'])
+    assert baseline['meta']['rows']['Message'] > 0
+
+
+@pytest.mark.django_db
+class TestBenchViewsCommand:
+    """Test cases for the bench_views management command."""
+
+    def test_every_named_route_has_url_kwargs(self):
+        """Test that every route's URL arguments can be resolved by the harness."""
+        names = [name for name, _ in bench_views.routes()]
+        assert names == [pattern.name for pattern in urlpatterns if pattern.name]
+        for _, kwarg_names in bench_views.routes():
+            assert set(kwarg_names) <= set(bench_views.URL_KWARGS)
+
+    def test_writes_results_and_compares_baseline(self, profile, tmp_path):
+        """Test that results are written as JSON and a slower baseline run reports no regression."""
+        output = tmp_path / 'bench.json'
+        options = dict(routes=['about', 'dashboard'], requests=2, warmup=0, stdout=io.StringIO())
+        call_command('bench_views', output=str(output), **options)
+        results = json.loads(output.read_text())['results']
+        assert {'about@anonymous', 'dashboard@anonymous', 'dashboard@student'} <= set(results)
+        assert results['dashboard@student']['status'] == 200
+        assert results['dashboard@student']['queries'] > 0
+        assert results['dashboard@anonymous']['status'] == 302
+
+        baseline = json.loads(output.read_text())
+        for metrics in baseline['results'].values():
+            metrics['p95_ms'] *= 100
+        baseline_path = tmp_path / 'baseline.json'
+        baseline_path.write_text(json.dumps(baseline))
+        out = io.StringIO()
+        call_command('bench_views', output=str(output), baseline=str(baseline_path), **{**options, 'stdout': out})
+        assert 'No regressions against the baseline.' in out.getvalue()
+
+    def test_fail_on_regression(self, profile, tmp_path):
+        """Test that --fail-on-regression turns an extra query into an error."""
+        output = tmp_path / 'bench.json'
+        options = dict(routes=['dashboard'], user_types=['student'], requests=1, warmup=1, stdout=io.StringIO())
+        call_command('bench_views', output=str(output), **options)
+        baseline = json.loads(output.read_text())
+        baseline['results']['dashboard@student']['queries'] -= 1
+        baseline_path = tmp_path / 'baseline.json'
+        baseline_path.write_text(json.dumps(baseline))
+        with pytest.raises(CommandError):
+            call_command('bench_views', output=str(output), baseline=str(baseline_path),
+                         fail_on_regression=True, **options)
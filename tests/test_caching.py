@@ -0,0 +1,65 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import translation
+from core import caching, fragments, stats, unread
+from core.models import Project
+
+
+def worker_cache():
+    """A second backend instance over the same storage, as another worker would see it."""
+    return caching.LocMemCache('kbtuneco-tests', {})
+
+
+class TestCacheStats:
+    """Test cases for the hit/miss counting cache backends."""
+
+    def test_hits_and_misses_are_counted_per_family(self):
+        """Test that lookups are counted under the key's family."""
+        cache.set('unread:1', 3)
+        cache.get('unread:1')
+        cache.get('unread:2')
+        cache.get_many(['project-card:1', 'unread:1'])
+        assert cache.stats() == {
+            'project-card': {'hits': 0, 'misses': 1},
+            'unread': {'hits': 2, 'misses': 1},
+        }
+
+    def test_counts_are_shared_between_workers(self, monkeypatch):
+        """Test that counters flushed by one process are visible from another."""
+        monkeypatch.setattr(caching, 'STATS_FLUSH_EVERY', 2)
+        other = worker_cache()
+        cache.set('dashboard:global-stats', {})
+        other.get('dashboard:global-stats')
+        other.get('dashboard:missing')
+        assert caching.stats()['default'] == {'dashboard': {'hits': 1, 'misses': 1}}
+
+    def test_get_returns_default_on_miss(self):
+        """Test that the wrapper keeps get()'s default and falsy-value behaviour."""
+        cache.set('unread:1', 0)
+        assert cache.get('unread:1', 'default') == 0
+        assert cache.get('unread:2', 'default') == 'default'
+
+    def test_reset_clears_counters(self):
+        """Test that reset_stats() starts the counters over."""
+        cache.get('unread:1')
+        cache.reset_stats()
+        assert cache.stats() == {}
+
+
+@pytest.mark.django_db
+class TestWarmCache:
+    """Test cases for the warm_cache management command."""
+
+    def test_warm_cache_fills_stats_badges_and_cards(self, profile):
+        """Test that the command caches dashboard stats, unread counts and project cards."""
+        project = Project.objects.create(
+            title='Warm project', description='Description', project_type='research', posted_by=profile
+        )
+        call_command('warm_cache', stdout=open('/dev/null', 'w'))
+        assert cache.get(stats.GLOBAL_STATS_KEY)['total_projects'] == 1
+        assert cache.get(unread.cache_key(profile.user_id)) == 0
+        project.refresh_from_db()
+        with translation.override('fr'):
+            assert cache.get(fragments.card_key(project, 'fr', 'n')) is not None
+        assert cache.get(fragments.card_key(project, 'en', '-')) is not None
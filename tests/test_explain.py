@@ -0,0 +1,87 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, Q
+from core import explain
+from core.models import Event, Project, ProjectParticipant
+
+
+def sql_of(queryset):
+    return queryset.query.sql_with_params()
+
+
+@pytest.mark.django_db
+class TestProposals:
+    """Test cases for turning statements into index proposals."""
+
+    def test_equality_then_ordering(self, profile):
+        """Test that equality columns come first, followed by the ORDER BY columns."""
+        sql, _ = sql_of(ProjectParticipant.objects.filter(profile=profile).order_by('-applied_at', '-id'))
+        assert explain.propose(sql, 'core_projectparticipant') == [
+            ('profile_id', False), ('applied_at', True), ('id', True),
+        ]
+
+    def test_subquery_aliases_resolve_to_tables(self, profile):
+        """Test that columns referenced through U0-style aliases map to their table."""
+        applied = ProjectParticipant.objects.filter(project=1, profile=profile)
+        sql, _ = sql_of(Project.objects.filter(pk__in=applied.values('project')))
+        assert explain.table_aliases(sql)['U0'] == 'core_projectparticipant'
+        assert set(explain.propose(sql, 'core_projectparticipant')) == {('project_id', False), ('profile_id', False)}
+
+    def test_conditional_aggregates_are_not_predicates(self):
+        """Test that FILTER (WHERE ...) inside an aggregate does not suggest an index."""
+        sql = str(Project.objects.values('pk').annotate(n=Count('pk', filter=Q(status='open'))).query)
+        assert explain.propose(sql, 'core_project') == []
+
+    def test_existing_indexes_cover_proposals(self):
+        """Test that a proposal already served by an index prefix is recognised."""
+        indexes = explain.existing_indexes(ProjectParticipant)
+        assert explain.covered([('project_id', False), ('profile_id', False)], indexes)
+        assert explain.covered([('profile_id', False), ('applied_at', True)], indexes)
+        assert not explain.covered([('role', False)], indexes)
+
+    def test_as_index_uses_field_names(self):
+        """Test that proposals are expressed with model field names and directions."""
+        index = explain.as_index(Event, [('organizer_id', False), ('start', True)])
+        assert index.fields == ['organizer', '-start']
+        assert index.name
+
+
+@pytest.mark.django_db
+class TestPlans:
+    """Test cases for reading EXPLAIN output."""
+
+    def test_unindexed_ordering_is_a_sort(self):
+        """Test that ordering on an unindexed column is flagged as a sort."""
+        sql, params = sql_of(Project.objects.order_by('title')[:5])
+        findings = explain.inspect(sql, params)
+        assert ('sort', 'core_project') in [(finding.kind, finding.table) for finding in findings]
+
+    def test_indexed_ordering_is_clean(self):
+        """Test that the list views' orderings are served by the indexes from migration 0007."""
+        for queryset in (Project.objects.order_by('-created_at', '-id')[:5], Event.objects.order_by('start', 'id')[:5]):
+            sql, params = sql_of(queryset)
+            assert explain.inspect(sql, params) == []
+
+    def test_capture_records_selects(self):
+        """Test that capture() keeps SELECT statements with their parameters."""
+        with explain.capture() as statements:
+            list(Project.objects.filter(title='x'))
+        assert len(statements) == 1
+        assert statements[0][1] == ('x',)
+
+
+@pytest.mark.django_db
+class TestIndexAdvisorCommand:
+    """Test cases for the index_advisor management command."""
+
+    def test_views_need_no_new_indexes(self, profile):
+        """Test that the current views run without unindexed scans or sorts to fix."""
+        project = Project.objects.create(
+            title='Indexed', description='Description', project_type='research', posted_by=profile
+        )
+        ProjectParticipant.objects.create(project=project, profile=profile)
+        out = io.StringIO()
+        call_command('index_advisor', user=profile.user.username, stdout=out)
+        assert 'No new indexes to propose.' in out.getvalue()
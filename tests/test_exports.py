@@ -0,0 +1,157 @@
+import csv
+import datetime
+import io
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from core import exports
+from core.models import Event, EventParticipant, Organization, Profile, Project, ProjectParticipant
+
+
+def make_profile(username, **kwargs):
+    user = User.objects.create_user(username, f'{username}@example.com', 'pass')
+    return Profile.objects.create(user=user, **kwargs)
+
+
+def body(response):
+    assert response.streaming
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.fixture
+def project(profile):
+    project = Project.objects.create(
+        title='=HYPERLINK("x")', description='Description', project_type='research', posted_by=profile
+    )
+    for n in range(3):
+        ProjectParticipant.objects.create(project=project, profile=make_profile(f'applicant{n}'))
+    return project
+
+
+@pytest.mark.django_db
+class TestExports:
+    """Test cases for the streaming export rows."""
+
+    def test_rows_come_from_one_query(self, project):
+        """Test that related columns are joined up front rather than fetched per row."""
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(exports.rows(exports.applications(project), chunk_size=1))
+        assert len(rows) == 3
+        assert len(queries) == 1
+        assert {row[1] for row in rows} == {'applicant0', 'applicant1', 'applicant2'}
+
+    def test_csv_has_header_and_neutralises_formulas(self, project):
+        """Test that CSV output has a header row and cannot inject spreadsheet formulas."""
+        reader = list(csv.reader(io.StringIO(''.join(exports.lines(exports.projects(), 'csv')))))
+        assert reader[0][:3] == ['id', 'title', 'type']
+        assert reader[1][1] == '\'=HYPERLINK("x")'
+        assert reader[1][reader[0].index('applications')] == '3'
+
+    def test_jsonl_is_one_object_per_line(self, project):
+        """Test that JSON Lines output is one JSON object per row."""
+        lines = list(exports.lines(exports.applications(project), 'jsonl'))
+        records = [json.loads(line) for line in lines]
+        assert len(records) == 3
+        assert set(records[0]) >= {'username', 'accepted', 'applied_at'}
+
+    def test_stream_joins_lines_into_blocks(self, project):
+        """Test that the response is written in blocks, not one write per row."""
+        blocks = list(exports.stream(exports.applications(project), 'csv', block_size=10 ** 6))
+        assert len(blocks) == 1
+        assert blocks[0].count('\n') == 4
+
+
+@pytest.mark.django_db
+class TestExportViews:
+    """Test cases for the export endpoints."""
+
+    def test_owner_exports_applications(self, authenticated_client, project):
+        """Test that the project owner downloads the applications as a CSV attachment."""
+        response = authenticated_client.get(reverse('export_applications', args=[project.id]))
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/csv')
+        assert f'project-{project.id}-applications.csv' in response['Content-Disposition']
+        assert body(response).count('\n') == 4
+
+    def test_other_users_cannot_export_applications(self, project):
+        """Test that someone else's applications are not exported."""
+        other = make_profile('other')
+        client = Client()
+        client.force_login(other.user)
+        response = client.get(reverse('export_applications', args=[project.id]))
+        assert not response.streaming
+        assert b'permission' in response.content
+
+    def test_projects_export_is_limited_to_own_projects(self, authenticated_client, project):
+        """Test that non-staff users only export the projects they posted."""
+        Project.objects.create(title='Not mine', description='D', project_type='pfe', posted_by=make_profile('poster'))
+        response = authenticated_client.get(reverse('export_projects') + '?format=jsonl')
+        records = [json.loads(line) for line in body(response).splitlines()]
+        assert [record['id'] for record in records] == [project.id]
+
+    def test_unknown_format_is_404(self, authenticated_client):
+        """Test that only the supported formats are served."""
+        assert authenticated_client.get(reverse('export_projects') + '?format=xlsx').status_code == 404
+
+    def test_event_participants_for_organizer_members(self, authenticated_client, profile):
+        """Test that members of the organizing organization can export participants, others cannot."""
+        organization = Organization.objects.create(name='Org', org_type='university')
+        start = timezone.now() + datetime.timedelta(days=1)
+        event = Event.objects.create(title='Workshop', organizer=organization, start=start, end=start)
+        EventParticipant.objects.create(event=event, profile=make_profile('attendee'))
+        url = reverse('export_event_participants', args=[event.id])
+        assert not authenticated_client.get(url).streaming
+
+        profile.organization = organization
+        profile.save()
+        response = authenticated_client.get(url)
+        assert 'attendee' in body(response)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_asgi_exports_stream_block_by_block(profile, project, settings):
+    """Test that under ASGI the response iterates asynchronously instead of buffering the whole export."""
+    settings.EXPORT_CHUNK_SIZE = 1
+    client = AsyncClient()
+    client.force_login(profile.user)
+
+    async def scenario():
+        response = await client.get(reverse('export_applications', args=[project.id]) + '?format=jsonl')
+        assert response.is_async
+        return [chunk async for chunk in response.streaming_content]
+
+    chunks = async_to_sync(scenario)()
+    assert b''.join(chunks).decode().count('\n') == 3
+
+
+@pytest.mark.django_db
+class TestExportCommand:
+    """Test cases for the export management command."""
+
+    def test_writes_file(self, project, tmp_path):
+        """Test that the command writes the export to a file."""
+        output = tmp_path / 'applications.jsonl'
+        call_command('export', 'applications', project=project.id, format='jsonl', output=str(output),
+                     stderr=io.StringIO())
+        assert len(output.read_text().splitlines()) == 3
+
+    def test_counts_rows_not_lines(self, project, tmp_path):
+        """Test that the reported total counts CSV records, even those spanning several lines."""
+        Project.objects.filter(pk=project.pk).update(title='Two\nlines')
+        err = io.StringIO()
+        call_command('export', 'projects', output=str(tmp_path / 'projects.csv'), stderr=err)
+        assert 'Wrote 1 rows' in err.getvalue()
+
+    def test_stdout(self, project):
+        """Test that the command streams to stdout by default."""
+        out = io.StringIO()
+        call_command('export', 'projects', stdout=out)
+        assert out.getvalue().startswith('id,title,')
@@ -0,0 +1,160 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import translation
+from core import fragments
+from core.models import Keyword, Profile, Project, ProjectParticipant
+
+
+@pytest.fixture
+def project(profile, keyword):
+    project = Project.objects.create(
+        title='Test Project', description='A test project description',
+        project_type='research', posted_by=profile
+    )
+    project.keywords.add(keyword)
+    return project
+
+
+@pytest.fixture
+def card_request(rf, user, profile):
+    request = rf.get('/projects/')
+    request.user = user
+    return request
+
+
+def load(project_id, **annotations):
+    project = Project.objects.select_related('posted_by__user').get(pk=project_id)
+    for name, value in annotations.items():
+        setattr(project, name, value)
+    return project
+
+
+@pytest.mark.django_db
+class TestProjectCards:
+    """Test cases for the cached project card fragments."""
+
+    def test_second_render_is_served_from_cache(self, card_request, project, django_assert_num_queries):
+        """Test that a cached card is reassembled without touching the database."""
+        first = fragments.render_cards(card_request, [load(project.pk)])
+        assert 'Test Project' in first[0] and 'Python Programming' in first[0]
+        again = load(project.pk)
+        with django_assert_num_queries(0):
+            [card] = fragments.render_cards(card_request, [again])
+        assert 'Python Programming' in card
+
+    def test_keyword_changes_invalidate_card(self, card_request, project, keyword):
+        """Test that adding or renaming a keyword produces a fresh card."""
+        fragments.render_cards(card_request, [load(project.pk)])
+        project.keywords.add(Keyword.objects.create(code='ml', label='Machine Learning'))
+        [card] = fragments.render_cards(card_request, [load(project.pk)])
+        assert 'Machine Learning' in card
+        keyword.label = 'Python 3'
+        keyword.save()
+        [card] = fragments.render_cards(card_request, [load(project.pk)])
+        assert 'Python 3' in card and 'Python Programming' not in card
+
+    def test_project_save_invalidates_card(self, card_request, project):
+        """Test that saving the project versions its card."""
+        fragments.render_cards(card_request, [load(project.pk)])
+        project.title = 'Renamed Project'
+        project.save()
+        [card] = fragments.render_cards(card_request, [load(project.pk)])
+        assert 'Renamed Project' in card
+
+    def test_card_varies_on_viewer_and_language(self, card_request, project):
+        """Test that applied state and language get their own cards."""
+        [apply] = fragments.render_cards(card_request, [load(project.pk, user_has_applied=False)])
+        [withdraw] = fragments.render_cards(card_request, [load(project.pk, user_has_applied=True)])
+        assert reverse('project_apply', args=[project.pk]) in apply
+        assert reverse('project_withdraw', args=[project.pk]) in withdraw
+        card_request.user = AnonymousUser()
+        [anonymous] = fragments.render_cards(card_request, [load(project.pk)])
+        assert '<form' not in anonymous
+        with translation.override('fr'):
+            [french] = fragments.render_cards(card_request, [load(project.pk)])
+        assert french != anonymous
+        assert cache.get(fragments.card_key(load(project.pk), 'fr', '-')) is not None
+
+    def test_csrf_token_is_not_cached(self, card_request, project):
+        """Test that the per-request CSRF token is substituted after the cache."""
+        [card] = fragments.render_cards(card_request, [load(project.pk, user_has_applied=False)])
+        token = card_request.META['CSRF_COOKIE']
+        assert fragments.CSRF_PLACEHOLDER not in card
+        cached = cache.get(fragments.card_key(load(project.pk), translation.get_language(), 'n'))
+        assert fragments.CSRF_PLACEHOLDER in cached and token not in cached
+
+    def test_project_list_renders_cards(self, authenticated_client, project):
+        """Test that the project list page is assembled from cards."""
+        response = authenticated_client.get(reverse('project_list'))
+        assert response.status_code == 200
+        assert len(response.context['cards']) == 1
+        assert 'Test Project' in response.content.decode()
+
+
+@pytest.mark.django_db
+class TestApplyFragments:
+    """Test cases for apply/withdraw answering with the card's button."""
+
+    def post(self, client, name, project, **headers):
+        return client.post(reverse(name, args=[project.pk]), secure=True, headers=headers)
+
+    def test_json_apply_returns_withdraw_button(self, authenticated_client, profile, project):
+        """Test that a fetch() apply gets JSON with the swapped button, not a redirect."""
+        response = self.post(authenticated_client, 'project_apply', project, Accept='application/json')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['applied'] is True
+        assert reverse('project_withdraw', args=[project.pk]) in data['html']
+        assert 'data-apply-slot' in data['html'] and 'csrfmiddlewaretoken' in data['html']
+        assert project.projectparticipant_set.filter(profile=profile).count() == 1
+
+    def test_htmx_withdraw_returns_apply_button(self, authenticated_client, profile, project):
+        """Test that an htmx withdraw gets the bare button fragment."""
+        self.post(authenticated_client, 'project_apply', project)
+        response = self.post(authenticated_client, 'project_withdraw', project, **{'HX-Request': 'true'})
+        html = response.content.decode()
+        assert reverse('project_apply', args=[project.pk]) in html
+        assert '<html' not in html
+        assert not project.projectparticipant_set.exists()
+
+    def test_applying_twice_is_idempotent(self, authenticated_client, profile, project):
+        """Test that a repeated apply inserts nothing and says so."""
+        self.post(authenticated_client, 'project_apply', project, Accept='application/json')
+        response = self.post(authenticated_client, 'project_apply', project, Accept='application/json')
+        assert response.json()['message'] == 'You have already applied to this project.'
+        assert project.projectparticipant_set.count() == 1
+
+    def test_applying_leaves_the_project_row_alone(self, authenticated_client, profile, project):
+        """Test that applications and withdrawals do not write to the project (its pages show members only)."""
+        before = Project.objects.get(pk=project.pk).updated_at
+        self.post(authenticated_client, 'project_apply', project, Accept='application/json')
+        self.post(authenticated_client, 'project_withdraw', project, Accept='application/json')
+        assert Project.objects.get(pk=project.pk).updated_at == before
+
+    def test_member_changes_retire_the_cached_card(self, profile, project):
+        """Test that accepting a participant, and removing a member, bump the project."""
+        participant = ProjectParticipant.apply(project, profile)
+        before = Project.objects.get(pk=project.pk).updated_at
+        participant.accepted = True
+        participant.save()
+        accepted = Project.objects.get(pk=project.pk).updated_at
+        assert accepted > before
+        participant.delete()
+        assert Project.objects.get(pk=project.pk).updated_at > accepted
+
+    def test_plain_posts_still_redirect(self, authenticated_client, profile, project):
+        """Test that forms without JavaScript keep the redirect and flash message."""
+        response = self.post(authenticated_client, 'project_apply', project)
+        assert response.status_code == 302
+        assert response['Location'].endswith(reverse('project_list'))
+
+    def test_refusals_carry_a_status(self, client, project):
+        """Test that a non-applicant's fetch() gets an error status and no buttons."""
+        company = User.objects.create_user('acme', 'acme@example.com', 'pass')
+        Profile.objects.create(user=company, user_type='company')
+        client.login(username='acme', password='pass')
+        response = self.post(client, 'project_apply', project, Accept='application/json')
+        assert response.status_code == 403
+        assert '<form' not in response.json()['html']
@@ -0,0 +1,183 @@
+import io
+import time
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from core import jobs
+from core.models import Job
+
+calls = []
+
+
+@jobs.register('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@jobs.register('tests.fail')
+def fail():
+    raise RuntimeError('boom')
+
+
+@jobs.register('tests.slow')
+def slow(seconds):
+    time.sleep(seconds)
+    # Another worker's housekeeping, while this job is still running
+    calls.append(jobs.requeue_stale())
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+class TestJobs:
+    """Test cases for queueing and running background jobs."""
+
+    def test_enqueued_job_runs_and_is_timed(self):
+        """Test that a queued job runs once with its payload and records its timing."""
+        job = jobs.enqueue('tests.record', {'value': 3})
+        assert jobs.run_pending() == 1
+        assert calls == [3]
+        job.refresh_from_db()
+        assert job.status == Job.DONE
+        assert job.attempts == 1
+        assert job.duration_ms is not None and job.wait_ms is not None
+
+    def test_unknown_job_name_is_rejected(self):
+        """Test that only registered job names can be queued."""
+        with pytest.raises(KeyError):
+            jobs.enqueue('tests.missing')
+
+    def test_delayed_jobs_wait_for_run_at(self):
+        """Test that a delayed job is not claimed before its time."""
+        jobs.enqueue('tests.record', {'value': 1}, delay=timedelta(minutes=5))
+        assert jobs.run_pending() == 0
+
+    def test_higher_priority_runs_first(self):
+        """Test that claims prefer higher priority jobs."""
+        jobs.enqueue('tests.record', {'value': 'low'})
+        jobs.enqueue('tests.record', {'value': 'high'}, priority=5)
+        jobs.run_pending()
+        assert calls == ['high', 'low']
+
+    def test_failures_are_retried_with_backoff(self, settings):
+        """Test that a failed job is requeued later with growing delays, then marked failed."""
+        settings.JOB_RETRY_DELAY = 10
+        job = jobs.enqueue('tests.fail', max_attempts=2)
+        jobs.run_pending()
+        job.refresh_from_db()
+        assert job.status == Job.QUEUED
+        assert 'RuntimeError: boom' in job.last_error
+        assert timedelta(seconds=7) < job.run_at - timezone.now() < timedelta(seconds=13)
+        Job.objects.update(run_at=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (Job.FAILED, 2)
+
+    def test_backoff_doubles_and_is_capped(self, settings):
+        """Test that the retry delay doubles per attempt up to the maximum."""
+        settings.JOB_RETRY_DELAY, settings.JOB_RETRY_MAX_DELAY = 10, 60
+        assert 32 <= jobs.backoff(3) <= 48
+        assert jobs.backoff(10) <= 72
+
+    def test_claimed_jobs_are_not_handed_out_twice(self):
+        """Test that a job claimed by one worker is invisible to the next."""
+        jobs.enqueue('tests.record', {'value': 1})
+        assert len(jobs.claim('a')) == 1
+        assert jobs.claim('b') == []
+
+    def test_lost_jobs_are_requeued_after_their_lease(self, settings):
+        """Test that a running job whose worker vanished is handed out again."""
+        settings.JOB_LEASE_SECONDS = 60
+        jobs.enqueue('tests.record', {'value': 1})
+        jobs.claim('dead-worker')
+        assert jobs.requeue_stale() == 0
+        Job.objects.update(started_at=timezone.now() - timedelta(minutes=2))
+        assert jobs.requeue_stale() == 1
+        assert jobs.run_pending() == 1
+
+    def test_lost_jobs_without_attempts_left_fail(self, settings):
+        """Test that a job that keeps killing its worker is failed instead of requeued forever."""
+        settings.JOB_LEASE_SECONDS = 60
+        job = jobs.enqueue('tests.record', {'value': 1}, max_attempts=1)
+        jobs.claim('dead-worker')
+        Job.objects.update(started_at=timezone.now() - timedelta(minutes=2))
+        assert jobs.requeue_stale() == 0
+        job.refresh_from_db()
+        assert job.status == Job.FAILED
+        assert 'Lease expired' in job.last_error
+        assert jobs.run_pending() == 0
+
+    def test_finished_jobs_are_pruned(self, settings):
+        """Test that old completed jobs are deleted and failed ones kept."""
+        settings.JOB_KEEP_DONE_DAYS = 1
+        old = timezone.now() - timedelta(days=2)
+        Job.objects.bulk_create([
+            Job(name='tests.record', status=Job.DONE, finished_at=old),
+            Job(name='tests.record', status=Job.FAILED, finished_at=old),
+        ])
+        assert jobs.prune_finished() == 1
+        assert Job.objects.get().status == Job.FAILED
+
+    def test_jobs_queued_in_a_rolled_back_transaction_never_run(self):
+        """Test that the job row shares the caller's transaction."""
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                jobs.enqueue('tests.record', {'value': 1})
+                raise RuntimeError
+        assert not Job.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRunWorkerCommand:
+    """Test cases for the run_worker management command."""
+
+    def test_once_drains_the_queue(self):
+        """Test that --once runs every ready job with a thread pool and exits."""
+        for n in range(5):
+            jobs.enqueue('tests.record', {'value': n})
+        call_command('run_worker', '--once', '--threads', '2', stdout=io.StringIO())
+        assert sorted(calls) == list(range(5))
+
+    def test_threads_run_each_job_once(self):
+        """Test that threads claiming in parallel never run the same job twice."""
+        Job.objects.bulk_create([Job(name='tests.record', payload={'value': n}) for n in range(40)])
+        call_command('run_worker', '--once', '--threads', '4', stdout=io.StringIO(), stderr=io.StringIO())
+        assert sorted(calls) == list(range(40))
+        assert Job.objects.filter(status=Job.DONE).count() == 40
+
+    def test_running_jobs_renew_their_lease(self, settings):
+        """Test that a job running longer than the lease is not handed out a second time."""
+        settings.JOB_LEASE_SECONDS = 0.3
+        job = jobs.enqueue('tests.slow', {'seconds': 0.8})
+        assert jobs.run_pending() == 1
+        assert calls == [0]
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (Job.DONE, 1)
+
+    def test_stats(self):
+        """Test that --stats reports counts per job name."""
+        jobs.enqueue('tests.record', {'value': 1})
+        jobs.run_pending()
+        out = io.StringIO()
+        call_command('run_worker', '--stats', stdout=out)
+        assert 'tests.record' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_password_reset_mail_is_sent_by_a_job(client, user):
+    """Test that requesting a reset queues the mail instead of sending it in the request."""
+    response = client.post(reverse('password_reset'), {'email': user.email}, secure=True)
+    assert response.status_code == 302
+    assert mail.outbox == []
+    assert Job.objects.get().name == 'send_mail'
+    jobs.run_pending()
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == [user.email]
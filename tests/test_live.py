@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.urls import reverse
+from core import live
+from core.models import Message, Profile
+
+
+def parse_events(body):
+    """Return ``[(event, data)]`` for the named events in an SSE body."""
+    events = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':') and ': ' in line)
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+@pytest.fixture
+def sender():
+    user = User.objects.create_user(username='sender', password='testpass123')
+    return Profile.objects.create(user=user, user_type='researcher')
+
+
+class TestBroker:
+    """Test cases for the in-process wake-up broker."""
+
+    def test_publish_from_another_thread_wakes_subscribers(self):
+        """Test that a publish wakes every subscription for the key, and only those."""
+        broker = live.Broker()
+
+        async def scenario():
+            with broker.subscribe(1) as first, broker.subscribe(1) as second, broker.subscribe(2) as other:
+                assert broker.subscriber_count() == 3
+                thread = threading.Thread(target=broker.publish, args=(1,))
+                thread.start()
+                woken = await asyncio.gather(first.wait(1), second.wait(1), other.wait(0.05))
+                thread.join()
+            return woken
+
+        assert async_to_sync(scenario)() == [True, True, False]
+        assert broker.subscriber_count() == 0
+
+
+@pytest.mark.django_db
+class TestInboxStream:
+    """Test cases for the live inbox stream."""
+
+    def test_wsgi_answers_once_with_new_messages(self, authenticated_client, profile, sender):
+        """Test that under WSGI the stream returns what is new and asks the client to retry."""
+        old = Message.objects.create(sender=sender, recipient=profile, subject='Old', body='Seen')
+        Message.objects.create(sender=sender, recipient=profile, subject='Hello', body='New one')
+        response = authenticated_client.get(reverse('inbox_stream'), HTTP_LAST_EVENT_ID=str(old.pk))
+        assert response['Content-Type'] == 'text/event-stream'
+        body = response.content.decode()
+        assert body.startswith('retry: ')
+        events = parse_events(body)
+        assert [event for event, _ in events] == ['message', 'unread']
+        assert events[0][1]['subject'] == 'Hello'
+        assert events[0][1]['sender'] == 'sender'
+        assert events[1][1] == {'count': 2}
+
+    def test_stream_requires_login(self, client):
+        """Test that anonymous users are redirected to login."""
+        response = client.get(reverse('inbox_stream'))
+        assert response.status_code == 302
+
+    def test_inbox_starts_stream_after_newest_message(self, authenticated_client, profile, sender):
+        """Test that the first inbox page hands the newest shown id to the stream."""
+        message = Message.objects.create(sender=sender, recipient=profile, subject='Hi', body='Body')
+        response = authenticated_client.get(reverse('inbox'))
+        assert response.context['stream_after'] == message.pk
+        assert f"{reverse('inbox_stream')}?after={message.pk}" in response.content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncStream:
+    """Test cases for the held stream served under ASGI."""
+
+    def test_new_message_wakes_stream(self, profile, sender, settings):
+        """Test that saving a message pushes it to an open stream without waiting for a poll."""
+        settings.LIVE_POLL_INTERVAL = 0
+        settings.LIVE_HEARTBEAT_INTERVAL = 5
+        settings.LIVE_STREAM_MAX_SECONDS = 5
+
+        async def scenario():
+            chunks = live.stream(profile.user_id, profile.pk, 0, sync_to_async(live.poll))
+            assert (await anext(chunks)).startswith('retry: ')
+            assert parse_events(await anext(chunks)) == [('unread', {'count': 0})]
+            pending = asyncio.ensure_future(anext(chunks))
+            await sync_to_async(Message.objects.create)(sender=sender, recipient=profile, subject='Ping', body='Pong')
+            first = await asyncio.wait_for(pending, 2)
+            second = await asyncio.wait_for(anext(chunks), 2)
+            await chunks.aclose()
+            return parse_events(first + second)
+
+        events = async_to_sync(scenario)()
+        assert [event for event, _ in events] == ['message', 'unread']
+        assert events[0][1]['subject'] == 'Ping'
+        assert events[1][1] == {'count': 1}
+
+    def test_asgi_view_streams_events(self, profile, sender, settings):
+        """Test that the view returns a streaming response under ASGI."""
+        settings.LIVE_STREAM_MAX_SECONDS = 0
+        Message.objects.create(sender=sender, recipient=profile, subject='Hello', body='Body')
+        client = AsyncClient()
+        client.force_login(profile.user)
+
+        async def scenario():
+            response = await client.get(reverse('inbox_stream'), {'after': 0})
+            assert response.streaming
+            return ''.join([chunk.decode() async for chunk in response.streaming_content])
+
+        events = parse_events(async_to_sync(scenario)())
+        assert [event for event, _ in events] == ['message', 'unread']
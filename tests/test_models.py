@@ -2,7 +2,11 @@ import pytest
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
-from core.models import Profile, Organization, Keyword, Project, Message, Document, Event, ProjectParticipant
+from core import unread
+from core.models import (
+    Profile, Organization, Keyword, Project, Message, Document, Event, ProjectParticipant,
+    Conversation, ConversationParticipant,
+)
 
 
 @pytest.mark.django_db
@@ -188,3 +192,126 @@ class TestDocumentModel:
         assert document.owner == profile
         assert document.title == 'Test Document'
         assert str(document) == 'Test Document'
+
+
+@pytest.mark.django_db
+class TestUnreadCounter:
+    """Test cases for the denormalised Profile.unread_count."""
+
+    @pytest.fixture
+    def recipient(self):
+        return Profile.objects.create(
+            user=User.objects.create_user('recipient', 'rec@example.com', 'pass'),
+            user_type='student'
+        )
+
+    def _count(self, profile):
+        profile.refresh_from_db(fields=['unread_count'])
+        return profile.unread_count
+
+    def test_new_message_increments(self, profile, recipient):
+        """Test that creating unread messages increments the counter."""
+        Message.objects.create(sender=profile, recipient=recipient, body='one')
+        Message.objects.create(sender=profile, recipient=recipient, body='two')
+        Message.objects.create(sender=profile, recipient=recipient, body='read', read=True)
+        assert self._count(recipient) == 2
+
+    def test_mark_read_decrements_once(self, profile, recipient):
+        """Test that mark_read only counts messages that actually changed."""
+        for i in range(3):
+            Message.objects.create(sender=profile, recipient=recipient, body=str(i))
+        assert Message.objects.filter(recipient=recipient).mark_read() == 3
+        assert Message.objects.filter(recipient=recipient).mark_read() == 0
+        assert self._count(recipient) == 0
+
+    def test_save_and_delete_adjust(self, profile, recipient):
+        """Test that toggling read on an instance and deleting adjust the counter."""
+        message = Message.objects.create(sender=profile, recipient=recipient, body='x')
+        message = Message.objects.get(pk=message.pk)
+        message.read = True
+        message.save()
+        assert self._count(recipient) == 0
+        message.read = False
+        message.save()
+        assert self._count(recipient) == 1
+        message.delete()
+        assert self._count(recipient) == 0
+
+    def test_context_processor_uses_cached_counter(self, rf, profile, recipient, django_assert_num_queries,
+                                                   django_capture_on_commit_callbacks):
+        """Test that the nav badge count is served from cache after the first request."""
+        from core.context_processors import unread_messages
+        Message.objects.create(sender=profile, recipient=recipient, body='x')
+        request = rf.get('/')
+        request.user = recipient.user
+        assert unread_messages(request) == {'unread_message_count': 1}
+        with django_assert_num_queries(0):
+            assert unread_messages(request) == {'unread_message_count': 1}
+        with django_capture_on_commit_callbacks(execute=True):
+            Message.objects.filter(recipient=recipient).mark_read()
+        assert unread_messages(request) == {'unread_message_count': 0}
+
+
+@pytest.mark.django_db
+class TestConversation:
+    """Test cases for conversation threads and their denormalised fields."""
+
+    @pytest.fixture
+    def recipient(self):
+        return Profile.objects.create(
+            user=User.objects.create_user('recipient', 'rec@example.com', 'pass'),
+            user_type='student'
+        )
+
+    def _membership(self, message, profile):
+        return ConversationParticipant.objects.get(conversation=message.conversation_id, profile=profile)
+
+    def test_message_starts_thread(self, profile, recipient):
+        """Test that a message sent outside a thread starts one with both participants."""
+        message = Message.objects.create(sender=profile, recipient=recipient, subject='Hello', body='Hi')
+        conversation = Conversation.objects.get()
+        assert message.conversation == conversation
+        assert conversation.subject == 'Hello'
+        assert conversation.last_message == message
+        assert set(conversation.participants.all()) == {profile, recipient}
+        assert self._membership(message, recipient).unread_count == 1
+        assert self._membership(message, profile).unread_count == 0
+        assert self._membership(message, profile).last_message_at == message.sent_at
+
+    def test_replies_advance_thread(self, profile, recipient):
+        """Test that replies move the last-message pointer and count unread per participant."""
+        first = Message.objects.create(sender=profile, recipient=recipient, body='one')
+        reply = Message.objects.create(conversation=first.conversation, sender=recipient, recipient=profile, body='two')
+        again = Message.objects.create(conversation=first.conversation, sender=recipient, recipient=profile, body='three')
+        first.conversation.refresh_from_db()
+        assert first.conversation.last_message == again
+        assert self._membership(reply, profile).unread_count == 2
+        assert self._membership(reply, recipient).last_message_at == again.sent_at
+        assert Conversation.objects.count() == 1
+
+    def test_mark_read_clears_thread_counter(self, profile, recipient):
+        """Test that mark_read decrements the thread's counter along with the profile's."""
+        message = Message.objects.create(sender=profile, recipient=recipient, body='x')
+        Message.objects.create(sender=profile, recipient=recipient, body='other thread')
+        assert message.conversation.messages.mark_read() == 1
+        assert self._membership(message, recipient).unread_count == 0
+        recipient.refresh_from_db(fields=['unread_count'])
+        assert recipient.unread_count == 1
+
+    def test_deleting_last_message_rewinds_pointer(self, profile, recipient):
+        """Test that deleting the newest message points the thread at the one before it."""
+        first = Message.objects.create(sender=profile, recipient=recipient, body='one')
+        last = Message.objects.create(conversation=first.conversation, sender=profile, recipient=recipient, body='two')
+        last.delete()
+        first.conversation.refresh_from_db()
+        assert first.conversation.last_message == first
+        assert self._membership(first, recipient).last_message_at == first.sent_at
+        assert self._membership(first, recipient).unread_count == 1
+
+    def test_recount_repairs_thread_counters(self, profile, recipient):
+        """Test that unread.recount() fixes drifted per-thread counters."""
+        message = Message.objects.create(sender=profile, recipient=recipient, body='x')
+        ConversationParticipant.objects.update(unread_count=7)
+        unread.recount()
+        assert self._membership(message, recipient).unread_count == 1
+        assert self._membership(message, profile).unread_count == 0
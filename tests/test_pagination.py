@@ -0,0 +1,111 @@
+import datetime
+
+import pytest
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from core.models import Project
+from core.pagination import bounded_count, decode_cursor, encode_cursor, paginate
+
+
+@pytest.fixture
+def projects(profile):
+    """Create 7 projects, several sharing the same created_at."""
+    created = []
+    for i in range(7):
+        created.append(Project.objects.create(
+            title=f'Project {i}',
+            description='Description',
+            project_type='research',
+            posted_by=profile,
+        ))
+    base = timezone.now()
+    for i, project in enumerate(created):
+        # Pairs of identical timestamps exercise the id tie-breaker
+        Project.objects.filter(pk=project.pk).update(created_at=base - datetime.timedelta(minutes=i // 2))
+    return created
+
+
+def _walk(rf, queryset, ordering, per_page):
+    pages = []
+    url = '/'
+    while url is not None:
+        page = paginate(rf.get(url), queryset, ordering, per_page=per_page)
+        pages.append(page)
+        url = page.next_url and '/' + page.next_url
+    return pages
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test cases for core.pagination."""
+
+    def test_pages_cover_queryset_in_order(self, projects):
+        """Test that walking next cursors yields every row exactly once, in order."""
+        rf = RequestFactory()
+        ordering = ('-created_at', '-id')
+        pages = _walk(rf, Project.objects.all(), ordering, per_page=3)
+        seen = [p.pk for page in pages for p in page]
+        expected = list(Project.objects.order_by(*ordering).values_list('pk', flat=True))
+        assert seen == expected
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert not pages[0].has_previous
+        assert not pages[-1].has_next
+
+    def test_previous_cursor_returns_previous_page(self, projects):
+        """Test that the previous cursor of page 2 yields page 1."""
+        rf = RequestFactory()
+        ordering = ('-created_at', '-id')
+        first = paginate(rf.get('/'), Project.objects.all(), ordering, per_page=3)
+        second = paginate(rf.get('/' + first.next_url), Project.objects.all(), ordering, per_page=3)
+        back = paginate(rf.get('/' + second.previous_url), Project.objects.all(), ordering, per_page=3)
+        assert [p.pk for p in back] == [p.pk for p in first]
+        assert not back.has_previous
+        assert back.has_next
+
+    def test_cursor_keeps_other_query_params(self, projects):
+        """Test that page links preserve filters like the search query."""
+        page = paginate(RequestFactory().get('/', {'q': 'x'}), Project.objects.all(), ('-created_at', '-id'), per_page=3)
+        assert page.next_url.startswith('?q=x&cursor=')
+
+    def test_garbled_cursor_falls_back_to_first_page(self, projects):
+        """Test that invalid cursors are ignored instead of raising."""
+        rf = RequestFactory()
+        malformed = [['not-a-date', 'x'], [{}, 1], [None, None], [1.5, 'x'], [True, 1], ['2024-01-01', 2.5, 3]]
+        tokens = ['%%%', 'e30'] + [encode_cursor('a', values) for values in malformed]
+        for token in tokens:
+            page = paginate(rf.get('/', {'cursor': token}), Project.objects.all(), ('-created_at', '-id'), per_page=3)
+            assert len(page) == 3
+            assert not page.has_previous
+
+    def test_cursor_round_trip(self):
+        """Test cursor encoding and decoding."""
+        assert decode_cursor(encode_cursor('b', [1.5, 2])) == ('b', [1.5, 2])
+        assert decode_cursor('') == (None, None)
+
+    def test_bounded_count(self, projects):
+        """Test that counts are capped at the given limit."""
+        assert bounded_count(Project.objects.all(), limit=5) == (5, True)
+        assert bounded_count(Project.objects.all(), limit=50) == (7, False)
+
+    def test_project_list_is_paginated(self, client, user, projects, settings):
+        """Test that project_list renders one page with a bounded total."""
+        settings.PAGINATE_BY = 5
+        client.login(username='testuser', password='testpass123')
+        response = client.get(reverse('project_list'))
+        assert len(response.context['projects']) == 5
+        assert response.context['page'].count_label == '7'
+        assert response.context['page'].has_next
+
+
+MALFORMED_CURSORS = [[{}, 1], [None, None], [1.5, 'x'], [[], 'x']]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('view', ['project_list', 'events_list', 'inbox', 'my_applications', 'user_projects'])
+def test_paginated_views_ignore_malformed_cursors(authenticated_client, profile, view):
+    """Test that a well-encoded cursor with values that cannot be sort keys serves the first page."""
+    for values in MALFORMED_CURSORS:
+        for direction in ('a', 'b'):
+            response = authenticated_client.get(reverse(view), {'cursor': encode_cursor(direction, values)})
+            assert response.status_code == 200, (view, direction, values)
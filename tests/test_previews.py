@@ -0,0 +1,177 @@
+import io
+import shutil
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+from core import jobs, previews
+from core.models import Document, Job, Profile, Project, ProjectParticipant
+
+
+@pytest.fixture(autouse=True)
+def preview_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.PREVIEW_ROOT = str(tmp_path / 'previews')
+    settings.PREVIEW_SIZES = {'small': 64, 'large': 200}
+    return tmp_path / 'previews'
+
+
+def image_bytes(fmt='PNG', size=(800, 600), mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, 'red' if mode == 'RGB' else None).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def settle():
+    """Run the queued render jobs."""
+    jobs.run_pending()
+
+
+def make_document(profile, content=None, name='photo.png', **fields):
+    return Document.objects.create(
+        owner=profile, title=name, file=ContentFile(content or image_bytes(), name=name), **fields
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRender:
+    """Test cases for rendering previews."""
+
+    @pytest.mark.parametrize('fmt,name', [('PNG', 'photo.png'), ('JPEG', 'photo.jpg')])
+    def test_images_render_to_webp_per_size(self, profile, fmt, name):
+        """Test that every configured size is written as WebP and bounded by its width."""
+        document = make_document(profile, image_bytes(fmt), name)
+        settle()
+        for label, width in previews.sizes().items():
+            with previews.preview_storage().open(previews.preview_name(document.file.name, label)) as fh:
+                image = Image.open(fh)
+                assert image.format == 'WEBP'
+                assert image.width == width
+
+    def test_upload_queues_a_render_job(self, profile):
+        """Test that saving a document queues a job that renders its previews."""
+        document = make_document(profile)
+        assert Job.objects.get().payload == {'source_name': document.file.name}
+        assert not previews.ready(document.file.name, 'small')
+        jobs.run_pending()
+        assert previews.ready(document.file.name, 'small')
+
+    def test_upload_view_queues_the_job(self, authenticated_client, profile):
+        """Test that an image uploaded through the view is rendered by its job, not the request."""
+        upload = SimpleUploadedFile('photo.png', image_bytes(), content_type='image/png')
+        response = authenticated_client.post(reverse('upload_document'), {'title': 'Photo', 'file': upload})
+        assert response.status_code == 302
+        name = Document.objects.get().file.name
+        assert not previews.ready(name, 'small')
+        assert Job.objects.filter(name='previews.render').count() == 1
+
+    def test_palette_images_keep_transparency(self, profile):
+        """Test that palette images are converted rather than rejected."""
+        document = make_document(profile, image_bytes('PNG', mode='P'), 'icon.png')
+        settle()
+        assert previews.ready(document.file.name, 'large')
+
+    def test_unreadable_files_are_logged_not_raised(self, profile, caplog):
+        """Test that a broken image is logged by the worker and leaves no preview."""
+        document = make_document(profile, b'not an image', 'broken.png')
+        settle()
+        assert not previews.ready(document.file.name, 'small')
+        assert 'Could not render preview' in caplog.text
+
+    def test_other_types_are_not_rendered(self, profile):
+        """Test that unsupported files are never scheduled."""
+        previews.schedule('cas/ab/cd/abcd.docx')
+        assert not previews.schedule_once('cas/ab/cd/abcd.docx')
+        assert not Job.objects.exists()
+
+    @pytest.mark.skipif(shutil.which('pdftoppm') is None, reason='pdftoppm (poppler) is not installed')
+    def test_pdf_first_page(self, profile):
+        """Test that a PDF's first page is rasterised."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (600, 800), 'white').save(buffer, 'PDF')
+        document = make_document(profile, buffer.getvalue(), 'paper.pdf')
+        settle()
+        assert previews.ready(document.file.name, 'large')
+
+    def test_last_reference_removes_previews(self, profile):
+        """Test that previews are deleted with the file they were made from."""
+        document = make_document(profile)
+        settle()
+        name = document.file.name
+        document.delete()
+        assert not previews.ready(name, 'small')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPreviewView:
+    """Test cases for the document preview view."""
+
+    def url(self, document, size='small'):
+        return reverse('document_preview', args=[document.id]) + f'?size={size}'
+
+    def test_placeholder_until_ready_then_preview(self, authenticated_client, profile):
+        """Test that a missing preview redirects to a placeholder and is served once rendered."""
+        document = Document.objects.bulk_create([
+            Document(owner=profile, title='p', file=make_document(profile).file.name)
+        ])[0]
+        settle()
+        shutil.rmtree(previews.preview_storage().location, ignore_errors=True)
+        response = authenticated_client.get(self.url(document))
+        assert response.status_code == 302
+        assert response['Location'].endswith('img/preview-pending.svg')
+        assert response['Cache-Control'] == 'no-store'
+        assert not previews.ready(document.file.name, 'small')
+        authenticated_client.get(self.url(document, size='large'))
+        # Rendered by one job, not in the request
+        assert Job.objects.filter(name='previews.render', status=Job.QUEUED).count() == 1
+        settle()
+        response = authenticated_client.get(self.url(document))
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'image/webp'
+        assert 'max-age' in response['Cache-Control']
+
+    def test_unsupported_type_gets_generic_icon(self, authenticated_client, profile):
+        """Test that files without a preview redirect to the generic file icon."""
+        document = make_document(profile, b'plain text', 'notes.txt')
+        response = authenticated_client.get(self.url(document))
+        assert response['Location'].endswith('img/preview-file.svg')
+
+    def test_unknown_size_is_404(self, authenticated_client, profile):
+        """Test that only configured sizes are served."""
+        response = authenticated_client.get(self.url(make_document(profile), size='huge'))
+        assert response.status_code == 404
+
+    def test_strangers_cannot_see_previews(self, client, profile):
+        """Test that another user's document preview is not found."""
+        document = make_document(profile)
+        User.objects.create_user('stranger', 'stranger@example.com', 'pass')
+        client.login(username='stranger', password='pass')
+        assert client.get(self.url(document), secure=True).status_code == 404
+
+    def test_project_participants_can_see_previews(self, client, profile):
+        """Test that participants of the document's project may see its preview."""
+        project = Project.objects.create(title='P', description='d', posted_by=profile)
+        document = make_document(profile, project=project)
+        user = User.objects.create_user('member', 'member@example.com', 'pass')
+        ProjectParticipant.objects.create(project=project, profile=Profile.objects.create(user=user))
+        client.login(username='member', password='pass')
+        settle()
+        assert client.get(self.url(document), secure=True).status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_generate_previews_backfills(profile):
+    """Test that the backfill command renders previews of existing documents."""
+    document = Document.objects.bulk_create([
+        Document(owner=profile, title='p', file=make_document(profile).file.name)
+    ])[0]
+    settle()
+    shutil.rmtree(previews.preview_storage().location, ignore_errors=True)
+    out = io.StringIO()
+    call_command('generate_previews', '--workers', '2', stdout=out)
+    assert previews.ready(document.file.name, 'large')
+    assert 'Rendered previews for 1 of 1' in out.getvalue()
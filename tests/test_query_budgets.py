@@ -0,0 +1,203 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from datetime import timedelta
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import timezone
+from core import instrumentation
+from core.instrumentation import QueryBudgetExceeded
+from core.models import (
+    Event, Keyword, Message, Organization, Profile, Project, ProjectParticipant,
+)
+
+# (url name, url kwargs from the dataset, query string)
+PAGES = [
+    ('about', None, ''),
+    ('project_list', None, ''),
+    ('project_list', None, '?q=project'),
+    ('project_detail', lambda data: {'project_id': data['own_project'].pk}, ''),
+    ('project_create', None, ''),
+    ('suggestions', None, ''),
+    ('dashboard', None, ''),
+    ('upload_document', None, ''),
+    ('inbox', None, ''),
+    ('conversation', lambda data: {'conversation_id': data['thread'].pk}, ''),
+    ('compose', None, ''),
+    ('compose', None, '?recipient={other_user_id}'),
+    ('events_list', None, ''),
+    ('profile', None, ''),
+    ('profile_edit', None, ''),
+    ('user_projects', None, ''),
+    ('my_applications', None, ''),
+    ('manage_applications', lambda data: {'project_id': data['own_project'].pk}, ''),
+]
+
+
+class Dataset:
+    """Grows every list a view renders by ``rows`` at a time."""
+
+    def __init__(self):
+        self.org = Organization.objects.create(name='Lab', org_type='university')
+        self.user = User.objects.create_user('budget', 'budget@example.com', 'pass12345')
+        self.profile = Profile.objects.create(
+            user=self.user, user_type='researcher', specialization='ai', organization=self.org
+        )
+        owner_user = User.objects.create_user('owner', 'owner@example.com')
+        self.owner = Profile.objects.create(user=owner_user, user_type='company', specialization='ai')
+        self.keyword = Keyword.objects.create(code='ml', label='Machine learning')
+        self.profile.keywords.add(self.keyword)
+        self.own_project = self.project(self.profile)
+        self.thread = Message.objects.create(
+            sender=self.owner, recipient=self.profile, subject='Thread', body='First'
+        ).conversation
+        self.added = 0
+
+    def project(self, owner):
+        project = Project.objects.create(
+            title=f'Project {Project.objects.count()}', description='A research project',
+            project_type='research', posted_by=owner, specialization_needed='ai'
+        )
+        project.keywords.add(self.keyword, Keyword.objects.create(code=f'k{project.pk}', label=f'K{project.pk}'))
+        return project
+
+    def grow(self, rows):
+        now = timezone.now()
+        for _ in range(rows):
+            self.added += 1
+            n = self.added
+            ProjectParticipant.objects.create(project=self.project(self.owner), profile=self.profile)
+            self.project(self.profile)
+            applicant_user = User.objects.create_user(f'applicant{n}', f'a{n}@example.com')
+            applicant = Profile.objects.create(
+                user=applicant_user, organization=Organization.objects.create(name=f'Org {n}', org_type='company')
+            )
+            ProjectParticipant.objects.create(project=self.own_project, profile=applicant)
+            Message.objects.create(sender=applicant, recipient=self.profile, subject=f'Hello {n}', body='Hi')
+            Message.objects.create(
+                conversation=self.thread, sender=self.owner, recipient=self.profile, body=f'Reply {n}'
+            )
+            Event.objects.create(
+                title=f'Event {n}', organizer=self.org,
+                start=now + timedelta(days=n), end=now + timedelta(days=n, hours=2)
+            )
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+@pytest.fixture
+def dataset(db):
+    return Dataset()
+
+
+def measure(client, name, kwargs, query, data, measured_requests):
+    """Request a page with a cold cache and return its query count."""
+    cache.clear()
+    del measured_requests[:]
+    url = reverse(name, kwargs=kwargs(data) if kwargs else None)
+    url += query.format(other_user_id=data.owner.user_id)
+    response = client.get(url)
+    assert response.status_code == 200, url
+    assert 'Server-Timing' in response.headers
+    [(view_name, budget, metrics)] = measured_requests
+    assert budget is not None, f'{view_name} has no query budget'
+    return metrics.queries
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    """Test that every view stays within its declared query budget."""
+
+    @pytest.mark.parametrize('name, kwargs, query', PAGES, ids=[p[0] + p[2] for p in PAGES])
+    def test_query_count_does_not_grow_with_rows(self, client, dataset, settings, measured_requests, name, kwargs, query):
+        """Test that a page runs the same number of queries for 1 and 7 rows, within budget."""
+        settings.PAGINATE_BY = 5
+        client.force_login(dataset.user)
+        dataset.grow(1)
+        small = measure(client, name, kwargs, query, dataset, measured_requests)
+        dataset.grow(6)
+        large = measure(client, name, kwargs, query, dataset, measured_requests)
+        assert large == small
+
+    def test_actions_stay_within_budget(self, client, dataset, measured_requests):
+        """Test that form posts and state-changing views stay within their budgets."""
+        dataset.grow(3)
+        client.force_login(dataset.user)
+        other = Project.objects.create(
+            title='Open call', description='Apply here', project_type='research', posted_by=dataset.owner
+        )
+        application = ProjectParticipant.objects.filter(project=dataset.own_project).first()
+        requests = [
+            ('project_apply', {'project_id': other.pk}, {}),
+            ('project_withdraw', {'project_id': other.pk}, {}),
+            ('event_register', {'event_id': Event.objects.first().pk}, {}),
+            ('event_cancel', {'event_id': Event.objects.first().pk}, {}),
+            ('compose', None, {'recipient': dataset.owner.pk, 'subject': 'Hi', 'body': 'Hello'}),
+            ('conversation', {'conversation_id': dataset.thread.pk}, {'body': 'Thanks'}),
+            ('project_create', None, {
+                'title': 'New', 'description': 'New project', 'project_type': 'research',
+                'specialization_needed': 'ai', 'keywords': [dataset.keyword.pk],
+            }),
+            ('profile_edit', None, {'user_type': 'researcher', 'specialization': 'ai', 'bio': 'Bio'}),
+            ('reject_application', {'application_id': application.pk}, {}),
+            ('logout', None, {}),
+            ('login', None, {'username': 'budget', 'password': 'pass12345'}),
+        ]
+        for name, kwargs, data in requests:
+            cache.clear()
+            response = client.post(reverse(name, kwargs=kwargs), data)
+            assert response.status_code == 302, name
+        assert [view_name for view_name, _, _ in measured_requests] == [name for name, _, _ in requests]
+
+    def test_every_view_declares_a_budget(self):
+        """Test that no view in core.urls can land without a query budget."""
+        missing = [
+            pattern.name for pattern in get_resolver('core.urls').url_patterns
+            if isinstance(pattern, URLPattern) and instrumentation.budget_for(pattern.callback) is None
+        ]
+        assert missing == []
+
+    def test_over_budget_raises_in_strict_mode(self, settings):
+        """Test that exceeding a budget fails loudly in strict mode and only logs otherwise."""
+        metrics = instrumentation.Metrics()
+        metrics.queries = 5
+        instrumentation.check_budget('project_list', 5, metrics)
+        with pytest.raises(QueryBudgetExceeded):
+            instrumentation.check_budget('project_list', 4, metrics)
+        settings.QUERY_BUDGET_STRICT = False
+        instrumentation.check_budget('project_list', 4, metrics)
+
+    def test_metrics_record_db_and_template_time(self, client, dataset, measured_requests):
+        """Test that DB and template time are reported in the Server-Timing header."""
+        client.force_login(dataset.user)
+        response = client.get(reverse('project_list'))
+        [(_, _, metrics)] = measured_requests
+        assert metrics.queries > 0
+        assert metrics.template_time > 0
+        assert f'desc="{metrics.queries} queries"' in response.headers['Server-Timing']
+        assert 'tpl;dur=' in response.headers['Server-Timing']
+
+    def test_async_requests_are_measured_without_a_thread_hop(self, settings):
+        """Test that under ASGI the middleware awaits async views on the event loop thread."""
+        settings.QUERY_BUDGET_ENABLED = True
+        threads = []
+
+        async def view(request):
+            threads.append(threading.get_ident())
+            return HttpResponse()
+
+        middleware = instrumentation.QueryBudgetMiddleware(view)
+        assert iscoroutinefunction(middleware)
+
+        async def scenario():
+            response = await middleware(AsyncRequestFactory().get('/'))
+            return threading.get_ident(), response
+
+        loop_thread, response = async_to_sync(scenario)()
+        assert threads == [loop_thread]
+        assert 'Server-Timing' in response.headers
@@ -0,0 +1,211 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core import mail
+from django.db import OperationalError, connections
+from django.urls import reverse
+from django.utils import timezone
+from core import jobs, registrations
+from core.models import Event, EventParticipant, Job, Profile
+
+
+def make_event(capacity=2):
+    start = timezone.now() + timedelta(days=7)
+    return Event.objects.create(title='Workshop', start=start, end=start + timedelta(hours=3), capacity=capacity)
+
+
+def make_profiles(count, prefix='p'):
+    users = User.objects.bulk_create([User(username=f'{prefix}{n}', email=f'{prefix}{n}@example.com') for n in range(count)])
+    return Profile.objects.bulk_create([Profile(user=user) for user in users])
+
+
+def statuses(event):
+    return list(
+        EventParticipant.objects.filter(event=event).order_by('registered_at', 'id')
+        .values_list('profile__user__username', 'status')
+    )
+
+
+@pytest.mark.django_db
+class TestRegistrations:
+    """Test cases for seat-limited registration and the waitlist."""
+
+    def test_full_event_waitlists_in_order(self):
+        """Test that registrations beyond capacity join the waitlist in arrival order."""
+        event = make_event(capacity=2)
+        for profile in make_profiles(4):
+            registrations.register(event, profile)
+        assert statuses(event) == [
+            ('p0', 'registered'), ('p1', 'registered'), ('p2', 'waitlisted'), ('p3', 'waitlisted'),
+        ]
+        event.refresh_from_db()
+        assert (event.seats_taken, event.seats_left) == (2, 0)
+
+    def test_registering_twice_is_idempotent(self):
+        """Test that a second registration returns the first instead of failing."""
+        event = make_event()
+        [profile] = make_profiles(1)
+        first, created = registrations.register(event, profile)
+        again, created_again = registrations.register(event, profile)
+        assert (created, created_again) == (True, False)
+        assert again.pk == first.pk
+        event.refresh_from_db()
+        assert event.seats_taken == 1
+
+    def test_unlimited_events_never_waitlist(self):
+        """Test that events without a capacity register everyone."""
+        event = make_event(capacity=None)
+        for profile in make_profiles(5):
+            registrations.register(event, profile)
+        assert {status for _, status in statuses(event)} == {'registered'}
+
+    def test_cancelling_promotes_the_head_of_the_waitlist(self):
+        """Test that a freed seat goes to the first waitlisted person, who is mailed."""
+        event = make_event(capacity=1)
+        first, second, third = make_profiles(3)
+        for profile in (first, second, third):
+            registrations.register(event, profile)
+        assert registrations.cancel(event, first)
+        assert statuses(event) == [('p1', 'registered'), ('p2', 'waitlisted')]
+        event.refresh_from_db()
+        assert event.seats_taken == 1
+        assert Job.objects.get().payload['to'] == ['p1@example.com']
+        jobs.run_pending()
+        assert 'Workshop' in mail.outbox[0].subject
+
+    def test_leaving_the_waitlist_keeps_seats(self):
+        """Test that a waitlisted cancellation frees no seat."""
+        event = make_event(capacity=1)
+        first, second = make_profiles(2)
+        registrations.register(event, first)
+        registrations.register(event, second)
+        registrations.cancel(event, second)
+        event.refresh_from_db()
+        assert event.seats_taken == 1
+        assert statuses(event) == [('p0', 'registered')]
+
+    def test_cancel_without_waitlist_frees_the_seat(self):
+        """Test that the seat count drops when nobody is waiting."""
+        event = make_event(capacity=1)
+        [profile] = make_profiles(1)
+        registrations.register(event, profile)
+        registrations.cancel(event, profile)
+        event.refresh_from_db()
+        assert event.seats_taken == 0
+
+    def test_deleting_a_profile_hands_over_its_seat(self):
+        """Test that registrations removed by a cascade also promote the waitlist."""
+        event = make_event(capacity=1)
+        first, second = make_profiles(2)
+        registrations.register(event, first)
+        registrations.register(event, second)
+        first.user.delete()
+        assert statuses(event) == [('p1', 'registered')]
+
+    def test_raising_capacity_admits_the_waitlist(self):
+        """Test that saving an event with more seats promotes waiting participants."""
+        event = make_event(capacity=1)
+        for profile in make_profiles(3):
+            registrations.register(event, profile)
+        event.capacity = 2
+        event.save()
+        assert [status for _, status in statuses(event)] == ['registered', 'registered', 'waitlisted']
+        event.refresh_from_db()
+        assert event.seats_taken == 2
+
+    def test_cancelling_above_a_lowered_capacity_promotes_nobody(self):
+        """Test that a freed seat stays empty while more people are registered than the capacity allows."""
+        event = make_event(capacity=2)
+        for profile in make_profiles(3):
+            registrations.register(event, profile)
+        event.capacity = 1
+        event.save()
+        registrations.cancel(event, Profile.objects.get(user__username='p0'))
+        assert statuses(event) == [('p1', 'registered'), ('p2', 'waitlisted')]
+        event.refresh_from_db()
+        assert event.seats_taken == 1
+        assert not Job.objects.exists()
+
+        registrations.cancel(event, Profile.objects.get(user__username='p1'))
+        assert statuses(event) == [('p2', 'registered')]
+        event.refresh_from_db()
+        assert event.seats_taken == 1
+
+    def test_waitlist_position(self):
+        """Test that a waitlisted participant learns their place in the queue."""
+        event = make_event(capacity=1)
+        for profile in make_profiles(3):
+            participant, _ = registrations.register(event, profile)
+        assert registrations.waitlist_position(participant) == 2
+
+
+@pytest.mark.django_db
+class TestRegistrationViews:
+    """Test cases for the register and cancel views."""
+
+    def test_register_then_cancel(self, authenticated_client, profile):
+        """Test that the views register, report the waitlist and cancel."""
+        event = make_event(capacity=1)
+        registrations.register(event, make_profiles(1)[0])
+        response = authenticated_client.post(reverse('event_register', args=[event.pk]), follow=True)
+        assert 'number 1 on the waitlist' in response.content.decode()
+        assert 'Leave waitlist' in response.content.decode()
+        authenticated_client.post(reverse('event_cancel', args=[event.pk]))
+        assert not EventParticipant.objects.filter(event=event, profile=profile).exists()
+
+    def test_cancel_with_promotion_stays_within_budget(self, authenticated_client, profile):
+        """Test that the most expensive cancellation (promoting someone) fits the view's budget."""
+        event = make_event(capacity=1)
+        registrations.register(event, profile)
+        registrations.register(event, make_profiles(1)[0])
+        response = authenticated_client.post(reverse('event_cancel', args=[event.pk]))
+        assert response.status_code == 302
+        assert statuses(event) == [('p0', 'registered')]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_registrations_never_overbook():
+    """Test that a burst of parallel (and duplicated) registrations fills exactly the capacity."""
+    capacity, people = 10, 40
+    event = make_event(capacity=capacity)
+    profiles = make_profiles(people)
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def work(chunk):
+        try:
+            barrier.wait()
+            for profile in chunk:
+                # Like a client retrying: SQLite reports a busy database instead of waiting
+                for _ in range(200):
+                    try:
+                        registrations.register(event, profile)
+                        break
+                    except OperationalError:
+                        time.sleep(0.005)
+                    except Exception as error:
+                        errors.append(error)
+                        break
+                else:
+                    errors.append(profile.pk)
+        finally:
+            connections.close_all()
+
+    # Two threads per profile, as with a double-clicked button
+    threads = [threading.Thread(target=work, args=(profiles[n % 4::4],)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    event.refresh_from_db()
+    counts = {
+        status: EventParticipant.objects.filter(event=event, status=status).count()
+        for status in (EventParticipant.REGISTERED, EventParticipant.WAITLISTED)
+    }
+    assert counts == {EventParticipant.REGISTERED: capacity, EventParticipant.WAITLISTED: people - capacity}
+    assert event.seats_taken == capacity
@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.sessions.models import Session
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory
+from django.urls import reverse
+from core import replicas, views
+from core.models import Project
+
+router = replicas.ReplicaRouter()
+
+
+@pytest.fixture
+def call(monkeypatch):
+    """Run a view through ReplicaMiddleware; returns the response and where its reads went."""
+    monkeypatch.setattr(replicas, 'configured', lambda: True)
+    reads = []
+
+    def view(request):
+        reads.append(router.db_for_read(Project))
+        if request.GET.get('write'):
+            router.db_for_write(Project)
+            reads.append(router.db_for_read(Project))
+        reads.append(router.db_for_read(Session))
+        return HttpResponse()
+
+    def get_response(request):
+        # As Django's handler does, process_view runs before the view
+        middleware.process_view(request, view, (), {})
+        return view(request)
+
+    middleware = replicas.ReplicaMiddleware(get_response)
+
+    def run(request, marked=True):
+        view.replica_reads = marked
+        reads.clear()
+        response = middleware(request)
+        return response, list(reads)
+
+    return run
+
+
+class TestReplicaRouting:
+    """Test cases for sending read-only view traffic to the replica."""
+
+    def test_marked_views_read_from_the_replica(self, call):
+        """Test that a GET to a @replica_reads view reads from the replica and pins nobody."""
+        response, reads = call(RequestFactory().get('/'))
+        assert reads == ['replica', 'default']
+        assert replicas.PIN_COOKIE not in response.cookies
+
+    def test_other_views_read_from_the_primary(self, call):
+        """Test that unmarked views keep using the primary."""
+        assert call(RequestFactory().get('/'), marked=False)[1] == ['default', 'default']
+
+    def test_posting_pins_the_user_to_the_primary(self, call):
+        """Test that after a POST the same browser reads from the primary until the pin expires."""
+        response, _ = call(RequestFactory().post('/'))
+        cookie = response.cookies[replicas.PIN_COOKIE]
+        assert cookie['max-age'] == 10
+        request = RequestFactory().get('/')
+        request.COOKIES[replicas.PIN_COOKIE] = cookie.value
+        assert call(request)[1][0] == 'default'
+        request.COOKIES[replicas.PIN_COOKIE] = str(int(time.time()) - 1)
+        assert call(request)[1][0] == 'replica'
+
+    def test_a_write_moves_the_rest_of_the_request_to_the_primary(self, call):
+        """Test that reads after a write in a GET see it, and the user is pinned."""
+        response, reads = call(RequestFactory().get('/', {'write': 1}))
+        assert reads[:2] == ['replica', 'default']
+        assert replicas.PIN_COOKIE in response.cookies
+
+    @pytest.mark.django_db(transaction=True)
+    def test_transactions_read_from_the_primary(self):
+        """Test that reads inside a transaction on the primary stay on it."""
+        state = replicas._RequestState()
+        state.reads = True
+        token = replicas._state.set(state)
+        try:
+            assert router.db_for_read(Project) == 'replica'
+            with transaction.atomic():
+                assert router.db_for_read(Project) == 'default'
+        finally:
+            replicas._state.reset(token)
+
+    def test_async_requests_route_without_a_thread_hop(self, monkeypatch):
+        """Test that under ASGI the middleware and its process_view run on the event loop."""
+        monkeypatch.setattr(replicas, 'configured', lambda: True)
+        seen = []
+
+        async def view(request):
+            seen.append((threading.get_ident(), router.db_for_read(Project)))
+            return HttpResponse()
+        view.replica_reads = True
+
+        async def get_response(request):
+            await middleware.process_view(request, view, (), {})
+            return await view(request)
+
+        middleware = replicas.ReplicaMiddleware(get_response)
+        assert iscoroutinefunction(middleware) and iscoroutinefunction(middleware.process_view)
+
+        async def scenario():
+            get = await middleware(AsyncRequestFactory().get('/'))
+            post = await middleware(AsyncRequestFactory().post('/'))
+            return threading.get_ident(), get, post
+
+        loop_thread, get, post = async_to_sync(scenario)()
+        assert seen == [(loop_thread, 'replica'), (loop_thread, 'default')]
+        assert replicas.PIN_COOKIE not in get.cookies
+        assert replicas.PIN_COOKIE in post.cookies
+
+    @pytest.mark.django_db(transaction=True, databases={'default', 'replica'})
+    def test_a_lagging_replica_is_only_read_by_unpinned_users(self, settings, client, profile):
+        """Test that with two separate databases, unpinned GETs miss a new row and pinned GETs see it."""
+        settings.REPLICA_READS = True
+        project = Project.objects.create(title='Replicated', description='Old', project_type='research',
+                                         posted_by=profile)
+        # Replicate the primary as it is now; the project created after it exists only on the primary
+        primary, replica = connections['default'], connections['replica']
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+        fresh = Project.objects.create(title='Not replicated yet', description='New', project_type='research',
+                                       posted_by=profile)
+        assert not Project.objects.using('replica').filter(pk=fresh.pk).exists()
+
+        client.force_login(profile.user)
+        assert client.get(reverse('project_detail', args=[project.pk]), secure=True).status_code == 200
+        assert client.get(reverse('project_detail', args=[fresh.pk]), secure=True).status_code == 404
+
+        response = client.post(reverse('project_apply', args=[fresh.pk]), secure=True)
+        assert replicas.PIN_COOKIE in response.cookies
+        assert client.get(reverse('project_detail', args=[fresh.pk]), secure=True).status_code == 200
+
+    def test_no_routing_outside_requests(self):
+        """Test that commands and workers use Django's default routing."""
+        assert router.db_for_read(Project) is None
+
+    def test_read_heavy_views_are_marked(self):
+        """Test that the listing views opt in to the replica."""
+        for view in (views.project_list, views.events_list, views.project_detail, views.dashboard):
+            assert view.replica_reads
+
+    def test_copy_sqlite(self, tmp_path):
+        """Test that the local replica gets a snapshot of the primary."""
+        primary, replica = tmp_path / 'primary.sqlite3', tmp_path / 'replica.sqlite3'
+        with sqlite3.connect(primary) as db:
+            db.execute('CREATE TABLE t (x)')
+            db.execute('INSERT INTO t VALUES (1)')
+        replicas.copy_sqlite(primary, replica)
+        with sqlite3.connect(replica) as db:
+            assert db.execute('SELECT x FROM t').fetchall() == [(1,)]
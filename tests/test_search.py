@@ -0,0 +1,114 @@
+import pytest
+from django.db import connections
+from django.urls import reverse
+from core import replicas, search
+from core.pagination import encode_cursor
+from core.models import Keyword, Project
+
+
+@pytest.fixture
+def make_project(profile):
+    def _make(title, description='Generic description', **kwargs):
+        return Project.objects.create(
+            title=title,
+            description=description,
+            project_type='research',
+            posted_by=profile,
+            **kwargs
+        )
+    return _make
+
+
+@pytest.mark.django_db
+class TestProjectSearch:
+    """Test cases for the full-text project index."""
+
+    def test_title_match_ranks_above_description_match(self, make_project):
+        """Test that a title hit outranks a description-only hit."""
+        in_description = make_project('Field study', description='Monitoring with drones over fields')
+        in_title = make_project('Drones for agriculture')
+        ranked = [pk for pk, _ in search.search_projects('drones')]
+        assert ranked == [in_title.pk, in_description.pk]
+
+    def test_prefix_and_multiple_terms(self, make_project):
+        """Test that terms are prefix-matched and combined with AND."""
+        both = make_project('Solar irrigation pumps')
+        make_project('Solar panels')
+        ranked = [pk for pk, _ in search.search_projects('sol irrig')]
+        assert ranked == [both.pk]
+
+    def test_keyword_changes_are_indexed(self, make_project):
+        """Test that adding and renaming keywords updates the index."""
+        project = make_project('Untitled')
+        keyword = Keyword.objects.create(code='nlp', label='Linguistics')
+        project.keywords.add(keyword)
+        assert [pk for pk, _ in search.search_projects('linguistics')] == [project.pk]
+
+        keyword.label = 'Phonetics'
+        keyword.save()
+        assert search.search_projects('linguistics') == []
+        assert [pk for pk, _ in search.search_projects('phonetics')] == [project.pk]
+
+        project.keywords.clear()
+        assert search.search_projects('phonetics') == []
+
+    def test_deleted_project_is_removed(self, make_project):
+        """Test that deleting a project removes it from the index."""
+        project = make_project('Temporary robotics project')
+        project.delete()
+        assert search.search_projects('robotics') == []
+
+    def test_paging_with_after(self, make_project):
+        """Test that results can be paged with an (score, id) cursor."""
+        for i in range(5):
+            make_project(f'Battery study {i}')
+        first = search.search_projects('battery', limit=2)
+        rest = search.search_projects('battery', limit=10, after=(first[-1][1], first[-1][0]))
+        assert len(first) == 2
+        assert len(rest) == 3
+        assert not {pk for pk, _ in first} & {pk for pk, _ in rest}
+
+    def test_operators_in_query_are_ignored(self, make_project):
+        """Test that FTS syntax in user input cannot break the query."""
+        project = make_project('Quantum sensors')
+        assert [pk for pk, _ in search.search_projects('"quantum" OR (NEAR*')] == []
+        assert [pk for pk, _ in search.search_projects('quantum*')] == [project.pk]
+
+    def test_project_list_orders_by_relevance(self, client, user, make_project):
+        """Test that the project list view returns search hits by rank."""
+        client.login(username='testuser', password='testpass123')
+        weak = make_project('Field notes', description='Notes about drones')
+        strong = make_project('Drones and drones')
+        response = client.get(reverse('project_list'), {'q': 'drones'})
+        assert response.status_code == 200
+        assert [p.pk for p in response.context['projects']] == [strong.pk, weak.pk]
+
+    def test_malformed_search_cursor_serves_the_first_page(self, client, user, make_project):
+        """Test that a search cursor that is not a (score, id) pair is ignored instead of reaching the SQL."""
+        client.login(username='testuser', password='testpass123')
+        project = make_project('Drones')
+        for values in (['x', 1], [1.5, 'x'], [1.5, 2.5], [1.5], [True, 1], [1.5, 2, 3]):
+            response = client.get(reverse('project_list'), {'q': 'drones', 'cursor': encode_cursor('a', values)})
+            assert response.status_code == 200
+            assert [p.pk for p in response.context['projects']] == [project.pk]
+
+
+@pytest.mark.django_db(transaction=True, databases={'default', 'replica'})
+def test_search_reads_where_the_router_sends_it(make_project):
+    """Test that the index is queried on the replica when the request reads from it."""
+    make_project('Replicated wind turbines')
+    primary, replica = connections['default'], connections['replica']
+    primary.ensure_connection()
+    replica.ensure_connection()
+    primary.connection.backup(replica.connection)
+    fresh = make_project('Fresh wind farm')
+    assert fresh.pk in [pk for pk, _ in search.search_projects('wind')]
+
+    state = replicas._RequestState()
+    state.reads = True
+    token = replicas._state.set(state)
+    try:
+        assert fresh.pk not in [pk for pk, _ in search.search_projects('wind')]
+        assert search.count_projects('wind', 10) == 1
+    finally:
+        replicas._state.reset(token)
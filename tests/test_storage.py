@@ -0,0 +1,162 @@
+import hashlib
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core import blobs
+from core.models import Blob, Document, Profile
+from core.storage import cas_storage, content_hash, hashed_name
+
+PDF = b'%PDF-1.4 same bytes for everyone'
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+def make_document(profile, content=PDF, name='report.pdf'):
+    return Document.objects.create(owner=profile, title=name, file=ContentFile(content, name=name))
+
+
+def stored_files(root):
+    return sorted(path for path in root.rglob('*') if path.is_file())
+
+
+def refs(name):
+    return Blob.objects.filter(name=name).values_list('ref_count', flat=True).first()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestContentAddressedStorage:
+    """Test cases for storing uploads once per content hash."""
+
+    def test_name_is_the_content_hash(self, profile):
+        """Test that a stored file is named after the SHA-256 of its bytes."""
+        document = make_document(profile)
+        digest = hashlib.sha256(PDF).hexdigest()
+        assert document.file.name == f'cas/{digest[:2]}/{digest[2:4]}/{digest}.pdf'
+
+    def test_hash_is_read_in_chunks(self):
+        """Test that hashing walks chunks and rewinds the file for the write."""
+        content = ContentFile(b'x' * 200_000)
+        assert content_hash(content, chunk_size=1024) == (hashlib.sha256(b'x' * 200_000).hexdigest(), 200_000)
+        assert content.tell() == 0
+
+    def test_duplicates_are_stored_once(self, profile, media_root):
+        """Test that the same bytes uploaded several times share one file and are counted."""
+        documents = [make_document(profile, name=f'copy{n}.pdf') for n in range(3)]
+        assert len({document.file.name for document in documents}) == 1
+        assert len(stored_files(media_root)) == 1
+        assert refs(documents[0].file.name) == 3
+
+    def test_cv_and_documents_share_files(self, profile):
+        """Test that a CV identical to an uploaded document is not stored again."""
+        document = make_document(profile)
+        profile.cv = ContentFile(PDF, name='cv.pdf')
+        profile.save()
+        assert profile.cv.name == document.file.name
+        assert refs(document.file.name) == 2
+
+    def test_file_is_kept_until_the_last_reference_goes(self, profile, media_root):
+        """Test that deleting one of two references keeps the file, deleting both removes it."""
+        first, second = make_document(profile), make_document(profile)
+        name = first.file.name
+        first.delete()
+        assert cas_storage().exists(name)
+        assert refs(name) == 1
+        second.delete()
+        assert not cas_storage().exists(name)
+        assert not Blob.objects.filter(name=name).exists()
+
+    def test_replacing_a_cv_releases_the_old_file(self, profile):
+        """Test that changing a file moves the reference to the new content."""
+        profile.cv = ContentFile(b'old cv', name='cv.pdf')
+        profile.save()
+        old = profile.cv.name
+        profile = Profile.objects.get(pk=profile.pk)
+        profile.cv = ContentFile(b'new cv', name='cv.pdf')
+        profile.save()
+        assert refs(profile.cv.name) == 1
+        assert not cas_storage().exists(old)
+
+    def test_unchanged_saves_do_not_touch_counts(self, profile):
+        """Test that saving a profile without changing its CV runs no reference-count queries."""
+        profile.cv = ContentFile(PDF, name='cv.pdf')
+        profile.save()
+        profile = Profile.objects.get(pk=profile.pk)
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+        assert not [query for query in queries if 'core_blob' in query['sql']]
+
+    def test_saving_counts_the_reference_before_the_row_exists(self, profile):
+        """Test that a prune between storing an upload and inserting its row keeps the file."""
+        storage = cas_storage()
+        # An unreferenced file waiting for its prune
+        name = storage._save(hashed_name(hashlib.sha256(PDF).hexdigest(), 'a.pdf'), ContentFile(PDF))
+        Blob.objects.create(name=name, ref_count=0)
+        assert storage.save('b.pdf', ContentFile(PDF)) == name
+        assert blobs.prune([name]) == 0
+        assert storage.exists(name)
+        Document.objects.create(owner=profile, title='B', file=name)
+        assert refs(name) == 1
+
+    def test_prune_keeps_files_rows_still_point_at(self, profile):
+        """Test that prune repairs a count that missed a reference instead of deleting the file."""
+        document = make_document(profile)
+        Blob.objects.update(ref_count=0)
+        assert blobs.prune() == 0
+        assert cas_storage().exists(document.file.name)
+        assert refs(document.file.name) == 1
+
+    def test_upload_view_deduplicates(self, authenticated_client, profile, media_root):
+        """Test that two uploads of one file through the view store it once."""
+        for title in ('One', 'Two'):
+            upload = SimpleUploadedFile('paper.pdf', PDF, content_type='application/pdf')
+            response = authenticated_client.post(reverse('upload_document'), {'title': title, 'file': upload})
+            assert response.status_code == 302
+        assert Document.objects.count() == 2
+        assert len(stored_files(media_root)) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDedupeMediaCommand:
+    """Test cases for moving legacy uploads into content-addressed storage."""
+
+    def test_merges_legacy_duplicates(self, profile, media_root):
+        """Test that legacy copies of one file collapse into one stored file with all references."""
+        for n in range(2):
+            (media_root / 'documents').mkdir(exist_ok=True)
+            (media_root / 'documents' / f'legacy{n}.pdf').write_bytes(PDF)
+            Document.objects.bulk_create([Document(owner=profile, title=f'L{n}', file=f'documents/legacy{n}.pdf')])
+        out = io.StringIO()
+        call_command('dedupe_media', stdout=out, stderr=io.StringIO())
+        name = hashed_name(hashlib.sha256(PDF).hexdigest(), 'x.pdf')
+        assert set(Document.objects.values_list('file', flat=True)) == {name}
+        assert stored_files(media_root) == [media_root / name]
+        assert refs(name) == 2
+        assert '1 duplicate(s)' in out.getvalue()
+
+    def test_recount_repairs_counts(self, profile):
+        """Test that recount() restores counts changed behind the signals' back."""
+        document = make_document(profile)
+        Blob.objects.update(ref_count=7)
+        assert blobs.recount() == 1
+        assert refs(document.file.name) == 1
+
+
+@pytest.mark.django_db
+def test_other_users_documents_are_counted_separately(profile):
+    """Test that references from different owners all count towards the same file."""
+    user = User.objects.create_user('other', 'other@example.com', 'pass')
+    other = Profile.objects.create(user=user)
+    make_document(profile)
+    make_document(other)
+    assert Blob.objects.get().ref_count == 2
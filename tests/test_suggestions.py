@@ -0,0 +1,105 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from core import suggestions
+from core.models import Keyword, Profile, Project, ProjectSuggestion
+
+
+@pytest.fixture
+def keywords():
+    return {code: Keyword.objects.create(code=code, label=code.upper()) for code in ('ai', 'iot', 'bio', 'sec')}
+
+
+@pytest.fixture
+def owner():
+    user = User.objects.create_user('owner', 'owner@example.com', 'pass')
+    return Profile.objects.create(user=user, user_type='company', specialization='other')
+
+
+def make_project(owner, keywords=(), **kwargs):
+    project = Project.objects.create(
+        title=kwargs.pop('title', 'Project'),
+        description='Description',
+        project_type='research',
+        posted_by=owner,
+        **kwargs
+    )
+    project.keywords.set(keywords)
+    return project
+
+
+def suggested(profile):
+    return list(
+        ProjectSuggestion.objects.filter(profile=profile).order_by('-score', 'project_id').values_list('project_id', flat=True)
+    )
+
+
+@pytest.mark.django_db
+class TestSuggestions:
+    """Test cases for the precomputed suggestion lists."""
+
+    def test_score_combines_keywords_and_specialization(self):
+        """Test the Dice keyword score plus specialization bonus."""
+        profile = suggestions.Vector([1, 2], 'cs')
+        assert suggestions.score(profile, suggestions.Vector([1, 2], 'ai')) == pytest.approx(1.0)
+        assert suggestions.score(profile, suggestions.Vector([2, 3], 'cs')) == pytest.approx(1.0)
+        assert suggestions.score(profile, suggestions.Vector([3], 'other')) == 0
+        assert suggestions.score(suggestions.Vector([], 'other'), suggestions.Vector([], 'other')) == 0
+
+    def test_new_project_is_merged_into_matching_profiles(self, profile, owner, keywords):
+        """Test that saving a project updates the lists of matching profiles only."""
+        profile.keywords.set([keywords['ai'], keywords['iot']])
+        best = make_project(owner, [keywords['ai'], keywords['iot']])
+        partial = make_project(owner, [keywords['ai'], keywords['bio']])
+        make_project(owner, [keywords['sec']])
+        assert suggested(profile) == [best.pk, partial.pk]
+
+    def test_closed_project_is_removed(self, profile, owner, keywords):
+        """Test that a project leaves every list when it is no longer open."""
+        profile.keywords.set([keywords['ai']])
+        project = make_project(owner, [keywords['ai']])
+        assert suggested(profile) == [project.pk]
+        project.status = 'completed'
+        project.save()
+        assert suggested(profile) == []
+
+    def test_list_is_capped_and_refilled(self, profile, owner, keywords, settings):
+        """Test that lists keep the top K and refill after a removal."""
+        settings.SUGGESTIONS_TOP_K = 2
+        profile.keywords.set([keywords['ai'], keywords['iot']])
+        weak = make_project(owner, [keywords['ai'], keywords['bio'], keywords['sec']])
+        strong = make_project(owner, [keywords['ai'], keywords['iot']])
+        medium = make_project(owner, [keywords['ai'], keywords['bio']])
+        assert suggested(profile) == [strong.pk, medium.pk]
+        strong.delete()
+        assert suggested(profile) == [medium.pk, weak.pk]
+
+    def test_profile_change_recomputes_list(self, profile, owner, keywords):
+        """Test that editing profile keywords or specialization re-scores it."""
+        ai = make_project(owner, [keywords['ai']])
+        med = make_project(owner, [], specialization_needed='med')
+        assert suggested(profile) == []
+        profile.keywords.set([keywords['ai']])
+        assert suggested(profile) == [ai.pk]
+        profile.specialization = 'med'
+        profile.save()
+        assert suggested(profile) == [ai.pk, med.pk]
+
+    def test_rebuild_matches_incremental_lists(self, profile, owner, keywords):
+        """Test that a full rebuild produces the same lists as incremental updates."""
+        profile.keywords.set([keywords['ai'], keywords['bio']])
+        for combo in (['ai'], ['bio'], ['ai', 'bio'], ['sec']):
+            make_project(owner, [keywords[c] for c in combo])
+        before = suggested(profile)
+        suggestions.rebuild()
+        assert suggested(profile) == before
+
+    def test_suggestions_view(self, client, user, profile, owner, keywords):
+        """Test that the suggestions page lists the precomputed matches."""
+        profile.keywords.set([keywords['ai']])
+        project = make_project(owner, [keywords['ai']], title='Neural networks')
+        client.login(username='testuser', password='testpass123')
+        response = client.get(reverse('suggestions'))
+        assert response.status_code == 200
+        assert [p.pk for p in response.context['suggestions']] == [project.pk]
+        assert 'Neural networks' in response.content.decode()
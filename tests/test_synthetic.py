@@ -0,0 +1,107 @@
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Q
+from core import search, synthetic
+from core.models import (
+    CompanySubscription, Conversation, ConversationParticipant, Document, Event, EventParticipant, Message,
+    Profile, Project, ProjectParticipant,
+)
+
+COUNTS = {'profiles': 30, 'projects': 40, 'messages': 300, 'events': 4}
+
+
+def snapshot():
+    return (
+        list(Message.objects.order_by('sent_at', 'sender__user__username', 'body').values_list(
+            'sender__user__username', 'recipient__user__username', 'subject', 'body', 'sent_at', 'read'
+        )),
+        list(Project.objects.order_by('created_at', 'title').values_list('title', 'posted_by__user__username', 'status')),
+    )
+
+
+@pytest.mark.django_db
+class TestSyntheticData:
+    """Test cases for the synthetic load-testing data generator."""
+
+    def test_counts_scale_and_overrides(self):
+        """Test that --scale multiplies the per-unit counts and explicit knobs win."""
+        assert synthetic.counts(2, messages=5) == {'profiles': 200, 'projects': 400, 'messages': 5, 'events': 40}
+
+    def test_every_model_is_populated(self):
+        """Test that one run fills the related tables, not just profiles and projects."""
+        created = synthetic.Generator(seed=1).run(**COUNTS)
+        assert Profile.objects.count() == created['Profile'] == 30
+        assert Project.objects.count() == 40
+        assert Message.objects.count() == 300
+        assert Event.objects.count() == 4
+        for model in (ProjectParticipant, Conversation, ConversationParticipant, Document, EventParticipant):
+            assert model.objects.exists(), model.__name__
+        assert created.get('CompanySubscription', 0) == CompanySubscription.objects.count()
+
+    def test_denormalised_counters_match_messages(self):
+        """Test that counters normally kept by signals are correct after bulk inserts."""
+        synthetic.Generator(seed=2).run(**COUNTS)
+        unread = Profile.objects.annotate(n=Count('received_messages', filter=Q(received_messages__read=False)))
+        for profile in unread:
+            assert profile.unread_count == profile.n
+        for membership in ConversationParticipant.objects.select_related('conversation__last_message'):
+            last = membership.conversation.last_message
+            assert last == membership.conversation.messages.order_by('-sent_at', '-id').first()
+            assert membership.last_message_at == last.sent_at
+            assert membership.unread_count == membership.conversation.messages.filter(
+                recipient_id=membership.profile_id, read=False
+            ).count()
+
+    def test_timestamps_are_historical(self):
+        """Test that auto_now_add fields keep generated times instead of the insert time."""
+        synthetic.Generator(seed=3).run(**COUNTS)
+        assert not Message.objects.filter(sent_at__gt=synthetic.EPOCH).exists()
+        assert Message.objects.values('sent_at').distinct().count() > 1
+        assert Project._meta.get_field('created_at').auto_now_add
+
+    def test_same_seed_same_data(self):
+        """Test that regenerating with the same seed reproduces the same rows."""
+        synthetic.Generator(seed=4).run(**COUNTS)
+        first = snapshot()
+        User.objects.filter(username__startswith=synthetic.username_prefix(4)).delete()
+        synthetic.Generator(seed=4).run(**COUNTS)
+        assert snapshot() == first
+
+    def test_projects_are_searchable(self):
+        """Test that the search index is rebuilt for the generated projects."""
+        synthetic.Generator(seed=5).run(**COUNTS)
+        if search.get_backend() is None:
+            pytest.skip("no full-text backend")
+        assert search.count_projects('energy', 1000) == Project.objects.filter(
+            search.icontains_filter('energy')
+        ).distinct().count()
+
+
+@pytest.mark.django_db
+class TestSeedCommand:
+    """Test cases for the seed management command."""
+
+    def test_sample_data_by_default(self):
+        """Test that seed without options still creates the small sample data set."""
+        out = io.StringIO()
+        call_command('seed', stdout=out)
+        assert 'Seeded database with sample data.' in out.getvalue()
+        assert User.objects.filter(username='student1').exists()
+
+    def test_scale_generates_synthetic_data(self):
+        """Test that --scale with count overrides bulk-generates synthetic rows."""
+        out = io.StringIO()
+        call_command('seed', scale=0.1, messages=50, seed=7, stdout=out)
+        assert Profile.objects.count() == 10
+        assert Message.objects.count() == 50
+        assert 'synthetic rows' in out.getvalue()
+
+    def test_same_seed_twice_is_refused(self):
+        """Test that rerunning a seed on the same database fails instead of colliding."""
+        call_command('seed', profiles=5, projects=5, messages=5, events=1, seed=8, stdout=io.StringIO())
+        with pytest.raises(CommandError):
+            call_command('seed', profiles=5, projects=5, messages=5, events=1, seed=8, stdout=io.StringIO())
@@ -0,0 +1,67 @@
+import io
+
+import polib
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from core import translations
+
+
+def write_catalog(locale_dir, language, entries, domain='django'):
+    path = locale_dir / language / 'LC_MESSAGES' / f'{domain}.po'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    po = polib.POFile()
+    po.metadata = {'Content-Type': 'text/plain; charset=UTF-8'}
+    for msgid, msgstr, *flags in entries:
+        po.append(polib.POEntry(msgid=msgid, msgstr=msgstr, flags=flags))
+    po.save(str(path))
+    return path
+
+
+class TestCompileTranslations:
+    """Test cases for incremental catalog compilation."""
+
+    def test_only_changed_catalogs_are_recompiled(self, tmp_path):
+        """Test that a second run skips unchanged catalogs and picks up an edited one."""
+        ar = write_catalog(tmp_path, 'ar', [('Hello', 'مرحبا')])
+        write_catalog(tmp_path, 'fr', [('Hello', 'Bonjour')])
+        write_catalog(tmp_path, 'fr', [('Save', 'Enregistrer')], domain='djangojs')
+        compiled, failures, total = translations.compile_all(tmp_path, workers=2)
+        assert (len(compiled), failures, total) == (3, {}, 3)
+        assert translations.compile_all(tmp_path)[0] == []
+
+        write_catalog(tmp_path, 'ar', [('Hello', 'أهلا')])
+        assert translations.stale(tmp_path).keys() == {'ar/LC_MESSAGES/django.po'}
+        assert translations.compile_all(tmp_path)[0] == ['ar/LC_MESSAGES/django.po']
+        assert polib.mofile(str(ar.with_suffix('.mo'))).find('Hello').msgstr == 'أهلا'
+
+    def test_missing_mo_is_recompiled(self, tmp_path):
+        """Test that a deleted .mo is rebuilt even though the .po is unchanged."""
+        po = write_catalog(tmp_path, 'ar', [('Hello', 'مرحبا')])
+        translations.compile_all(tmp_path)
+        po.with_suffix('.mo').unlink()
+        assert translations.compile_all(tmp_path)[0] == ['ar/LC_MESSAGES/django.po']
+
+    def test_all_failures_are_reported(self, tmp_path):
+        """Test that every broken catalog is reported while the good ones still compile."""
+        write_catalog(tmp_path, 'ar', [('Hello', 'مرحبا')])
+        write_catalog(tmp_path, 'fr', [('Hi %(name)s', 'Salut %(nom)s', 'python-format')])
+        broken = write_catalog(tmp_path, 'de', [('Hello', 'Hallo')])
+        broken.write_text(broken.read_text() + 'garbage "\n')
+        compiled, failures, _ = translations.compile_all(tmp_path, workers=2)
+        assert compiled == ['ar/LC_MESSAGES/django.po']
+        assert failures.keys() == {'de/LC_MESSAGES/django.po', 'fr/LC_MESSAGES/django.po'}
+        assert '%(nom)' in failures['fr/LC_MESSAGES/django.po']
+        # Failed catalogs are tried again next time
+        assert translations.stale(tmp_path).keys() == failures.keys()
+
+    def test_check_command(self, tmp_path, settings):
+        """Test that --check fails on stale catalogs and passes once they are compiled."""
+        settings.LOCALE_PATHS = [tmp_path]
+        write_catalog(tmp_path, 'fr', [('Hello', 'Bonjour')])
+        with pytest.raises(CommandError, match='1 catalog'):
+            call_command('compile_translations', '--check', stdout=io.StringIO())
+        call_command('compile_translations', stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('compile_translations', '--check', stdout=out)
+        assert 'up to date' in out.getvalue()
@@ -1,7 +1,8 @@
 import pytest
+from django.test import Client
 from django.urls import reverse
 from django.contrib.auth.models import User
-from core.models import Profile
+from core.models import ConversationParticipant, Message, Profile, Project, ProjectParticipant
 
 
 @pytest.mark.django_db
@@ -128,3 +129,248 @@ class TestEventViews:
         response = client.get(reverse('events_list'))
         assert response.status_code == 200
         assert 'Events' in str(response.content)
+
+
+@pytest.mark.django_db
+class TestDashboardStats:
+    """Test cases for the dashboard statistics helpers."""
+
+    def test_user_stats_single_query(self, profile, django_assert_num_queries):
+        """Test that per-user counters come from one query."""
+        from core.models import Message, Project
+        from core.stats import user_stats
+        other = Profile.objects.create(user=User.objects.create_user('other', 'o@example.com', 'pass'))
+        Project.objects.create(title='P', description='D', project_type='research', posted_by=profile)
+        Message.objects.create(sender=profile, recipient=other, body='hi')
+        Message.objects.create(sender=other, recipient=profile, body='hi')
+        Message.objects.create(sender=other, recipient=profile, body='again')
+        with django_assert_num_queries(1):
+            stats = user_stats(profile)
+        assert stats == {
+            'projects_posted': 1,
+            'messages_sent': 1,
+            'messages_received': 2,
+            'documents_uploaded': 0,
+        }
+
+    def test_global_stats_are_cached(self, profile, django_assert_num_queries):
+        """Test that global counters are computed once and then served from cache."""
+        from core.models import Project
+        from core.stats import global_stats
+        Project.objects.create(title='P', description='D', project_type='research', posted_by=profile, status='completed')
+        first = global_stats()
+        assert first['total_projects'] == 1
+        assert first['open_projects'] == 0
+        assert first['total_users'] == 1
+        with django_assert_num_queries(0):
+            assert global_stats()['total_projects'] == 1
+
+    def test_dashboard_renders_stats(self, authenticated_client, profile):
+        """Test that the dashboard shows the combined statistics."""
+        response = authenticated_client.get(reverse('dashboard'))
+        assert response.status_code == 200
+        assert response.context['projects_posted'] == 0
+        assert response.context['total_users'] == 1
+
+
+@pytest.mark.django_db
+class TestProjectDetail:
+    """Test cases for the project detail loader and conditional GET."""
+
+    @pytest.fixture
+    def detail(self, profile, keyword):
+        project = Project.objects.create(
+            title='Detail Project', description='Details', project_type='research', posted_by=profile
+        )
+        project.keywords.add(keyword)
+        return project
+
+    def test_loader_uses_two_queries(self, detail, django_assert_num_queries):
+        """Test that the loader fetches poster, count and keywords in two queries."""
+        with django_assert_num_queries(2):
+            project = Project.objects.for_detail().get(pk=detail.pk)
+            assert project.posted_by.user.username == 'testuser'
+            assert project.posted_by.organization is None
+            assert [k.code for k in project.keywords.all()] == ['python']
+            assert project.participant_count == 0
+
+    def test_repeat_visit_gets_304(self, authenticated_client, detail):
+        """Test that a request carrying the ETag or Last-Modified is answered with 304."""
+        url = reverse('project_detail', args=[detail.pk])
+        response = authenticated_client.get(url)
+        assert response.status_code == 200
+        assert 'Detail Project' in response.content.decode()
+        etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+        assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert authenticated_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    def test_etag_changes_with_project_and_viewer(self, authenticated_client, detail, user):
+        """Test that edits, accepted members and another language invalidate the ETag, applications do not."""
+        url = reverse('project_detail', args=[detail.pk])
+        etag = authenticated_client.get(url).headers['ETag']
+        other = Profile.objects.create(user=User.objects.create_user('applicant'), user_type='student')
+        application = ProjectParticipant.objects.create(project=detail, profile=other)
+        assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        application.accepted = True
+        application.save()
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.context['project'].participant_count == 1
+        etag = response.headers['ETag']
+        french = reverse('project_detail', args=[detail.pk]).replace('/en/', '/fr/', 1)
+        assert authenticated_client.get(french, HTTP_IF_NONE_MATCH=etag).status_code == 200
+        detail.title = 'Renamed'
+        detail.save()
+        assert authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+class TestManageApplications:
+    """Test cases for the applicant review page."""
+
+    @pytest.fixture
+    def reviewed(self, profile):
+        project = Project.objects.create(
+            title='Popular Project', description='Many applicants', project_type='research', posted_by=profile
+        )
+        for n in range(5):
+            applicant = Profile.objects.create(user=User.objects.create_user(f'applicant{n}'), user_type='student')
+            ProjectParticipant.objects.create(project=project, profile=applicant, accepted=n < 2)
+        return project
+
+    def test_counts_are_aggregated(self, authenticated_client, reviewed):
+        """Test that totals come from SQL aggregates, not from looping in the template."""
+        response = authenticated_client.get(reverse('manage_applications', args=[reviewed.pk]))
+        assert response.status_code == 200
+        assert response.context['counts'] == {'total': 5, 'accepted': 2, 'pending': 3}
+        assert len(response.context['applications']) == 5
+
+    def test_filter_by_status(self, authenticated_client, reviewed):
+        """Test that the list can be narrowed to pending or accepted applicants."""
+        url = reverse('manage_applications', args=[reviewed.pk])
+        pending = authenticated_client.get(url, {'status': 'pending'}).context
+        assert [a.accepted for a in pending['applications']] == [False] * 3
+        assert pending['page'].count == 3
+        accepted = authenticated_client.get(url, {'status': 'accepted'}).context
+        assert [a.accepted for a in accepted['applications']] == [True] * 2
+        assert authenticated_client.get(url, {'status': 'bogus'}).context['status'] == ''
+
+    def test_list_is_paginated(self, authenticated_client, reviewed, settings):
+        """Test that applicants are paged newest first, keeping the status filter."""
+        settings.PAGINATE_BY = 2
+        url = reverse('manage_applications', args=[reviewed.pk])
+        first = authenticated_client.get(url, {'status': 'pending'}).context['page']
+        assert len(first.object_list) == 2 and first.has_next
+        assert 'status=pending' in first.next_url
+        second = authenticated_client.get(url + first.next_url).context['page']
+        assert len(second.object_list) == 1
+
+    def test_other_users_cannot_manage(self, client, reviewed):
+        """Test that only the project owner sees the applicants."""
+        client.force_login(User.objects.get(username='applicant0'))
+        response = client.get(reverse('manage_applications', args=[reviewed.pk]))
+        assert 'applications' not in response.context
+
+    def test_batch_accept(self, authenticated_client, reviewed):
+        """Test that selected pending applications are accepted together with joined_at set."""
+        pending = list(ProjectParticipant.objects.filter(project=reviewed, accepted=False).values_list('pk', flat=True))
+        response = authenticated_client.post(
+            reverse('decide_applications', args=[reviewed.pk]),
+            {'action': 'accept', 'application_ids': pending[:2], 'status': 'pending'},
+        )
+        assert response.status_code == 302
+        assert response.url.endswith('?status=pending')
+        accepted = ProjectParticipant.objects.filter(pk__in=pending[:2])
+        assert all(a.accepted and a.joined_at for a in accepted)
+        assert ProjectParticipant.objects.filter(project=reviewed, accepted=False).count() == 1
+
+    def test_batch_reject_ignores_other_projects(self, authenticated_client, reviewed, profile):
+        """Test that a batch only touches applications of the project it was posted to."""
+        other = Project.objects.create(title='Other', description='x', project_type='research', posted_by=profile)
+        stray = ProjectParticipant.objects.create(
+            project=other, profile=Profile.objects.get(user__username='applicant0')
+        )
+        pending = list(ProjectParticipant.objects.filter(project=reviewed, accepted=False).values_list('pk', flat=True))
+        authenticated_client.post(
+            reverse('decide_applications', args=[reviewed.pk]),
+            {'action': 'reject', 'application_ids': pending + [stray.pk, 'x']},
+        )
+        assert ProjectParticipant.objects.filter(project=reviewed).count() == 2
+        assert ProjectParticipant.objects.filter(pk=stray.pk).exists()
+
+    def test_batch_query_count_is_constant(self, authenticated_client, reviewed, profile, measured_requests):
+        """Test that deciding 2 or 20 applications runs the same number of queries."""
+        for n in range(5, 23):
+            applicant = Profile.objects.create(user=User.objects.create_user(f'applicant{n}'))
+            ProjectParticipant.objects.create(project=reviewed, profile=applicant)
+        url = reverse('decide_applications', args=[reviewed.pk])
+        for action in ('accept', 'reject'):
+            ids = list(ProjectParticipant.objects.filter(project=reviewed, accepted=False).values_list('pk', flat=True))
+            authenticated_client.post(url, {'action': action, 'application_ids': ids[:2]})
+            authenticated_client.post(url, {'action': action, 'application_ids': ids[2:]})
+        counts = [metrics.queries for _, _, metrics in measured_requests]
+        assert counts[0] == counts[1] and counts[2] == counts[3]
+
+    def test_decisions_require_owner_and_post(self, authenticated_client, reviewed):
+        """Test that GET requests and other users cannot change applications."""
+        application = ProjectParticipant.objects.filter(project=reviewed, accepted=False).first()
+        authenticated_client.get(reverse('accept_application', args=[application.pk]))
+        client = Client()
+        client.force_login(User.objects.get(username='applicant0'))
+        client.post(reverse('decide_applications', args=[reviewed.pk]), {'action': 'reject', 'application_ids': [application.pk]})
+        client.post(reverse('reject_application', args=[application.pk]))
+        application.refresh_from_db()
+        assert not application.accepted
+        authenticated_client.post(reverse('accept_application', args=[application.pk]))
+        application.refresh_from_db()
+        assert application.accepted
+
+
+@pytest.mark.django_db
+class TestConversations:
+    """Test cases for the threaded inbox."""
+
+    @pytest.fixture
+    def other(self):
+        return Profile.objects.create(user=User.objects.create_user('other', password='testpass123'), user_type='company')
+
+    def test_inbox_orders_threads_by_last_activity(self, authenticated_client, profile, other):
+        """Test that a reply moves its thread to the top of the inbox."""
+        older = Message.objects.create(sender=other, recipient=profile, subject='Older', body='1')
+        newer = Message.objects.create(sender=other, recipient=profile, subject='Newer', body='2')
+        Message.objects.create(conversation=older.conversation, sender=other, recipient=profile, body='3')
+        response = authenticated_client.get(reverse('inbox'))
+        threads = [membership.conversation for membership in response.context['conversations']]
+        assert threads == [older.conversation, newer.conversation]
+        assert response.context['conversations'][0].unread_count == 2
+        assert response.context['conversations'][0].correspondent == other
+
+    def test_opening_thread_marks_it_read(self, authenticated_client, profile, other):
+        """Test that viewing a thread reads its messages and clears its counter."""
+        message = Message.objects.create(sender=other, recipient=profile, subject='Hi', body='Hello')
+        response = authenticated_client.get(reverse('conversation', args=[message.conversation_id]))
+        assert response.status_code == 200
+        assert list(response.context['thread_messages']) == [message]
+        message.refresh_from_db()
+        assert message.read
+        assert ConversationParticipant.objects.get(profile=profile).unread_count == 0
+
+    def test_reply_goes_to_other_participant(self, authenticated_client, profile, other):
+        """Test that a reply is added to the thread and addressed to the other side."""
+        message = Message.objects.create(sender=other, recipient=profile, subject='Hi', body='Hello')
+        url = reverse('conversation', args=[message.conversation_id])
+        response = authenticated_client.post(url, {'body': 'Thanks'})
+        assert response.status_code == 302
+        reply = Message.objects.latest('pk')
+        assert reply.conversation_id == message.conversation_id
+        assert reply.recipient == other
+        assert reply.subject == 'Hi'
+
+    def test_outsiders_get_404(self, profile, other):
+        """Test that users outside a thread cannot open it."""
+        message = Message.objects.create(sender=other, recipient=profile, body='Private')
+        outsider = Profile.objects.create(user=User.objects.create_user('outsider', password='pass12345'))
+        client = Client()
+        client.force_login(outsider.user)
+        response = client.get(reverse('conversation', args=[message.conversation_id]))
+        assert response.status_code == 404